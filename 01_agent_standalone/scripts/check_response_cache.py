@@ -0,0 +1,41 @@
+"""
+Checks which prompts the response cache (response_cache.py) serves from a cached answer.
+
+Prompts that differ only in case or punctuation must hit. Prompts that
+differ in a place, an amount or a negation must miss, however similar they look.
+
+Usage:
+    python ./scripts/check_response_cache.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from response_cache import ResponseCache
+
+# (cached prompt, looked-up prompt, whether the cached answer may be served)
+CASES = [
+    ("What is the weather usually like in Rome?", "what is the weather usually like in Rome", True),
+    ("I am planning a family trip to Rome in April, what is the weather usually like?", "I am planning a family trip to Rome in April - what is the weather usually like?", True),
+    ("I am planning a trip, what is the weather usually like in Rome?", "I am planning a trip, what is the weather usually like in Milan?", False),
+    ("Is it safe to swim at the beaches in Nice in October?", "Is it not safe to swim at the beaches in Nice in October?", False),
+    ("Is it safe to swim at the beaches in Nice in October?", "Isn't it safe to swim at the beaches in Nice in October?", False),
+    ("How much is 100 EUR in USD?", "How much is 150 EUR in USD?", False),
+]
+
+
+def main():
+    failures = 0
+    for cached, prompt, expected in CASES:
+        cache = ResponseCache()
+        cache.put(cached, f"answer to: {cached}")
+        served = cache.get(prompt) is not None
+        ok = served == expected
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} {'hit ' if served else 'miss'} {prompt!r} (cached {cached!r})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
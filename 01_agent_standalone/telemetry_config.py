@@ -0,0 +1,240 @@
+import base64
+import json
+import logging
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult, PeriodicExportingMetricReader
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanLimits, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+logger = logging.getLogger(__name__)
+
+MODES = ("auto", "off", "batch", "console", "file")
+
+
+def _hex_ids(value: Any) -> Any:
+    """OTLP/JSON encodes trace and span ids as hex, protobuf JSON as base64"""
+    if isinstance(value, dict):
+        return {
+            key: base64.b64decode(item).hex() if key in ("traceId", "spanId", "parentSpanId") and item else _hex_ids(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_hex_ids(item) for item in value]
+    return value
+
+
+class OTLPJsonFile:
+    """Appends OTLP export requests to a file as JSON lines, like the collector's file exporter"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, request: Any) -> bool:
+        from google.protobuf.json_format import MessageToDict
+
+        line = json.dumps(_hex_ids(MessageToDict(request)), separators=(",", ":"))
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write telemetry to {self.path}: {e}")
+            return False
+        return True
+
+
+def file_exporters(path: str) -> tuple:
+    """Span and metric exporters writing OTLP/JSON lines to `path`"""
+    from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+    from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+
+    output = OTLPJsonFile(path)
+
+    class FileSpanExporter(SpanExporter):
+        def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+            return SpanExportResult.SUCCESS if output.write(encode_spans(spans)) else SpanExportResult.FAILURE
+
+        def shutdown(self) -> None:
+            pass
+
+    class FileMetricExporter(MetricExporter):
+        def export(self, metrics_data: Any, timeout_millis: float = 10_000, **kwargs: Any) -> MetricExportResult:
+            return MetricExportResult.SUCCESS if output.write(encode_metrics(metrics_data)) else MetricExportResult.FAILURE
+
+        def force_flush(self, timeout_millis: float = 10_000) -> bool:
+            return True
+
+        def shutdown(self, timeout_millis: float = 30_000, **kwargs: Any) -> None:
+            pass
+
+    return FileSpanExporter(), FileMetricExporter()
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """Buffers the spans of a trace until its local root ends, then exports or drops the whole trace.
+
+    Traces with an error or a root slower than `latency_threshold` seconds are always kept; the
+    rest are kept with probability `ratio`. At most `max_traces` unfinished traces are buffered,
+    the oldest are dropped beyond that.
+    """
+
+    def __init__(self, delegate: SpanProcessor, ratio: float, latency_threshold: float, max_traces: int = 4096):
+        self._delegate = delegate
+        self._ratio = ratio
+        self._latency_threshold_ns = int(latency_threshold * 1e9)
+        self._max_traces = max_traces
+        self._traces: "OrderedDict[int, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"kept": 0, "dropped": 0, "overflow": 0}
+
+    def on_start(self, span: Any, parent_context: Any = None) -> None:
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            spans = self._traces.setdefault(trace_id, [])
+            spans.append(span)
+            if not is_local_root:
+                if len(self._traces) > self._max_traces:
+                    self._traces.popitem(last=False)
+                    self.stats["overflow"] += 1
+                return
+            del self._traces[trace_id]
+
+        keep = (
+            any(s.status.status_code == StatusCode.ERROR for s in spans)
+            or span.end_time - span.start_time >= self._latency_threshold_ns
+            or random.random() < self._ratio
+        )
+        with self._lock:
+            self.stats["kept" if keep else "dropped"] += 1
+        if keep:
+            for finished in spans:
+                self._delegate.on_end(finished)
+
+    def shutdown(self) -> None:
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30_000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+
+def configure_telemetry(
+    service_name: str,
+    mode: Optional[str] = None,
+    span_exporter: Optional[SpanExporter] = None,
+    metric_exporter: Optional[MetricExporter] = None,
+) -> Dict[str, Any]:
+    """Configure span and metric export for an agent process from AGENT_TELEMETRY_* environment variables.
+
+    Modes:
+      auto    - keep whatever opentelemetry-instrument set up (nothing otherwise); adds the file
+                exporter when AGENT_TELEMETRY_FILE is set
+      off     - no-op tracer and meter providers, spans cost almost nothing
+      batch   - asynchronous batched OTLP export (or `span_exporter`, e.g. in benchmarks)
+      console - synchronous pretty-printed spans on stdout, for local debugging only
+      file    - batched OTLP/JSON lines to AGENT_TELEMETRY_FILE
+
+    Providers can only be set once per process. Under opentelemetry-instrument the distro owns
+    sampling and limits, so configure them with the standard OTEL_TRACES_SAMPLER(_ARG) and
+    OTEL_*_LIMIT variables there. Returns the effective configuration.
+    """
+    mode = (mode or os.getenv("AGENT_TELEMETRY_MODE", "auto")).lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown AGENT_TELEMETRY_MODE '{mode}', expected one of {MODES}")
+    file_path = os.getenv("AGENT_TELEMETRY_FILE")
+    settings = {
+        "mode": mode,
+        "head_sample_ratio": float(os.getenv("AGENT_TELEMETRY_SAMPLE_RATIO", "1.0")),
+        "tail_sample_ratio": float(os.getenv("AGENT_TELEMETRY_TAIL_SAMPLE_RATIO", "1.0")),
+        "tail_latency_threshold": float(os.getenv("AGENT_TELEMETRY_TAIL_LATENCY_MS", "2000")) / 1000,
+        "max_attribute_length": int(os.getenv("AGENT_TELEMETRY_MAX_ATTRIBUTE_LENGTH", "2048")),
+        "max_attributes": int(os.getenv("AGENT_TELEMETRY_MAX_ATTRIBUTES", "64")),
+        "max_events": int(os.getenv("AGENT_TELEMETRY_MAX_EVENTS", "64")),
+        "metric_export_interval": float(os.getenv("AGENT_TELEMETRY_METRIC_INTERVAL", "60")),
+        "file": file_path,
+    }
+
+    if mode == "off":
+        if isinstance(trace.get_tracer_provider(), TracerProvider):
+            logger.warning("Tracer provider already configured (opentelemetry-instrument?), set OTEL_SDK_DISABLED=true to turn it off")
+            return settings
+        trace.set_tracer_provider(trace.NoOpTracerProvider())
+        metrics.set_meter_provider(metrics.NoOpMeterProvider())
+        logger.info("Telemetry disabled")
+        return settings
+
+    # The SDK logs a warning for every truncated attribute, which costs more than the truncation
+    logging.getLogger("opentelemetry.attributes").setLevel(logging.ERROR)
+
+    existing = trace.get_tracer_provider()
+    if mode == "auto":
+        if file_path and isinstance(existing, TracerProvider):
+            span_exporter, _ = file_exporters(file_path)
+            existing.add_span_processor(BatchSpanProcessor(span_exporter))
+            logger.info(f"Also writing spans as OTLP/JSON to {file_path}")
+            return settings
+        if file_path:
+            mode = settings["mode"] = "file"
+        else:
+            return settings
+
+    if isinstance(existing, TracerProvider):
+        logger.warning(f"Tracer provider already configured (opentelemetry-instrument?), ignoring AGENT_TELEMETRY_MODE={mode}")
+        return settings
+
+    if mode == "file":
+        if not file_path:
+            raise ValueError("AGENT_TELEMETRY_MODE=file requires AGENT_TELEMETRY_FILE")
+        span_exporter, metric_exporter = file_exporters(file_path)
+    elif mode == "console":
+        span_exporter = span_exporter or ConsoleSpanExporter()
+    elif span_exporter is None:
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        span_exporter, metric_exporter = OTLPSpanExporter(), metric_exporter or OTLPMetricExporter()
+
+    resource = Resource.create({"service.name": service_name})
+    tracer_provider = TracerProvider(
+        resource=resource,
+        sampler=ParentBased(TraceIdRatioBased(settings["head_sample_ratio"])),
+        span_limits=SpanLimits(
+            max_span_attributes=settings["max_attributes"],
+            max_events=settings["max_events"],
+            max_attribute_length=settings["max_attribute_length"],
+        ),
+    )
+    # Console export is synchronous by design; everything else is exported from a background thread
+    processor = SimpleSpanProcessor(span_exporter) if mode == "console" else BatchSpanProcessor(span_exporter)
+    if settings["tail_sample_ratio"] < 1.0:
+        processor = TailSamplingSpanProcessor(processor, settings["tail_sample_ratio"], settings["tail_latency_threshold"])
+    tracer_provider.add_span_processor(processor)
+    trace.set_tracer_provider(tracer_provider)
+
+    readers = []
+    if metric_exporter is not None:
+        readers.append(PeriodicExportingMetricReader(
+            metric_exporter, export_interval_millis=settings["metric_export_interval"] * 1000
+        ))
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=readers))
+    logger.info(f"Telemetry configured: {settings}")
+    return settings
@@ -0,0 +1,226 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, Callable, Deque, Dict, Optional
+
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or queue timeout)"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A queued request waiting for a slot, from a worker thread or an event loop"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def grant(self) -> None:
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._resolve)
+        else:
+            self.event.set()
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class AdmissionController:
+    """Bounds in-flight work of an entrypoint and queues a limited number of requests.
+
+    Up to `max_in_flight` requests run at once. Further requests wait in a FIFO queue of
+    at most `max_queue` entries for up to `queue_timeout` seconds. Anything beyond that is
+    answered immediately with a structured busy response instead of piling up model calls.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 16, queue_timeout: float = 10.0, name: str = "agent"):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue: Deque[_Waiter] = deque()
+        self._wait_times: Deque[float] = deque(maxlen=1024)
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "max_queue_depth": 0}
+
+        meter = metrics.get_meter(__name__)
+        attributes = {"entrypoint": name}
+        meter.create_observable_gauge(
+            "admission.queue_depth",
+            callbacks=[lambda options: [metrics.Observation(len(self._queue), attributes)]],
+            description="Requests waiting for an admission slot",
+        )
+        meter.create_observable_gauge(
+            "admission.in_flight",
+            callbacks=[lambda options: [metrics.Observation(self._in_flight, attributes)]],
+            description="Requests currently being processed",
+        )
+        self._wait_histogram = meter.create_histogram(
+            "admission.wait_time", unit="s", description="Time spent waiting for an admission slot"
+        )
+        self._attributes = attributes
+
+    @classmethod
+    def from_env(cls, name: str = "agent") -> "AdmissionController":
+        """Create a controller configured by ADMISSION_* environment variables"""
+        return cls(
+            max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "16")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10")),
+            name=name,
+        )
+
+    def admit(self, handler: Callable) -> Callable:
+        """Wrap an entrypoint handler (sync, async or async generator) with admission control"""
+        if inspect.isasyncgenfunction(handler):
+            @functools.wraps(handler)
+            async def async_gen_wrapper(*args, **kwargs):
+                try:
+                    await self.acquire_async()
+                except AdmissionRejected as e:
+                    yield self.busy_response(e)
+                    return
+                # The slot is held until the stream is finished, fails, or the consumer drops it:
+                # aclose() (or finalization of an abandoned stream) raises GeneratorExit at the
+                # yield, which closes the handler's stream first and then gives the slot back
+                try:
+                    async with aclosing(handler(*args, **kwargs)) as stream:
+                        async for item in stream:
+                            yield item
+                finally:
+                    self.release()
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    await self.acquire_async()
+                except AdmissionRejected as e:
+                    return self.busy_response(e)
+                try:
+                    return await handler(*args, **kwargs)
+                finally:
+                    self.release()
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def sync_wrapper(*args, **kwargs):
+            try:
+                self.acquire_sync()
+            except AdmissionRejected as e:
+                return self.busy_response(e)
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self.release()
+        return sync_wrapper
+
+    def acquire_sync(self) -> None:
+        """Take a slot from a worker thread, waiting in the queue if needed"""
+        started = time.monotonic()
+        waiter = self._try_admit_or_enqueue(None)
+        if waiter is not None:
+            waiter.event.wait(self.queue_timeout)
+            self._finish_wait(waiter)
+        self._record_wait(time.monotonic() - started)
+
+    async def acquire_async(self) -> None:
+        """Take a slot from the event loop, waiting in the queue if needed"""
+        started = time.monotonic()
+        waiter = self._try_admit_or_enqueue(asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait({waiter.future}, timeout=self.queue_timeout)
+            except asyncio.CancelledError:
+                # The caller went away while queued; give back a slot that was already handed over
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._queue.remove(waiter)
+                if granted:
+                    self.release()
+                raise
+            self._finish_wait(waiter)
+        self._record_wait(time.monotonic() - started)
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the oldest queued request"""
+        with self._lock:
+            if self._queue:
+                waiter = self._queue.popleft()
+                waiter.granted = True
+            else:
+                self._in_flight -= 1
+                return
+        waiter.grant()
+
+    def busy_response(self, rejection: AdmissionRejected) -> Dict[str, Any]:
+        """Structured response returned to callers that were not admitted"""
+        return {
+            "type": "busy",
+            "error": "busy",
+            "message": f"The agent is at capacity ({rejection.reason}), please retry shortly.",
+            "retry_after_seconds": rejection.retry_after,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return admission counters, queue depth and wait-time percentiles"""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            snapshot = self._snapshot_locked()
+        if waits:
+            snapshot["wait_p50_ms"] = round(waits[len(waits) // 2] * 1000, 1)
+            snapshot["wait_p99_ms"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 1)
+        return snapshot
+
+    def _try_admit_or_enqueue(self, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._queue:
+                self._in_flight += 1
+                self.stats["admitted"] += 1
+                return None
+            if len(self._queue) >= self.max_queue:
+                self.stats["rejected"] += 1
+                logger.warning(f"Admission rejected, queue full: {self._snapshot_locked()}")
+                raise AdmissionRejected("queue full", retry_after=self.queue_timeout)
+            waiter = _Waiter(loop)
+            self._queue.append(waiter)
+            self.stats["queued"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._queue))
+            return waiter
+
+    def _finish_wait(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                self.stats["admitted"] += 1
+                return
+            self._queue.remove(waiter)
+            self.stats["timed_out"] += 1
+        raise AdmissionRejected("queue timeout", retry_after=self.queue_timeout)
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._wait_times.append(seconds)
+        self._wait_histogram.record(seconds, self._attributes)
+
+    def _snapshot_locked(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": self._in_flight, "queue_depth": len(self._queue)}
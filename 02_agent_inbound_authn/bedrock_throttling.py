@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict
+
+from botocore.config import Config as BotocoreConfig
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, HTTPClientError
+from strands.models import BedrockModel
+from strands.types.exceptions import ModelThrottledException
+
+logger = logging.getLogger(__name__)
+
+# Bedrock errors that another attempt may not hit; throttles are handled separately
+TRANSIENT_ERROR_CODES = frozenset(["InternalServerException", "ServiceUnavailableException", "ModelNotReadyException"])
+
+
+class BedrockRetriesExhaustedError(Exception):
+    """A throttled Bedrock call was given up on by the rate limiter.
+
+    Deliberately not a ModelThrottledException: the Strands event loop retries those on its
+    own (up to 6 attempts with a 4 s to 240 s backoff), which would bypass the retry budget
+    and the AIMD rate.
+    """
+
+
+class AdaptiveRateLimiter:
+    """Process-wide client-side rate limiter and retry policy for Bedrock calls.
+
+    A token bucket spaces out model calls. Its refill rate follows AIMD: every throttle
+    halves it, every success adds `rate_increase` requests/second back up to `max_rate`.
+    Throttled calls are retried with full-jitter exponential backoff, limited by a retry
+    budget that successful calls replenish, so retries cannot amplify an overload.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = 5.0,
+        burst: int = 10,
+        min_rate: float = 0.2,
+        rate_decrease: float = 0.5,
+        rate_increase: float = 0.05,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 20.0,
+        retry_budget_ratio: float = 0.2,
+        retry_budget_max: float = 10.0,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = max_rate
+        self.burst = burst
+        self.rate_decrease = rate_decrease
+        self.rate_increase = rate_increase
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_budget_ratio = retry_budget_ratio
+        self.retry_budget_max = retry_budget_max
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._retry_budget = retry_budget_max
+        self.stats = {"requests": 0, "throttles": 0, "retries": 0, "budget_exhausted": 0, "transient_errors": 0, "wait_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveRateLimiter":
+        """Create a limiter configured by BEDROCK_* environment variables"""
+        return cls(
+            max_rate=float(os.getenv("BEDROCK_RATE_LIMIT_RPS", "5")),
+            burst=int(os.getenv("BEDROCK_RATE_LIMIT_BURST", "10")),
+            max_retries=int(os.getenv("BEDROCK_MAX_RETRIES", "4")),
+            retry_budget_ratio=float(os.getenv("BEDROCK_RETRY_BUDGET_RATIO", "0.2")),
+        )
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            self.stats["requests"] += 1
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self.stats["wait_seconds"] += delay
+            return delay
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.rate_increase)
+            self._retry_budget = min(self.retry_budget_max, self._retry_budget + self.retry_budget_ratio)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.rate_decrease)
+            self.stats["throttles"] += 1
+            logger.warning(f"Bedrock throttled the request, client rate lowered to {self.rate:.2f} req/s")
+
+    def on_transient_error(self) -> None:
+        # Server and network failures say nothing about the quota, so the rate is kept
+        with self._lock:
+            self.stats["transient_errors"] += 1
+
+    def try_retry(self, attempt: int) -> bool:
+        """Spend retry budget for another attempt; False if the caller should give up"""
+        with self._lock:
+            if attempt >= self.max_retries:
+                return False
+            if self._retry_budget < 1:
+                self.stats["budget_exhausted"] += 1
+                return False
+            self._retry_budget -= 1
+            self.stats["retries"] += 1
+            return True
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "rate": round(self.rate, 3), "retry_budget": round(self._retry_budget, 2)}
+
+
+# Shared by every model instance in the process, so all agents see the same Bedrock quota
+default_rate_limiter = AdaptiveRateLimiter.from_env()
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed Bedrock call is worth retrying: a 5xx, a reset connection or a timeout"""
+    if isinstance(error, (BotocoreConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return code in TRANSIENT_ERROR_CODES or status >= 500
+    return False
+
+
+class ThrottledBedrockModel(BedrockModel):
+    """BedrockModel that goes through the shared rate limiter and retries throttled calls.
+
+    Calls that fail before any event was streamed are retried here, with the limiter's
+    backoff and retry budget: throttles, which also lower the rate, and transient errors (5xx,
+    reset connections, timeouts; see `is_transient_error`), which botocore would otherwise
+    have retried. A throttle that is not retried, because events were already streamed or the
+    limiter's retries or budget are spent, ends the call with BedrockRetriesExhaustedError, so
+    the Strands event loop does not retry it again behind the limiter's back. Other errors are
+    re-raised unchanged.
+    """
+
+    def __init__(self, *, rate_limiter: AdaptiveRateLimiter = default_rate_limiter, **model_config: Any):
+        # Retries of throttles and transient errors are handled by the limiter, so botocore must not retry on its own
+        model_config.setdefault("boto_client_config", BotocoreConfig(retries={"max_attempts": 1, "mode": "standard"}))
+        super().__init__(**model_config)
+        self.rate_limiter = rate_limiter
+
+    async def stream(self, *args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            streamed = False
+            try:
+                async for event in super().stream(*args, **kwargs):
+                    streamed = True
+                    yield event
+            except ModelThrottledException as e:
+                self.rate_limiter.on_throttle()
+                if streamed or not self.rate_limiter.try_retry(attempt):
+                    raise BedrockRetriesExhaustedError(f"Bedrock call throttled after {attempt} retries: {e}") from e
+                await asyncio.sleep(self.rate_limiter.backoff(attempt))
+                attempt += 1
+                continue
+            except Exception as e:
+                if streamed or not is_transient_error(e):
+                    raise
+                self.rate_limiter.on_transient_error()
+                if not self.rate_limiter.try_retry(attempt):
+                    raise
+                logger.warning(f"Transient Bedrock error, retrying: {e}")
+                await asyncio.sleep(self.rate_limiter.backoff(attempt))
+                attempt += 1
+                continue
+            self.rate_limiter.on_success()
+            return
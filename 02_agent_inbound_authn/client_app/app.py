@@ -1,11 +1,11 @@
 import streamlit as st
-import requests
 import urllib.parse
 import secrets
 import base64
 import json
 import os
 from dotenv import load_dotenv
+from http_client import HttpConfig, get_http_session
 
 # Load environment variables from .env file
 load_dotenv()
@@ -63,7 +63,7 @@ def exchange_code_for_token(code, state):
         'scope': SCOPE
     }
     
-    response = requests.post(token_url, data=data)
+    response = get_http_session().post(token_url, data=data, timeout=HttpConfig.timeout(30))
     if response.status_code == 200:
         return response.json()
     else:
@@ -110,11 +110,12 @@ def call_agent(prompt, auth_token):
     }
     
     try:
-        response = requests.post(
+        # Pooled keep-alive session: follow-up turns skip the TCP and TLS handshakes
+        response = get_http_session().post(
             url,
             headers=headers,
             data=json.dumps({"prompt": prompt}),
-            timeout=30
+            timeout=HttpConfig.timeout(30)
         )
         
         if response.status_code == 200:
@@ -229,7 +230,9 @@ if st.session_state.get('authenticated', False):
                 access_token = st.session_state.get('access_token')
                 agent_response = call_agent(prompt, access_token)
             
-            if isinstance(agent_response, dict) and "error" in agent_response:
+            if isinstance(agent_response, dict) and agent_response.get("error") == "busy":
+                response = f"⏳ {agent_response.get('message')}"
+            elif isinstance(agent_response, dict) and "error" in agent_response:
                 response = f"Sorry, I encountered an error: {agent_response['error']}"
             elif isinstance(agent_response, dict):
                 # Extract response from agent (adjust based on actual response format)
@@ -0,0 +1,42 @@
+import os
+from http.cookiejar import DefaultCookiePolicy
+from typing import Tuple
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpConfig:
+    CONNECT_TIMEOUT = float(os.getenv('AGENT_HTTP_CONNECT_TIMEOUT', '5'))
+    READ_TIMEOUT = os.getenv('AGENT_HTTP_READ_TIMEOUT')
+    POOL_MAXSIZE = int(os.getenv('AGENT_HTTP_POOL_MAXSIZE', '10'))
+    CONNECT_RETRIES = int(os.getenv('AGENT_HTTP_CONNECT_RETRIES', '2'))
+
+    @classmethod
+    def timeout(cls, default_read_timeout: float) -> Tuple[float, float]:
+        """(connect, read) timeout; the read timeout bounds the gap between two received chunks"""
+        return cls.CONNECT_TIMEOUT, float(cls.READ_TIMEOUT or default_read_timeout)
+
+
+def create_session() -> requests.Session:
+    """HTTP session with keep-alive connection pools, shared by all users of the app.
+
+    Connection attempts that fail are retried (nothing was sent yet, so this is safe for POST);
+    requests that reached the server are never retried. Cookies are not stored, so no state
+    leaks between the users sharing the session.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    retries = Retry(total=HttpConfig.CONNECT_RETRIES, connect=HttpConfig.CONNECT_RETRIES, read=0, status=0, other=0, backoff_factor=0.1)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HttpConfig.POOL_MAXSIZE, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Process-wide session, created once and reused across Streamlit reruns and user sessions"""
+    return create_session()
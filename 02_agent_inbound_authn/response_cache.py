@@ -0,0 +1,252 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How long an answer stays valid, by the tools that produced it (None = never expires)
+TOOL_TTLS: Dict[str, Optional[float]] = {
+    "weather": 300.0,
+    "calculator": None,
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"[^\w\s.]")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Words whose presence or absence does not change what a travel question asks
+STOPWORDS = frozenset("""
+a about am an and any are as at be been being can could do does did for from get give how i
+if in into is it its just know let like me much my of on or our please should so some tell
+than that the their them then there these this those to us usually was we what when where
+which who will with would you your
+""".split())
+NEGATIONS = frozenset(["not", "no", "never", "nor", "none", "nothing", "cannot", "without"])
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_WORD_RE.sub(" ", prompt.lower()).split())
+
+
+def content_tokens(prompt: str) -> FrozenSet[str]:
+    """Words a near-duplicate must share: names, negations and every other non-stopword"""
+    tokens = set()
+    for word in _TOKEN_RE.findall(prompt.lower().replace("\u2019", "'")):
+        if word.endswith("n't"):
+            # "isn't", "don't", "can't": the auxiliary is a stopword, the negation is not
+            tokens.add("not")
+            continue
+        word = word.split("'")[0]
+        if word in NEGATIONS:
+            tokens.add("not")
+        elif word not in STOPWORDS:
+            tokens.add(word)
+    return frozenset(tokens)
+
+
+def shingles(text: str, size: int = 4) -> FrozenSet[str]:
+    """Character shingles of a normalized prompt"""
+    if len(text) <= size:
+        return frozenset([text])
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def tools_used(messages: Iterable[Dict[str, Any]]) -> List[str]:
+    """Names of the tools called in the given agent messages"""
+    names = []
+    for message in messages:
+        for block in message.get("content", []):
+            tool_use = block.get("toolUse") if isinstance(block, dict) else None
+            if tool_use and tool_use.get("name"):
+                names.append(tool_use["name"])
+    return names
+
+
+@dataclass
+class CacheEntry:
+    """A cached answer and what is needed to match near-duplicate prompts"""
+    response: str
+    expires_at: Optional[float]
+    shingles: FrozenSet[str]
+    numbers: Tuple[str, ...]
+    tokens: FrozenSet[str]
+    bands: Tuple[Tuple[int, Tuple[int, ...]], ...]
+    size: int
+
+
+class ResponseCache:
+    """Answer cache for the travel agent entrypoint.
+
+    Prompts are matched exactly after normalization, or as near-duplicates through a
+    MinHash/LSH index over character shingles. Near-duplicate candidates must reach
+    `similarity_threshold` Jaccard similarity, contain the same numbers and the same content
+    tokens (see `content_tokens`). Prompts that differ only in stopwords, punctuation or word
+    order share an answer; a different city, amount or a negation never does. Entries expire according to the
+    tools that produced them and are evicted LRU by count and total size.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 1024,
+        max_bytes: int = 8 * 1024 * 1024,
+        default_ttl: Optional[float] = 3600.0,
+        similarity_threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 1,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.similarity_threshold = similarity_threshold
+        self._rows = num_perm // bands
+        self._bands = bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._bytes = 0
+        self.stats = {"lookups": 0, "exact_hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Create a cache configured by RESPONSE_CACHE_* environment variables"""
+        return cls(
+            enabled=os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true",
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+            similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.85")),
+        )
+
+    def get(self, prompt: str) -> Optional[str]:
+        """Return a cached answer for the prompt or a near-duplicate of it"""
+        if not self.enabled or not prompt:
+            return None
+        key = normalize_prompt(prompt)
+        now = time.time()
+        # MinHash is the expensive part, so compute it before taking the lock
+        prompt_shingles = shingles(key)
+        bands = self._bands_for(prompt_shingles)
+        prompt_tokens = content_tokens(prompt)
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry, now):
+                    self._entries.move_to_end(key)
+                    self.stats["exact_hits"] += 1
+                    return entry.response
+                self._remove_locked(key)
+
+            match = self._find_similar_locked(key, prompt_tokens, prompt_shingles, bands, now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.stats["similar_hits"] += 1
+                return self._entries[match].response
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, prompt: str, response: str, tool_names: Iterable[str] = ()) -> None:
+        """Store an answer, with a TTL derived from the tools that produced it"""
+        if not self.enabled or not prompt or not response:
+            return
+        ttl = self._ttl_for(tool_names)
+        if ttl is not None and ttl <= 0:
+            return
+
+        key = normalize_prompt(prompt)
+        prompt_shingles = shingles(key)
+        entry = CacheEntry(
+            response=response,
+            expires_at=None if ttl is None else time.time() + ttl,
+            shingles=prompt_shingles,
+            numbers=tuple(_NUMBER_RE.findall(key)),
+            tokens=content_tokens(prompt),
+            bands=self._bands_for(prompt_shingles),
+            size=len(key) + len(response),
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(key)
+            self.stats["stores"] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove_locked(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return cache counters, size and hit rate"""
+        with self._lock:
+            hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": round(hits / self.stats["lookups"], 3) if self.stats["lookups"] else 0.0,
+            }
+
+    def _ttl_for(self, tool_names: Iterable[str]) -> Optional[float]:
+        ttls = [TOOL_TTLS.get(name, 0.0) for name in set(tool_names)]
+        if not ttls:
+            return self.default_ttl
+        finite = [ttl for ttl in ttls if ttl is not None]
+        return min(finite) if finite else None
+
+    def _signature(self, prompt_shingles: FrozenSet[str]) -> List[int]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in prompt_shingles]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _bands_for(self, prompt_shingles: FrozenSet[str]) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+        signature = self._signature(prompt_shingles)
+        return tuple(
+            (band, tuple(signature[band * self._rows:(band + 1) * self._rows]))
+            for band in range(self._bands)
+        )
+
+    def _find_similar_locked(self, key: str, tokens: FrozenSet[str], prompt_shingles: FrozenSet[str], bands: Tuple, now: float) -> Optional[str]:
+        numbers = tuple(_NUMBER_RE.findall(key))
+        candidates = set()
+        for band in bands:
+            candidates.update(self._buckets.get(band, ()))
+
+        best, best_score = None, self.similarity_threshold
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if entry.numbers != numbers or entry.tokens != tokens or not self._is_fresh(entry, now):
+                continue
+            score = len(prompt_shingles & entry.shingles) / len(prompt_shingles | entry.shingles)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _is_fresh(self, entry: CacheEntry, now: float) -> bool:
+        return entry.expires_at is None or entry.expires_at > now
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
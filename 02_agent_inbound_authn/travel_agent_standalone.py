@@ -1,10 +1,22 @@
 from strands import Agent, tool
 from strands_tools import calculator  # Import the calculator tool
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from strands.models import BedrockModel
+from admission_control import AdmissionController
+from bedrock_throttling import ThrottledBedrockModel
+from response_cache import ResponseCache, tools_used
+from telemetry_config import configure_telemetry
+
+# Batched span export, sampling and attribute caps (see AGENT_TELEMETRY_* env vars)
+configure_telemetry(service_name="travel_agent_bedrock")
 
 app = BedrockAgentCoreApp()
 
+# Bound in-flight requests; excess requests get a fast "busy" response (see ADMISSION_* env vars)
+admission = AdmissionController.from_env(name="travel_agent_bedrock")
+
+# Optional answer cache for repeated prompts (enable with RESPONSE_CACHE_ENABLED=true)
+response_cache = ResponseCache.from_env()
+
 # Create a custom weather tool for travel assistance
 @tool
 def weather():
@@ -12,9 +24,9 @@ def weather():
     # Dummy implementation - in production, integrate with weather API
     return "sunny and pleasant for travel"
 
-# Configure the Bedrock model
+# Configure the Bedrock model (rate limited and retried on throttling, see BEDROCK_* env vars)
 model_id = "eu.anthropic.claude-3-7-sonnet-20250219-v1:0"
-model = BedrockModel(
+model = ThrottledBedrockModel(
     model_id=model_id,
 )
 
@@ -26,6 +38,7 @@ agent = Agent(
 )
 
 @app.entrypoint
+@admission.admit
 def travel_agent_bedrock(payload):
     """
     Main entry point for the travel agent
@@ -34,11 +47,21 @@ def travel_agent_bedrock(payload):
     user_input = payload.get("prompt")
     print("Travel agent received input:", user_input)
     
+    cached_response = response_cache.get(user_input)
+    if cached_response is not None:
+        print("Travel agent answered from cache:", response_cache.snapshot())
+        return cached_response
+    
     # Process the user input through the agent
+    history_length = len(agent.messages)
     response = agent(user_input)
+    response_text = response.message['content'][0]['text']
+    
+    # Cache the answer, expiring it according to the tools it depended on
+    response_cache.put(user_input, response_text, tools_used(agent.messages[history_length:]))
     
     # Return the text content from the response
-    return response.message['content'][0]['text']
+    return response_text
 
 if __name__ == "__main__":
     # Run the AgentCore application
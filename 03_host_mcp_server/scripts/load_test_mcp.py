@@ -0,0 +1,203 @@
+"""
+Load test for the weather MCP server, run locally over streamable-HTTP.
+
+Each mode starts weather_mcp_server.py in a subprocess on a local port, then N concurrent
+clients open MCP sessions and run a weighted mix of initialize / list_tools / call_tool
+operations. Throughput, p50/p95/p99 latency and error rates are reported per operation,
+comparing stateless_http=True (the deployed configuration) with stateful sessions:
+    python ./scripts/load_test_mcp.py --concurrency 20 --sessions 200
+    python ./scripts/load_test_mcp.py --modes stateless --mix "get_weather=1"
+
+No AgentCore Runtime, Entra ID token or AWS credentials are needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CITIES = ["Oslo", "Paris", "Tokyo", "Berlin", "Madrid", "Rome", "Lisbon", "Vienna", "Prague", "Dublin"]
+
+
+def serve(mode, port):
+    """Run the weather MCP server in this process with the given session mode"""
+    sys.path.insert(0, SERVER_DIR)
+    from weather_mcp_server import mcp
+
+    mcp.settings.stateless_http = mode == "stateless"
+    mcp.settings.host = "127.0.0.1"
+    mcp.settings.port = port
+    mcp.settings.log_level = "WARNING"
+    mcp.run(transport="streamable-http")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"MCP server did not start on port {port} within {timeout}s")
+
+
+def parse_mix(mix):
+    """Parse "list_tools=1,get_weather=4" into operation names and weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return list(weights), list(weights.values())
+
+
+def tool_arguments(name):
+    if name in ("get_weather_batch", "get_forecast_batch"):
+        return {"cities": random.sample(CITIES, 5)}
+    return {"city": random.choice(CITIES)}
+
+
+async def timed(results, name, coro):
+    """Run one MCP operation, record its latency or error and return whether it succeeded"""
+    started = time.perf_counter()
+    try:
+        result = await coro
+    except Exception as e:
+        results[name].append((time.perf_counter() - started, type(e).__name__))
+        return False
+    error = "ToolError" if getattr(result, "isError", False) else None
+    results[name].append((time.perf_counter() - started, error))
+    return True
+
+
+async def run_session(url, operations, weights, ops_per_session, results):
+    try:
+        async with streamablehttp_client(url) as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream) as session:
+                if not await timed(results, "initialize", session.initialize()):
+                    return
+                for name in random.choices(operations, weights, k=ops_per_session):
+                    if name == "list_tools":
+                        ok = await timed(results, name, session.list_tools())
+                    else:
+                        ok = await timed(results, name, session.call_tool(name, tool_arguments(name)))
+                    if not ok:
+                        # The session is likely broken, stop using it
+                        return
+    except Exception as e:
+        # Transport failures while connecting or closing the session
+        results["session"].append((0.0, type(e).__name__))
+
+
+async def run_load(url, args):
+    operations, weights = parse_mix(args.mix)
+    results = defaultdict(list)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def worker():
+        async with semaphore:
+            await run_session(url, operations, weights, args.ops_per_session, results)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.sessions)))
+    return results, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def summarize(mode, results, wall_time):
+    summary = {"mode": mode, "wall_time_s": round(wall_time, 3), "operations": {}}
+    total = 0
+    for name, samples in sorted(results.items()):
+        latencies = sorted(latency for latency, error in samples if error is None)
+        errors = [error for _, error in samples if error is not None]
+        total += len(samples)
+        stats = {"count": len(samples), "error_rate": round(len(errors) / len(samples), 4)}
+        if latencies:
+            stats.update({
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            })
+        if errors:
+            stats["errors"] = {error: errors.count(error) for error in set(errors)}
+        summary["operations"][name] = stats
+    summary["throughput_ops_per_s"] = round(total / wall_time, 1) if wall_time else 0.0
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n📊 {summary['mode']}: {summary['throughput_ops_per_s']} ops/s over {summary['wall_time_s']} s")
+    print(f"   {'operation':<20} {'count':>7} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in summary["operations"].items():
+        print(
+            f"   {name:<20} {stats['count']:>7} {stats['error_rate']:>8.2%} "
+            f"{stats.get('p50_ms', 0):>9.1f} {stats.get('p95_ms', 0):>9.1f} {stats.get('p99_ms', 0):>9.1f}"
+        )
+        for error, count in stats.get("errors", {}).items():
+            print(f"      ❌ {error}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load test for the weather MCP server")
+    parser.add_argument("--modes", default="stateless,stateful", help="Comma-separated session modes to compare")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent MCP sessions")
+    parser.add_argument("--sessions", type=int, default=100, help="Total MCP sessions per mode")
+    parser.add_argument("--ops-per-session", type=int, default=5, help="Operations after initialize in each session")
+    parser.add_argument(
+        "--mix",
+        default="list_tools=1,get_weather=4,get_forecast=2,get_weather_batch=1",
+        help="Weighted operation mix (list_tools or tool names)",
+    )
+    parser.add_argument("--json", dest="json_path", default=None, help="Optional path to write the results as JSON")
+    parser.add_argument("--serve", choices=["stateless", "stateful"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    summaries = []
+    for mode in args.modes.split(","):
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port)],
+            cwd=SERVER_DIR,
+        )
+        try:
+            wait_for_port(port)
+            print(f"\n🔄 Running {args.sessions} sessions ({args.concurrency} concurrent) against {mode} server...")
+            results, wall_time = asyncio.run(run_load(f"http://127.0.0.1:{port}/mcp", args))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+        summary = summarize(mode, results, wall_time)
+        print_summary(summary)
+        summaries.append(summary)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(summaries, f, indent=2)
+        print(f"\n✓ Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
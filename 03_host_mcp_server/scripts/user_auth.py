@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 import os
+import sys
 import time
 import requests
 from dotenv import load_dotenv
 from jose import jwt
-from jose.backends.rsa_backend import RSAKey
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from token_verifier import JWKSCache, TokenVerifier
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,22 +24,21 @@ CLIENT_ID = os.environ["ENTRA_CLIENT_ID_MCP"]
 
 DEVICE_CODE_URL = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/devicecode"
 TOKEN_URL = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
+OIDC_CONFIG_URL = f"https://login.microsoftonline.com/{TENANT_ID}/v2.0/.well-known/openid-configuration"
+JWKS_CACHE_PATH = os.environ.get("JWKS_CACHE_PATH", ".jwks_cache.json")
+JWKS_CACHE_TTL = float(os.environ.get("JWKS_CACHE_TTL", "86400"))
 
 # Request access token for MCP server
 SCOPE = f"openid profile email offline_access api://{CLIENT_ID}/read"
 
-def get_signing_key(jwks, token):
-    """Find matching key from JWKS using kid in token header"""
-    headers = jwt.get_unverified_header(token)
-    kid = headers["kid"]
-    for key in jwks["keys"]:
-        if key["kid"] == kid:
-            return RSAKey(key, algorithm="RS256")
-    raise Exception("❌ No matching key found in JWKS for kid=" + kid)
+# The key set is cached on disk between runs; an unknown key id (key rotation) refetches it
+jwks_cache = JWKSCache(OIDC_CONFIG_URL, ttl=JWKS_CACHE_TTL, cache_path=JWKS_CACHE_PATH)
+verifier = TokenVerifier(jwks_cache, audience=CLIENT_ID)
 
 
 # Step 1: Request device code
-resp = requests.post(DEVICE_CODE_URL, data={"client_id": CLIENT_ID, "scope": SCOPE})
+session = requests.Session()
+resp = session.post(DEVICE_CODE_URL, data={"client_id": CLIENT_ID, "scope": SCOPE})
 resp.raise_for_status()
 dc = resp.json()
 
@@ -44,9 +47,13 @@ print(f"Go to {dc['verification_uri']} and enter code: {dc['user_code']}")
 print(f"Direct link: {dc['verification_uri']}?otc={dc['user_code']}")
 print("===================\n")
 
+# Fetch the signing keys while the user signs in, unless the cached ones are fresh
+if jwks_cache.stale():
+    jwks_cache.refresh_async()
+
 # Step 2: Poll for token
 while True:
-    token_resp = requests.post(
+    token_resp = session.post(
         TOKEN_URL,
         data={
             "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
@@ -62,13 +69,9 @@ while True:
         print("\n🔑 Access Token received!\n")
 
         try:
-            # --- Load OIDC config & JWKS ---
-            oidc_config_url = f"https://login.microsoftonline.com/{TENANT_ID}/v2.0/.well-known/openid-configuration"
-            oidc_config = requests.get(oidc_config_url).json()
-            jwks_uri = oidc_config["jwks_uri"]
-            issuer_v2 = oidc_config["issuer"]
-
-            jwks = requests.get(jwks_uri).json()
+            # --- Load OIDC config & JWKS (cached) ---
+            jwks_uri = jwks_cache.metadata["jwks_uri"]
+            issuer_v2 = jwks_cache.issuer
 
             # --- Debug: Token header + claims ---
             unverified_header = jwt.get_unverified_header(id_token)
@@ -82,22 +85,11 @@ while True:
             print("===================\n")
 
             # --- Match signing key ---
-            signing_key = get_signing_key(jwks, id_token)
+            jwks_cache.get_key(unverified_header["kid"])
             print("✅ Found signing key for kid:", unverified_header["kid"])
 
-            # --- Verify token ---
-            token_iss = unverified_claims["iss"]
-            if token_iss != issuer_v2:
-                raise Exception(f"Unexpected issuer: {token_iss}")
-
-            audience = unverified_claims["aud"]
-            claims = jwt.decode(
-                id_token,
-                signing_key.to_pem().decode("utf-8"),
-                algorithms=["RS256"],
-                audience=audience,
-                issuer=issuer_v2,  # enforce v2 issuer
-            )
+            # --- Verify token (signature, v2 issuer, audience, lifetime) ---
+            claims = verifier.verify(id_token)
 
             print("\n✅ v2 ID Token verification PASSED")
             print("Verified Claims:", claims)
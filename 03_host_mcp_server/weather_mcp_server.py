@@ -1,24 +1,41 @@
-import random
-from mcp.server.fastmcp import FastMCP 
+import asyncio
+from typing import List
+from mcp.server.fastmcp import FastMCP
+from weather_providers import create_provider
 
-mcp = FastMCP(host="0.0.0.0", stateless_http=True)  
+mcp = FastMCP(host="0.0.0.0", stateless_http=True)
+
+# Cached, coalescing weather backend shared by all tool calls
+provider = create_provider()
+
+def unique_cities(cities: List[str]) -> List[str]:
+    """Deduplicate cities case-insensitively, keeping the first spelling and order"""
+    seen = {}
+    for city in cities:
+        seen.setdefault(city.strip().lower(), city.strip())
+    return list(seen.values())
 
 @mcp.tool()
-def get_weather(city: str) -> str:
+async def get_weather(city: str) -> str:
     """Get current weather for a city"""
-    conditions = ["Sunny", "Cloudy", "Rainy", "Partly cloudy", "Foggy", "Snowy", "Windy"]
-    condition = random.choice(conditions)
-    temperature = random.randint(-10, 35)
-    return f"{condition}, {temperature}°C in {city}"
+    return await provider.get_weather(city)
 
 @mcp.tool()
-def get_forecast(city: str, days: int = 3) -> str:
+async def get_forecast(city: str, days: int = 3) -> str:
     """Get weather forecast for a city"""
-    min_temp = random.randint(-5, 20)
-    max_temp = random.randint(min_temp + 5, 35)
-    conditions = ["sunny", "cloudy", "rainy", "mixed conditions"]
-    condition = random.choice(conditions)
-    return f"{days}-day forecast for {city}: Mostly {condition} with temperatures ranging {min_temp}-{max_temp}°C"
+    return await provider.get_forecast(city, days)
+
+@mcp.tool()
+async def get_weather_batch(cities: List[str]) -> str:
+    """Get current weather for several cities in one call"""
+    results = await asyncio.gather(*(provider.get_weather(city) for city in unique_cities(cities)))
+    return "\n".join(results)
+
+@mcp.tool()
+async def get_forecast_batch(cities: List[str], days: int = 3) -> str:
+    """Get weather forecasts for several cities in one call"""
+    results = await asyncio.gather(*(provider.get_forecast(city, days) for city in unique_cities(cities)))
+    return "\n".join(results)
 
-if __name__ == "__main__": 
+if __name__ == "__main__":
     mcp.run(transport="streamable-http")
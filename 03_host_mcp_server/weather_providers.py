@@ -0,0 +1,108 @@
+import asyncio
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class WeatherProvider(ABC):
+    """Backend that answers weather lookups for a single city"""
+
+    @abstractmethod
+    async def get_weather(self, city: str) -> str:
+        """Current weather for a city"""
+
+    @abstractmethod
+    async def get_forecast(self, city: str, days: int) -> str:
+        """Weather forecast for a city"""
+
+
+class StubWeatherProvider(WeatherProvider):
+    """Local stand-in for a real weather API, returning random conditions"""
+
+    async def get_weather(self, city: str) -> str:
+        conditions = ["Sunny", "Cloudy", "Rainy", "Partly cloudy", "Foggy", "Snowy", "Windy"]
+        condition = random.choice(conditions)
+        temperature = random.randint(-10, 35)
+        return f"{condition}, {temperature}°C in {city}"
+
+    async def get_forecast(self, city: str, days: int) -> str:
+        min_temp = random.randint(-5, 20)
+        max_temp = random.randint(min_temp + 5, 35)
+        conditions = ["sunny", "cloudy", "rainy", "mixed conditions"]
+        condition = random.choice(conditions)
+        return f"{days}-day forecast for {city}: Mostly {condition} with temperatures ranging {min_temp}-{max_temp}°C"
+
+
+class CachedWeatherProvider(WeatherProvider):
+    """TTL cache in front of another provider, with request coalescing.
+
+    Concurrent lookups for the same city share a single backend fetch, and results are
+    reused for `ttl` seconds. Failed fetches are not cached.
+    """
+
+    def __init__(self, provider: WeatherProvider, ttl: float = 300.0, max_entries: int = 4096):
+        self._provider = provider
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._cache: Dict[Hashable, Tuple[float, str]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    async def get_weather(self, city: str) -> str:
+        return await self._lookup(("weather", city.strip().lower()), lambda: self._provider.get_weather(city))
+
+    async def get_forecast(self, city: str, days: int) -> str:
+        return await self._lookup(("forecast", city.strip().lower(), days), lambda: self._provider.get_forecast(city, days))
+
+    async def _lookup(self, key: Hashable, fetch: Callable[[], Awaitable[str]]) -> str:
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.stats["hits"] += 1
+            return cached[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self.stats["misses"] += 1
+        future = asyncio.ensure_future(fetch())
+        self._inflight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+
+        if len(self._cache) >= self._max_entries:
+            self._evict_expired()
+        self._cache[key] = (time.monotonic() + self._ttl, result)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return cache counters and size"""
+        return {**self.stats, "size": len(self._cache), "inflight": len(self._inflight)}
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+        while len(self._cache) >= self._max_entries:
+            # Still full: drop the entry closest to expiry
+            del self._cache[min(self._cache, key=lambda k: self._cache[k][0])]
+
+
+# Available backends; register real weather APIs here
+PROVIDERS: Dict[str, Callable[[], WeatherProvider]] = {
+    "stub": StubWeatherProvider,
+}
+
+
+def create_provider() -> WeatherProvider:
+    """Create the provider selected by WEATHER_PROVIDER, wrapped in the TTL cache"""
+    name = os.getenv("WEATHER_PROVIDER", "stub")
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown WEATHER_PROVIDER '{name}', expected one of {sorted(PROVIDERS)}")
+    ttl = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+    return CachedWeatherProvider(PROVIDERS[name](), ttl=ttl)
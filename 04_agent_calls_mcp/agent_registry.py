@@ -0,0 +1,130 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_messages_bytes(messages: List[Dict[str, Any]]) -> int:
+    """Approximate the memory held by a conversation via its serialized size"""
+    try:
+        return len(json.dumps(messages, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass
+class RegisteredAgent:
+    """An agent kept alive for one runtime session"""
+    agent: Agent
+    user_id: str
+    tool_ids: Tuple[int, ...]
+    last_used: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+
+
+class AgentRegistry:
+    """LRU registry holding one Agent per AgentCore runtime session.
+
+    Agents are evicted when idle for longer than `idle_timeout`, when more than
+    `max_agents` are registered, or when the approximate size of all retained
+    conversations exceeds `max_total_bytes`.
+
+    An agent belongs to the user whose invocation created it. Another user presenting the
+    same session id gets a fresh, unregistered agent and never sees the conversation.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[List[Any], Optional[List[Dict[str, Any]]]], Agent],
+        max_agents: int = 64,
+        idle_timeout: float = 1800.0,
+        max_total_bytes: int = 64 * 1024 * 1024,
+    ):
+        self._agent_factory = agent_factory
+        self._max_agents = max_agents
+        self._idle_timeout = idle_timeout
+        self._max_total_bytes = max_total_bytes
+        self._agents: "OrderedDict[str, RegisteredAgent]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "rebuilds": 0, "evictions": 0, "user_mismatches": 0}
+
+    def get(self, session_id: Optional[str], user_id: str, tools: List[Any]) -> Tuple[Agent, bool]:
+        """Return the session's agent for `user_id` and whether it was reused"""
+        if not session_id:
+            return self._agent_factory(tools, None), False
+
+        tool_ids = tuple(id(tool) for tool in tools)
+        self._evict_idle()
+
+        with self._lock:
+            entry = self._agents.get(session_id)
+            mismatch = entry is not None and entry.user_id != user_id
+            if mismatch:
+                self.stats["user_mismatches"] += 1
+            elif entry is not None and entry.tool_ids == tool_ids:
+                self._agents.move_to_end(session_id)
+                entry.last_used = time.monotonic()
+                self.stats["hits"] += 1
+                return entry.agent, True
+
+        if mismatch:
+            # Neither hand out nor replace the owner's agent
+            logger.warning(f"Session {session_id} belongs to another user, using a fresh agent")
+            return self._agent_factory(tools, None), False
+
+        # A changed tool set (e.g. the MCP session reconnected) rebuilds the agent but keeps the conversation
+        messages = entry.agent.messages if entry is not None else None
+        agent = self._agent_factory(tools, messages)
+
+        with self._lock:
+            self.stats["rebuilds" if entry is not None else "misses"] += 1
+            self._agents[session_id] = RegisteredAgent(agent=agent, user_id=user_id, tool_ids=tool_ids)
+            self._agents.move_to_end(session_id)
+            self._enforce_limits_locked()
+        return agent, False
+
+    def record_usage(self, session_id: Optional[str], user_id: str) -> None:
+        """Update memory accounting after an invocation grew the conversation"""
+        if not session_id:
+            return
+        with self._lock:
+            entry = self._agents.get(session_id)
+            if entry is None or entry.user_id != user_id:
+                return
+            entry.size_bytes = estimate_messages_bytes(entry.agent.messages)
+            entry.last_used = time.monotonic()
+            self._enforce_limits_locked()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return registry counters, size and retained bytes"""
+        with self._lock:
+            return {
+                **self.stats,
+                "size": len(self._agents),
+                "bytes": sum(entry.size_bytes for entry in self._agents.values()),
+            }
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for session_id in [
+                sid for sid, entry in self._agents.items()
+                if now - entry.last_used > self._idle_timeout
+            ]:
+                del self._agents[session_id]
+                self.stats["evictions"] += 1
+
+    def _enforce_limits_locked(self) -> None:
+        total_bytes = sum(entry.size_bytes for entry in self._agents.values())
+        while self._agents and (len(self._agents) > self._max_agents or total_bytes > self._max_total_bytes):
+            session_id, entry = self._agents.popitem(last=False)
+            total_bytes -= entry.size_bytes
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted agent for session {session_id} ({entry.size_bytes} bytes)")
@@ -3,80 +3,121 @@ import requests
 import urllib.parse
 import json
 import os
+import time
 from dotenv import load_dotenv
 import uuid
 from datetime import datetime
 from auth_helper import AuthHelper, JWTHelper, Config
+from http_client import HttpConfig, get_http_session
+from sse import RenderBuffer, SSEDecoder
 
 # Load .env
 load_dotenv()
 Config.validate()
 
+# The runtime only forwards allowlisted custom headers, so Last-Event-ID is also sent under this name
+LAST_EVENT_ID_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Last-Event-Id"
+STREAM_RESUME_ATTEMPTS = int(os.getenv('AGENT_STREAM_RESUME_ATTEMPTS', '3'))
+
+def decode_chunk(data):
+    """Chunk value of an event: status lines arrive as JSON strings (or status objects on
+    resumable streams), answer deltas and tool events as JSON objects"""
+    try:
+        value = json.loads(data)
+    except ValueError:
+        return data, None
+    if not isinstance(value, dict):
+        return (value if isinstance(value, str) else data), None
+    event_id = value.pop("id", None)
+    if value.get("type") == "status":
+        return value.get("text", ""), event_id
+    if value.get("type") == "resume_failed":
+        return f"⚠️ {value.get('message')}", event_id
+    return value, event_id
+
 def call_agent_stream(prompt, auth_token):
-    """Call the travel agent with streaming response"""
+    """Call the travel agent with streaming response, resuming the stream if the connection drops"""
     REGION_NAME = "eu-central-1"
-    response = None
     
-    try:
-        invoke_agent_arn = os.getenv('AGENT_ARN')
-        if not invoke_agent_arn:
-            yield "❌ Error: AGENT_ARN environment variable is not set"
+    invoke_agent_arn = os.getenv('AGENT_ARN')
+    if not invoke_agent_arn:
+        yield "❌ Error: AGENT_ARN environment variable is not set"
+        return
+    
+    escaped_agent_arn = urllib.parse.quote(invoke_agent_arn, safe='')
+    url = f"https://bedrock-agentcore.{REGION_NAME}.amazonaws.com/runtimes/{escaped_agent_arn}/invocations?qualifier=DEFAULT"
+    
+    headers = {
+        "Authorization": f"Bearer {auth_token}",
+        "X-Amzn-Trace-Id": "streamlit-chat-trace",
+        "Content-Type": "application/json",
+        "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": st.session_state.active_session_id
+    }
+    # The agent keeps generating if the connection drops, and replays from the last received event
+    body = json.dumps({"prompt": prompt, "resumable": True})
+    last_event_id = None
+    
+    for attempt in range(STREAM_RESUME_ATTEMPTS + 1):
+        response = None
+        request_headers = dict(headers)
+        if last_event_id:
+            request_headers["Last-Event-ID"] = last_event_id
+            request_headers[LAST_EVENT_ID_HEADER] = last_event_id
+        try:
+            # Pooled keep-alive session: follow-up turns skip the TCP and TLS handshakes
+            response = get_http_session().post(
+                url,
+                headers=request_headers,
+                data=body,
+                stream=True,
+                timeout=HttpConfig.timeout(300)
+            )
+            
+            if response.status_code != 200:
+                yield f"❌ Agent returned status {response.status_code}: {response.text}"
+                return
+            if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                # A plain (non-streamed) answer
+                if response.text.strip():
+                    yield response.text.strip()
+                return
+            # Events are decoded as the bytes arrive, not per line after the fact
+            decoder = SSEDecoder()
+            for event in decoder.iter_events(response.iter_content(chunk_size=None)):
+                value, event_id = decode_chunk(event.data)
+                last_event_id = decoder.last_event_id or event_id or last_event_id
+                yield value
             return
         
-        escaped_agent_arn = urllib.parse.quote(invoke_agent_arn, safe='')
-        url = f"https://bedrock-agentcore.{REGION_NAME}.amazonaws.com/runtimes/{escaped_agent_arn}/invocations?qualifier=DEFAULT"
-        
-        headers = {
-            "Authorization": f"Bearer {auth_token}",
-            "X-Amzn-Trace-Id": "streamlit-chat-trace",
-            "Content-Type": "application/json",
-            "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": st.session_state.active_session_id
-        }
-        
-        response = requests.post(
-            url,
-            headers=headers,
-            data=json.dumps({"prompt": prompt}),
-            stream=True,
-            timeout=300
-        )
-        
-        if response.status_code == 200:
-            for line in response.iter_lines(decode_unicode=True):
-                if line.strip():
-                    if line.startswith('data: '):
-                        data = line[6:]
-                        if data.startswith('"') and data.endswith('"'):
-                            try:
-                                yield json.loads(data)
-                            except:
-                                yield data
-                        else:
-                            yield data
-                    else:
-                        yield line
-        else:
-            yield f"❌ Agent returned status {response.status_code}: {response.text}"
-    
-    except requests.exceptions.Timeout:
-        yield "⏰ Request timed out. This may happen during OAuth authorization."
-        yield "💡 If you were authorizing access, please try your request again after completing the authorization."
-    except Exception as e:
-        yield f"❌ Failed to call agent: {str(e)}"
-    finally:
-        # Always clean up the response
-        if response is not None:
-            try:
-                response.close()
-            except:
-                pass
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout) as e:
+            if last_event_id and attempt < STREAM_RESUME_ATTEMPTS:
+                yield "- 🔌 Connection lost, resuming the answer..."
+                time.sleep(min(0.5 * 2 ** attempt, 5))
+                continue
+            if isinstance(e, requests.exceptions.Timeout):
+                yield "⏰ Request timed out. This may happen during OAuth authorization."
+                yield "💡 If you were authorizing access, please try your request again after completing the authorization."
+            else:
+                yield f"❌ Failed to call agent: {str(e)}"
+            return
+        except Exception as e:
+            yield f"❌ Failed to call agent: {str(e)}"
+            return
+        finally:
+            # Always clean up the response
+            if response is not None:
+                try:
+                    response.close()
+                except:
+                    pass
 
 def render_token_details():
     """Render token details popup"""
     if st.session_state.get('show_token', False):
         with st.expander("Token Details", expanded=True):
-            id_token = st.session_state.get('id_token')
-            access_token = st.session_state.get('access_token')
+            auth_session = AuthHelper.get_session()
+            id_token = auth_session.id_token if auth_session else None
+            access_token = auth_session.access_token if auth_session else None
             
             if id_token:
                 st.subheader("ID Token")
@@ -184,39 +225,66 @@ def render_chat_interface():
     
     # Chat input
     if prompt := st.chat_input("What can I help you with?"):
+        # Kept valid by the background refresh; only blocks if it already expired
+        access_token = AuthHelper.get_access_token()
+        if not access_token:
+            # The refresh token was rejected or has expired: back to the login page
+            AuthHelper.logout()
+        
         active_session["messages"].append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Stream agent response
-        log_placeholder = None
-        logs = []
-        access_token = st.session_state.get('access_token')
+        # Stream agent response; the buffers only re-render the unfinished tail
+        log_buffer = None
+        answer_buffer = None
+        static_answer = None
         
         try:
             for chunk in call_agent_stream(prompt, access_token):
-                if chunk == "---":
-                    if log_placeholder and logs:
-                        log_placeholder.markdown("\n".join(logs))
-                        active_session["messages"].append({"role": "assistant", "content": "\n".join(logs)})
+                if isinstance(chunk, dict):
+                    chunk_type = chunk.get("type")
+                    if chunk_type == "delta":
+                        if answer_buffer is None:
+                            with st.chat_message("assistant"):
+                                answer_buffer = RenderBuffer(st.container(), prefix="**Answer:** ")
+                        answer_buffer.append(chunk.get("text", ""))
+                        continue
+                    if chunk_type == "tool_start":
+                        chunk = f"- 🛠️ Calling tool `{chunk.get('name')}`..."
+                    elif chunk_type == "tool_end":
+                        chunk = f"- ✅ Tool `{chunk.get('name')}` finished ({chunk.get('status')})"
+                    elif chunk_type == "busy":
+                        chunk = f"⏳ {chunk.get('message')}"
+                    else:
+                        continue
+                elif chunk == "---":
+                    if log_buffer:
+                        log_buffer.flush()
+                    continue
                 elif chunk.startswith("**Answer:**"):
                     with st.chat_message("assistant"):
                         st.markdown(chunk)
-                    active_session["messages"].append({"role": "assistant", "content": chunk})
-                else:
-                    if log_placeholder is None:
-                        with st.chat_message("assistant"):
-                            log_placeholder = st.empty()
-                    logs.append(chunk)
-                    log_placeholder.markdown("\n".join(logs) + " ▌")
+                    static_answer = chunk
+                    continue
+                
+                if log_buffer is None:
+                    with st.chat_message("assistant"):
+                        log_buffer = RenderBuffer(st.container(), separator="\n")
+                log_buffer.append_block(chunk)
         except:
             pass
         
         # Final cleanup
         try:
-            if log_placeholder and logs and not any(msg.get("content", "").startswith("**Answer:**") for msg in active_session["messages"][-2:]):
-                log_placeholder.markdown("\n".join(logs))
-                active_session["messages"].append({"role": "assistant", "content": "\n".join(logs)})
+            if log_buffer and log_buffer.blocks:
+                log_buffer.flush()
+                active_session["messages"].append({"role": "assistant", "content": log_buffer.text().rstrip("\n")})
+            if answer_buffer:
+                answer_buffer.flush()
+                active_session["messages"].append({"role": "assistant", "content": answer_buffer.text()})
+            elif static_answer:
+                active_session["messages"].append({"role": "assistant", "content": static_answer})
         except:
             pass
 
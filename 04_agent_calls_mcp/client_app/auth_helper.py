@@ -1,22 +1,36 @@
 import streamlit as st
-import requests
 import urllib.parse
 import secrets
 import base64
+import heapq
+import itertools
 import json
+import logging
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+import requests
 from dotenv import load_dotenv
+from http_client import HttpConfig, get_http_session
 
 # Load .env from parent directory
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class Config:
     AGENT_ENTRA_CLIENT_ID = os.getenv('AGENT_ENTRA_CLIENT_ID')
     STEAMLIT_ENTRA_CLIENT_ID = os.getenv('STEAMLIT_ENTRA_CLIENT_ID')
     STEAMLIT_ENTRA_CLIENT_SECRET = os.getenv('STEAMLIT_ENTRA_CLIENT_SECRET')
     TENANT_ID = os.getenv('ENTRA_TENANT_ID')
     REDIRECT_URI = "http://localhost:8501"
+    TOKEN_REFRESH_MARGIN = float(os.getenv('AUTH_TOKEN_REFRESH_MARGIN', '300'))
+    SESSION_IDLE_TIMEOUT = float(os.getenv('AUTH_SESSION_IDLE_TIMEOUT', '3600'))
+    TOKEN_REQUEST_TIMEOUT = float(os.getenv('AUTH_TOKEN_REQUEST_TIMEOUT', '15'))
+    OIDC_METADATA_TTL = float(os.getenv('OIDC_METADATA_TTL', '86400'))
     
     @classmethod
     def validate(cls):
@@ -29,6 +43,18 @@ class Config:
     def get_scope(cls):
         return f'openid profile email offline_access api://{cls.AGENT_ENTRA_CLIENT_ID}/read'
 
+    @classmethod
+    def get_metadata_url(cls):
+        return f"https://login.microsoftonline.com/{cls.TENANT_ID}/v2.0/.well-known/openid-configuration"
+
+    @classmethod
+    def get_default_metadata(cls) -> Dict[str, Any]:
+        """Endpoints to fall back on while the discovery document cannot be fetched"""
+        return {
+            'authorization_endpoint': f"https://login.microsoftonline.com/{cls.TENANT_ID}/oauth2/v2.0/authorize",
+            'token_endpoint': f"https://login.microsoftonline.com/{cls.TENANT_ID}/oauth2/v2.0/token",
+        }
+
 class JWTHelper:
     @staticmethod
     def decode_payload(token: str) -> Optional[Dict[str, Any]]:
@@ -45,10 +71,323 @@ class JWTHelper:
         except:
             return None
 
+    @staticmethod
+    def get_expiry(token: str) -> Optional[float]:
+        """Expiry of a JWT as a Unix timestamp, or None if it has no readable `exp` claim"""
+        payload = JWTHelper.decode_payload(token) if token else None
+        if payload and isinstance(payload.get('exp'), (int, float)):
+            return float(payload['exp'])
+        return None
+
+class TokenRequestError(Exception):
+    """The token endpoint rejected a request or could not be reached"""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        # A rejected grant (e.g. a revoked refresh token) will not succeed when retried
+        self.permanent = permanent
+
+class AuthSession:
+    """Tokens of one signed-in user, kept in st.session_state.
+
+    The manager's refresh threads replace the tokens in place, so a script run only ever
+    reads the latest ones and never waits for the token endpoint while they are valid.
+    """
+
+    def __init__(self, manager: "AuthSessionManager", token_data: Dict[str, Any]):
+        self._manager = manager
+        self._lock = threading.Lock()
+        self._refresh: Optional[Future] = None
+        self.access_token: Optional[str] = None
+        self.id_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.expires_at = 0.0
+        self.last_used = time.time()
+        self.refresh_error: Optional[str] = None
+        self.closed = False
+        self.update(token_data)
+
+    def update(self, token_data: Dict[str, Any]) -> None:
+        """Take over the tokens of a token endpoint response"""
+        access_token = token_data.get('access_token')
+        expires_at = JWTHelper.get_expiry(access_token)
+        if expires_at is None:
+            expires_at = time.time() + float(token_data.get('expires_in') or 3600)
+        with self._lock:
+            self.access_token = access_token
+            self.expires_at = expires_at
+            # Refresh responses may omit the ID token, and Entra ID only sometimes rotates the refresh token
+            self.id_token = token_data.get('id_token') or self.id_token
+            self.refresh_token = token_data.get('refresh_token') or self.refresh_token
+            self.refresh_error = None
+
+    def get_access_token(self) -> Optional[str]:
+        """A usable access token, or None if the user has to log in again.
+
+        Only blocks when the token already expired, e.g. after the session was idle for longer
+        than the idle timeout; otherwise the background refresh keeps it valid.
+        """
+        self.last_used = time.time()
+        remaining = self.expires_at - time.time()
+        if remaining > self._manager.min_validity:
+            if remaining <= self._manager.refresh_margin:
+                # Picks up sessions whose scheduled refresh was skipped while they were idle
+                self._manager.refresh(self)
+            return self.access_token
+        if not self.refresh_token or self.closed:
+            return None
+        self._manager.stats["blocking_refreshes"] += 1
+        try:
+            self._manager.refresh(self).result(timeout=self._manager.request_timeout * 2)
+        except Exception as e:
+            logger.info(f"Token refresh failed: {e}")
+            return None
+        return self.access_token if self.expires_at > time.time() else None
+
+    def close(self) -> None:
+        """Stop refreshing, e.g. on logout"""
+        self.closed = True
+
+class AuthSessionManager:
+    """Process-wide token service of the app, shared by all Streamlit sessions.
+
+    Caches the OIDC metadata of the tenant, sends all token requests through the pooled HTTP
+    session and renews every signed-in user's access token with the refresh token
+    `refresh_margin` seconds before it expires. Renewals are scheduled on one timer thread
+    and run on a small pool, so no script run waits for the token endpoint mid-conversation.
+    Sessions unused for `idle_timeout` seconds are no longer renewed in the background.
+    """
+
+    def __init__(
+        self,
+        http: requests.Session,
+        client_id: str,
+        client_secret: str,
+        scope: str,
+        redirect_uri: str,
+        metadata_url: str,
+        default_metadata: Optional[Dict[str, Any]] = None,
+        refresh_margin: float = 300.0,
+        idle_timeout: float = 3600.0,
+        request_timeout: float = 15.0,
+        metadata_ttl: float = 86400.0,
+        min_validity: float = 30.0,
+        max_workers: int = 4,
+    ):
+        self._http = http
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._scope = scope
+        self._redirect_uri = redirect_uri
+        self._metadata_url = metadata_url
+        self._default_metadata = default_metadata or {}
+        self.refresh_margin = refresh_margin
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self.metadata_ttl = metadata_ttl
+        self.min_validity = min_validity
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._metadata_expires_at = 0.0
+        self._metadata_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auth-refresh")
+        self._exchanges: Dict[str, Tuple[float, Future]] = {}
+        self._exchanges_lock = threading.Lock()
+        self._states: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._schedule: List[Tuple[float, int, "weakref.ref[AuthSession]"]] = []
+        self._schedule_changed = threading.Condition()
+        self._sequence = itertools.count()
+        self._scheduler: Optional[threading.Thread] = None
+        self.stats = {
+            "metadata_fetches": 0, "metadata_failures": 0, "exchanges": 0, "exchanges_joined": 0,
+            "state_rejections": 0,
+            "refreshes": 0, "refresh_failures": 0, "blocking_refreshes": 0, "idle_skips": 0,
+        }
+
+    def metadata(self) -> Dict[str, Any]:
+        """The tenant's OpenID Connect discovery document, fetched at most once per TTL"""
+        with self._metadata_lock:
+            if self._metadata is not None and time.time() < self._metadata_expires_at:
+                return self._metadata
+            self.stats["metadata_fetches"] += 1
+            try:
+                response = self._http.get(self._metadata_url, timeout=(HttpConfig.CONNECT_TIMEOUT, self.request_timeout))
+                response.raise_for_status()
+                self._metadata = {**self._default_metadata, **response.json()}
+                self._metadata_expires_at = time.time() + self.metadata_ttl
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"Could not fetch OIDC metadata, using default endpoints: {e}")
+                self.stats["metadata_failures"] += 1
+                self._metadata = self._metadata or dict(self._default_metadata)
+                # Try again soon, without putting a fetch on every script run meanwhile
+                self._metadata_expires_at = time.time() + min(60.0, self.metadata_ttl)
+            return self._metadata
+
+    def authorization_url(self, params: Dict[str, str]) -> str:
+        return self.metadata()['authorization_endpoint'] + "?" + urllib.parse.urlencode(params)
+
+    def issue_state(self) -> str:
+        """A new OAuth `state` value for an authorization request, valid for 10 minutes.
+
+        The login link navigates away from the app, so the callback arrives in a new Streamlit
+        session; the states are kept here, not only in st.session_state.
+        """
+        state = secrets.token_urlsafe(32)
+        with self._exchanges_lock:
+            self._states[state] = (time.time(), None)
+        return state
+
+    def claim_state(self, state: str, code: str) -> bool:
+        """Bind an issued `state` to the authorization code of its callback.
+
+        A state is used for one code only. Reruns of the callback page carrying the same code
+        are accepted, anything else is rejected before the code is redeemed.
+        """
+        now = time.time()
+        with self._exchanges_lock:
+            for stale in [s for s, (issued, _) in self._states.items() if now - issued > 600]:
+                del self._states[stale]
+            entry = self._states.get(state)
+            if entry is not None and entry[1] is None:
+                self._states[state] = (entry[0], code)
+                return True
+            if entry is not None and entry[1] == code:
+                return True
+            self.stats["state_rejections"] += 1
+            return False
+
+    def exchange_code(self, code: str) -> Future:
+        """Redeem an authorization code in the background; resolves to the token response.
+
+        A code can be redeemed once. Reruns of the callback page (Streamlit stops and restarts
+        the script on every interaction) join the exchange already in flight for the code.
+        """
+        now = time.time()
+        with self._exchanges_lock:
+            for stale in [c for c, (started, _) in self._exchanges.items() if now - started > 300]:
+                del self._exchanges[stale]
+            if code in self._exchanges:
+                self.stats["exchanges_joined"] += 1
+                return self._exchanges[code][1]
+            self.stats["exchanges"] += 1
+            future = self._executor.submit(self._token_request, {
+                'code': code,
+                'grant_type': 'authorization_code',
+                'redirect_uri': self._redirect_uri,
+            })
+            self._exchanges[code] = (now, future)
+        # Only a successful exchange is shared; after a failure the next attempt redeems again
+        future.add_done_callback(lambda done: self._forget_failed_exchange(code, done))
+        return future
+
+    def _forget_failed_exchange(self, code: str, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            with self._exchanges_lock:
+                if code in self._exchanges and self._exchanges[code][1] is future:
+                    del self._exchanges[code]
+
+    def start_session(self, token_data: Dict[str, Any]) -> AuthSession:
+        """Wrap a token response into a session and schedule its first renewal"""
+        session = AuthSession(self, token_data)
+        self._schedule_refresh(session)
+        return session
+
+    def refresh(self, session: AuthSession) -> Future:
+        """Renew the session's tokens in the background, or join the renewal already running"""
+        with session._lock:
+            if session._refresh is not None and not session._refresh.done():
+                return session._refresh
+            session._refresh = self._executor.submit(self._refresh, session)
+            return session._refresh
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "scheduled": len(self._schedule), "exchanges_cached": len(self._exchanges)}
+
+    def _token_request(self, grant: Dict[str, str]) -> Dict[str, Any]:
+        data = {
+            'client_id': self._client_id,
+            'client_secret': self._client_secret,
+            'scope': self._scope,
+            **grant,
+        }
+        token_url = self.metadata()['token_endpoint']
+        try:
+            response = self._http.post(token_url, data=data, timeout=(HttpConfig.CONNECT_TIMEOUT, self.request_timeout))
+        except requests.RequestException as e:
+            raise TokenRequestError(f"Token endpoint unreachable: {e}")
+        if response.status_code != 200:
+            raise TokenRequestError(response.text, permanent=400 <= response.status_code < 500)
+        return response.json()
+
+    def _refresh(self, session: AuthSession) -> None:
+        if session.closed or not session.refresh_token:
+            return
+        self.stats["refreshes"] += 1
+        try:
+            token_data = self._token_request({'grant_type': 'refresh_token', 'refresh_token': session.refresh_token})
+        except TokenRequestError as e:
+            self.stats["refresh_failures"] += 1
+            session.refresh_error = str(e)
+            remaining = session.expires_at - time.time()
+            if not e.permanent and remaining > self.min_validity:
+                # Transient failure: try again while the current token is still valid
+                self._schedule_refresh(session, at=time.time() + min(60.0, remaining / 2))
+            raise
+        session.update(token_data)
+        self._schedule_refresh(session)
+
+    def _schedule_refresh(self, session: AuthSession, at: Optional[float] = None) -> None:
+        if at is None:
+            at = session.expires_at - self.refresh_margin
+        with self._schedule_changed:
+            # Weak references, so sessions of closed browser tabs are not kept alive by the schedule
+            heapq.heappush(self._schedule, (at, next(self._sequence), weakref.ref(session)))
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self._run_schedule, name="auth-refresh-scheduler", daemon=True)
+                self._scheduler.start()
+            self._schedule_changed.notify()
+
+    def _run_schedule(self) -> None:
+        while True:
+            with self._schedule_changed:
+                while not self._schedule or self._schedule[0][0] > time.time():
+                    self._schedule_changed.wait(timeout=self._schedule[0][0] - time.time() if self._schedule else None)
+                _, _, ref = heapq.heappop(self._schedule)
+            session = ref()
+            if session is None or session.closed:
+                continue
+            if time.time() - session.last_used > self.idle_timeout:
+                # get_access_token renews the token when the user comes back
+                self.stats["idle_skips"] += 1
+                continue
+            future = self.refresh(session)
+            future.add_done_callback(self._log_refresh_failure)
+
+    @staticmethod
+    def _log_refresh_failure(future: Future) -> None:
+        if future.exception() is not None:
+            logger.info(f"Background token refresh failed: {future.exception()}")
+
+@st.cache_resource
+def get_auth_session_manager() -> AuthSessionManager:
+    """Process-wide manager, created once and reused across Streamlit reruns and user sessions"""
+    return AuthSessionManager(
+        http=get_http_session(),
+        client_id=Config.STEAMLIT_ENTRA_CLIENT_ID,
+        client_secret=Config.STEAMLIT_ENTRA_CLIENT_SECRET,
+        scope=Config.get_scope(),
+        redirect_uri=Config.REDIRECT_URI,
+        metadata_url=Config.get_metadata_url(),
+        default_metadata=Config.get_default_metadata(),
+        refresh_margin=Config.TOKEN_REFRESH_MARGIN,
+        idle_timeout=Config.SESSION_IDLE_TIMEOUT,
+        request_timeout=Config.TOKEN_REQUEST_TIMEOUT,
+        metadata_ttl=Config.OIDC_METADATA_TTL,
+    )
+
 class AuthHelper:
     @staticmethod
     def get_auth_url() -> str:
-        state = secrets.token_urlsafe(32)
+        state = get_auth_session_manager().issue_state()
         st.session_state.oauth_state = state
         
         params = {
@@ -60,27 +399,26 @@ class AuthHelper:
             'response_mode': 'query'
         }
         
-        return f"https://login.microsoftonline.com/{Config.TENANT_ID}/oauth2/v2.0/authorize?" + urllib.parse.urlencode(params)
+        # Also warms the pooled connection to the identity provider for the token exchange
+        return get_auth_session_manager().authorization_url(params)
     
     @staticmethod
     def exchange_code_for_token(code: str, state: str) -> Optional[Dict[str, Any]]:
-        token_url = f"https://login.microsoftonline.com/{Config.TENANT_ID}/oauth2/v2.0/token"
-        
-        data = {
-            'client_id': Config.STEAMLIT_ENTRA_CLIENT_ID,
-            'client_secret': Config.STEAMLIT_ENTRA_CLIENT_SECRET,
-            'code': code,
-            'grant_type': 'authorization_code',
-            'redirect_uri': Config.REDIRECT_URI,
-            'scope': Config.get_scope()
-        }
-        
-        response = requests.post(token_url, data=data)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Token exchange failed: {response.text}")
+        manager = get_auth_session_manager()
+        # A state is good for one login attempt, whatever the outcome of the check
+        expected = st.session_state.pop('oauth_state', None)
+        if (expected is not None and not secrets.compare_digest(expected.encode(), state.encode())) \
+                or not manager.claim_state(state, code):
+            st.error("Sign-in rejected: the response does not match a login started from this app. Please sign in again.")
             return None
+        future = manager.exchange_code(code)
+        try:
+            return future.result(timeout=Config.TOKEN_REQUEST_TIMEOUT * 2)
+        except TokenRequestError as e:
+            st.error(f"Token exchange failed: {e}")
+        except Exception as e:
+            st.error(f"Token exchange failed: {str(e) or type(e).__name__}")
+        return None
     
     @staticmethod
     def handle_oauth_callback() -> bool:
@@ -90,22 +428,32 @@ class AuthHelper:
         state = query_params.get('state')
         
         if code and state:
-            st.write("Authorization code received, exchanging for token...")
-            token_data = AuthHelper.exchange_code_for_token(code, state)
+            with st.spinner("Signing you in..."):
+                token_data = AuthHelper.exchange_code_for_token(code, state)
             
             if token_data:
-                st.session_state.access_token = token_data.get('access_token')
-                st.session_state.id_token = token_data.get('id_token')
+                st.session_state.auth_session = get_auth_session_manager().start_session(token_data)
                 st.session_state.authenticated = True
                 st.query_params.clear()
                 st.rerun()
                 return True
         return False
     
+    @staticmethod
+    def get_session() -> Optional[AuthSession]:
+        return st.session_state.get('auth_session')
+
+    @staticmethod
+    def get_access_token() -> Optional[str]:
+        """A valid access token for the agent call, or None if the user has to log in again"""
+        session = AuthHelper.get_session()
+        return session.get_access_token() if session else None
+
     @staticmethod
     def get_user_name() -> str:
         """Extract user name from ID token"""
-        id_token = st.session_state.get('id_token')
+        session = AuthHelper.get_session()
+        id_token = session.id_token if session else None
         if id_token:
             payload = JWTHelper.decode_payload(id_token)
             if payload:
@@ -115,8 +463,11 @@ class AuthHelper:
     @staticmethod
     def logout():
         """Clear authentication state"""
-        keys_to_clear = ['access_token', 'id_token', 'authenticated', 'oauth_state', 'show_token', 'messages']
+        session = AuthHelper.get_session()
+        if session:
+            session.close()
+        keys_to_clear = ['auth_session', 'authenticated', 'oauth_state', 'show_token', 'messages']
         for key in keys_to_clear:
             if key in st.session_state:
                 del st.session_state[key]
-        st.rerun()
\ No newline at end of file
+        st.rerun()
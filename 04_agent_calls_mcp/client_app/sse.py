@@ -0,0 +1,175 @@
+import codecs
+import time
+from typing import Iterable, Iterator, List, Optional
+
+
+class SSEEvent:
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(self, event: str = "message", data: str = "", id: Optional[str] = None, retry: Optional[int] = None):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    def __repr__(self) -> str:
+        return f"SSEEvent(event={self.event!r}, data={self.data!r}, id={self.id!r}, retry={self.retry!r})"
+
+
+class SSEDecoder:
+    """Incremental decoder for text/event-stream bodies (WHATWG server-sent events).
+
+    Bytes are fed as they arrive, in chunks of any size: multi-byte characters and lines may
+    be split across chunks. Handles `event`, `data` (joined with newlines when an event has
+    several data lines), `id` and `retry` fields, comments and LF, CRLF or CR line endings.
+    The last event id and retry interval persist across events, as a reconnect needs them.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._pending_cr = False
+        self._event = ""
+        self._data: List[str] = []
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Decode a chunk and return the events it completes"""
+        text = self._decoder.decode(chunk)
+        if self._pending_cr:
+            # A CR at the end of the previous chunk already ended the line; skip its LF
+            if text.startswith("\n"):
+                text = text[1:]
+            self._pending_cr = False
+        if not text:
+            return []
+        self._buffer += text
+        events = []
+        start = 0
+        buffer = self._buffer
+        while True:
+            cr, lf = buffer.find("\r", start), buffer.find("\n", start)
+            end = cr if cr != -1 and (lf == -1 or cr < lf) else lf
+            if end == -1:
+                break
+            line = buffer[start:end]
+            if buffer[end] == "\r":
+                if end + 1 == len(buffer):
+                    self._pending_cr = True
+                    start = end + 1
+                elif buffer[end + 1] == "\n":
+                    start = end + 2
+                else:
+                    start = end + 1
+            else:
+                start = end + 1
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        self._buffer = buffer[start:]
+        return events
+
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+        field, colon, value = line.partition(":")
+        if colon and value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            if "\0" not in value:
+                self.last_event_id = value
+        elif field == "retry":
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        data, event = "\n".join(self._data), self._event
+        self._data, self._event = [], ""
+        if not data:
+            # No data, or a single empty data line: nothing to dispatch
+            return None
+        return SSEEvent(event=event or "message", data=data, id=self.last_event_id, retry=self.retry)
+
+    def iter_events(self, chunks: Iterable[bytes]) -> Iterator[SSEEvent]:
+        """Events of a streamed body, as soon as each one is complete"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+
+
+class RenderBuffer:
+    """Append-only Markdown view of streamed text in a Streamlit container.
+
+    Text is split into blocks at `separator` (paragraphs of the answer, lines of the log).
+    Complete blocks are rendered once into their own element and never touched again; only
+    the unfinished tail is re-rendered, and at most every `min_interval` seconds. Rendering
+    therefore costs O(length of the tail) per update instead of O(length of the stream).
+    Blocks are never split inside a fenced code block.
+    """
+
+    def __init__(self, container, separator: str = "\n\n", prefix: str = "", cursor: str = " ▌", min_interval: float = 0.05):
+        self.container = container
+        self.separator = separator
+        self.prefix = prefix
+        self.cursor = cursor
+        self.min_interval = min_interval
+        self.blocks: List[str] = []
+        self.tail = ""
+        self._placeholder = None
+        self._rendered_at = 0.0
+        self._dirty = False
+
+    def append(self, text: str) -> None:
+        self.tail += text
+        self._dirty = True
+        if self.separator in self.tail[-len(text) - len(self.separator):]:
+            self._commit()
+        now = time.monotonic()
+        if now - self._rendered_at >= self.min_interval:
+            self._render_tail(self.cursor)
+            self._rendered_at = now
+
+    def append_block(self, text: str) -> None:
+        """Append a complete block, e.g. one log line"""
+        self.append(text + self.separator)
+
+    def _commit(self) -> None:
+        head, separator, rest = self.tail.rpartition(self.separator)
+        if not separator or head.count("```") % 2:
+            return
+        head = head + separator
+        self.tail = rest
+        # The current tail element becomes the completed block and a new element takes the tail
+        block = (self.prefix if not self.blocks else "") + head
+        self._target().markdown(block.rstrip("\n"))
+        self.blocks.append(head)
+        self._placeholder = None
+        self._dirty = bool(rest)
+
+    def _target(self):
+        if self._placeholder is None:
+            self._placeholder = self.container.empty()
+        return self._placeholder
+
+    def _render_tail(self, cursor: str) -> None:
+        if not self._dirty:
+            return
+        text = self.tail if self.blocks else self.prefix + self.tail
+        if text or cursor:
+            self._target().markdown(text + cursor)
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Render the final tail without the cursor"""
+        self._dirty = self._dirty or bool(self.tail)
+        self._render_tail("")
+
+    def text(self) -> str:
+        return self.prefix + "".join(self.blocks) + self.tail
@@ -0,0 +1,165 @@
+import asyncio
+import contextlib
+import contextvars
+import time
+from typing import Any, AsyncIterator, ContextManager, Dict, Iterator, TypeVar
+
+from opentelemetry import metrics, trace
+from opentelemetry.trace import Status, StatusCode
+from strands.hooks import (
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry,
+)
+
+tracer = trace.get_tracer("travel_agent_calls_mcp")
+meter = metrics.get_meter("travel_agent_calls_mcp")
+
+stage_duration = meter.create_histogram(
+    "agent.stage.duration", unit="s", description="Duration of each stage of an agent invocation"
+)
+
+# Low-cardinality attributes that are also recorded on the stage histogram; the rest stay on spans
+METRIC_ATTRIBUTES = {
+    "outcome",
+    "cache.hit",
+    "mcp.session.pooled",
+    "mcp.tools.cached",
+    "agent.reused",
+    "token.source",
+    "tool.name",
+}
+
+# Model and tool seconds of the current invocation, filled in by StageTimingHooks
+stage_totals: contextvars.ContextVar[Dict[str, float]] = contextvars.ContextVar("stage_totals")
+
+T = TypeVar("T")
+
+
+class Stage:
+    """A running stage: attributes go on its span and, if low-cardinality, on its histogram"""
+
+    def __init__(self, name: str, span: trace.Span):
+        self.name = name
+        self.span = span
+        self.metric_attributes: Dict[str, Any] = {"stage": name, "outcome": "ok"}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.span.set_attribute(key, value)
+        if key in METRIC_ATTRIBUTES:
+            self.metric_attributes[key] = value
+
+    def activate(self) -> ContextManager[trace.Span]:
+        """Make the stage's span current for a block that does not yield"""
+        return trace.use_span(self.span, end_on_exit=False, record_exception=False, set_status_on_exception=False)
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[Stage]:
+    """Run a block as a named stage, with a span and a duration histogram sample.
+
+    The span is current in the block, so the block must not yield from an async generator;
+    use `stream_stage` there.
+    """
+    with stream_stage(name) as current, current.activate():
+        yield current
+
+
+@contextlib.contextmanager
+def stream_stage(name: str) -> Iterator[Stage]:
+    """Like `stage`, for a block of an async generator that yields.
+
+    The span is a child of the current span but is not made current itself: a generator can be
+    closed from another context than the one that resumed it, and detaching the span's context
+    there fails and leaves later spans with the wrong parent. Parts of the block that start
+    spans run inside `activate()`, or iterate through `activated()`.
+    """
+    started = time.perf_counter()
+    span = tracer.start_span(f"agent.{name}", record_exception=False, set_status_on_exception=False)
+    current = Stage(name, span)
+    try:
+        yield current
+    except (GeneratorExit, asyncio.CancelledError):
+        # The client went away while the stage was running or streaming
+        current.set_attribute("outcome", "cancelled")
+        raise
+    except Exception as e:
+        current.set_attribute("outcome", "error")
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        span.end()
+        stage_duration.record(time.perf_counter() - started, current.metric_attributes)
+
+
+async def activated(current: Stage, items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Iterate `items` with the stage's span current while they are produced, not while they are consumed.
+
+    Use it in `contextlib.aclosing`, so that `items` is closed when the caller is.
+    """
+    try:
+        while True:
+            with current.activate():
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield item
+    finally:
+        # Close an abandoned generator now rather than when it is garbage collected
+        aclose = getattr(items, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def track_stage_totals() -> Dict[str, float]:
+    """Start collecting model/tool totals for the current invocation and return them"""
+    totals: Dict[str, float] = {}
+    stage_totals.set(totals)
+    return totals
+
+
+class StageTimingHooks(HookProvider):
+    """Records model and tool call durations from Strands hook events.
+
+    Strands already emits spans for model and tool calls; this adds them to the stage
+    histogram and to the totals of the invocation they belong to.
+    """
+
+    def __init__(self):
+        self._started: Dict[Any, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self.on_before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.on_after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self.on_before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.on_after_tool_call)
+
+    def on_before_model_call(self, event: BeforeModelCallEvent) -> None:
+        self._started[("model", id(event.agent))] = time.perf_counter()
+
+    def on_after_model_call(self, event: AfterModelCallEvent) -> None:
+        outcome = "error" if event.exception else "ok"
+        self._finish(("model", id(event.agent)), "model", {"outcome": outcome})
+
+    def on_before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        self._started[("tool", event.tool_use["toolUseId"])] = time.perf_counter()
+
+    def on_after_tool_call(self, event: AfterToolCallEvent) -> None:
+        outcome = "error" if event.exception or (event.result or {}).get("status") == "error" else "ok"
+        self._finish(("tool", event.tool_use["toolUseId"]), "tool", {"tool.name": event.tool_use["name"], "outcome": outcome})
+
+    def _finish(self, key: Any, name: str, attributes: Dict[str, Any]) -> None:
+        started = self._started.pop(key, None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        stage_duration.record(seconds, {"stage": name, **attributes})
+        totals = stage_totals.get(None)
+        if totals is not None:
+            totals[name] = totals.get(name, 0.0) + seconds
+
@@ -1,3 +1,12 @@
+import asyncio
+import base64
+import json
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
 def IsMCPAuthenticationError(error_info, auth_patterns=None):
     """
     Check if the error is an MCP authentication error.
@@ -20,4 +29,107 @@ def IsMCPAuthenticationError(error_info, auth_patterns=None):
     if error_info.get("error_type") == "MCPClientInitializationError":
         error_details = error_info.get("error_details", "")
         return any(pattern in error_details for pattern in auth_patterns)
-    return False
\ No newline at end of file
+    return False
+
+
+def DecodeTokenClaims(token):
+    """
+    Decode the claims of a JWT without verifying it.
+    
+    Args:
+        token: Encoded JWT (access or ID token)
+    
+    Returns:
+        dict: The token claims, or None if the token cannot be decoded
+    """
+    if not token:
+        return None
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    
+    payload = parts[1] + '=' * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def GetTokenSubject(token):
+    """
+    Extract a stable user identity from a JWT without verifying it.
+    
+    Args:
+        token: Encoded JWT (access or ID token)
+    
+    Returns:
+        str: The 'oid' or 'sub' claim, or None if the token cannot be decoded
+    """
+    claims = DecodeTokenClaims(token)
+    if not claims:
+        return None
+    return claims.get("oid") or claims.get("sub")
+
+
+def GetTokenExpiry(token):
+    """
+    Extract the expiry of a JWT without verifying it.
+    
+    Args:
+        token: Encoded JWT (access or ID token)
+    
+    Returns:
+        float: The 'exp' claim as a unix timestamp, or None if absent
+    """
+    claims = DecodeTokenClaims(token)
+    if not claims or not isinstance(claims.get("exp"), (int, float)):
+        return None
+    return float(claims["exp"])
+
+
+class AuthState:
+    """Manages authentication state and URLs, and lets callers await either of them"""
+    def __init__(self):
+        self.access_token: Optional[str] = None
+        self.auth_url: Optional[str] = None
+        self._changed = asyncio.Event()
+    
+    def reset(self) -> None:
+        """Forget the previous token and URL before starting a new authorization attempt"""
+        self.access_token = None
+        self.auth_url = None
+        self._changed.clear()
+    
+    def set_auth_url(self, url: str) -> None:
+        logger.info("Authorization URL received")
+        self.auth_url = url
+        self._changed.set()
+    
+    def set_access_token(self, token: str) -> None:
+        self.access_token = token
+        logger.info("MCP access token acquired")
+        self._changed.set()
+    
+    async def wait_for_token_or_auth_url(self, auth_task: "asyncio.Future", timeout: float) -> None:
+        """
+        Wait until an access token or an authorization URL is available.
+        
+        Args:
+            auth_task: The running token acquisition task; its failure is re-raised
+            timeout: Maximum number of seconds to wait
+        
+        Raises:
+            asyncio.TimeoutError: If neither a token nor a URL arrived in time
+        """
+        waiter = asyncio.ensure_future(self._changed.wait())
+        try:
+            await asyncio.wait({waiter, auth_task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        
+        if self.access_token or self.auth_url:
+            return
+        if auth_task.done():
+            auth_task.result()
+        raise asyncio.TimeoutError("Neither an access token nor an authorization URL was received")
@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+from strands.tools.mcp.mcp_client import MCPClient
+
+logger = logging.getLogger(__name__)
+
+# Patterns that mean the pooled session is no longer usable and must be rebuilt
+RECONNECT_PATTERNS = [
+    "403 forbidden",
+    "401 unauthorized",
+    "client initialization failed",
+    "connection closed",
+    "connection reset",
+    "remoteprotocolerror",
+    "readerror",
+    "connecterror",
+    "the background thread is not running",
+]
+
+
+def is_reconnectable_error(error: Exception) -> bool:
+    """Check if error means the pooled MCP session is stale (auth rejected or transport broken)"""
+    text = f"{type(error).__name__}: {error}".lower()
+    return any(pattern in text for pattern in RECONNECT_PATTERNS)
+
+
+@dataclass
+class PooledSession:
+    """A started MCP client plus bookkeeping"""
+    client: MCPClient
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    in_use: int = 0
+    retired: bool = False
+
+
+class MCPSessionPool:
+    """Keeps warm MCP client sessions alive across invocations, one per access token.
+
+    A session is reused while it is younger than `max_age` and has been used within
+    `idle_timeout`. Sessions not health-checked for `health_check_interval` seconds are
+    probed before being handed out. Callers report broken sessions through `invalidate`.
+
+    Every acquired client must be handed back with `release` once the invocation stops using
+    it. A session that is evicted, expires or is invalidated while in use leaves the pool at
+    once but is only stopped when its last user releases it.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], MCPClient],
+        max_sessions: int = 32,
+        idle_timeout: float = 300.0,
+        max_age: float = 3000.0,
+        health_check_interval: float = 60.0,
+    ):
+        self._client_factory = client_factory
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        self._max_age = max_age
+        self._health_check_interval = health_check_interval
+        self._sessions: Dict[str, PooledSession] = {}
+        # Sessions with at least one user, by id of their client
+        self._leases: Dict[int, PooledSession] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "reconnects": 0, "health_check_failures": 0, "deferred_stops": 0}
+
+    @staticmethod
+    def _key(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+    def acquire(self, access_token: str) -> MCPClient:
+        """Return a started MCP client for the token, reusing a warm session when possible"""
+        return self.acquire_session(access_token)[0]
+
+    def acquire_session(self, access_token: str) -> Tuple[MCPClient, bool]:
+        """Like `acquire`, also returning whether a pooled session was reused"""
+        key = self._key(access_token)
+        self._evict_idle()
+
+        with self._lock:
+            pooled = self._sessions.get(key)
+
+        if pooled is not None and self._is_healthy(pooled):
+            with self._lock:
+                # Still pooled, unless another invocation dropped it during the health check
+                if self._sessions.get(key) is pooled:
+                    self._lease_locked(pooled)
+                    self.stats["hits"] += 1
+                    return pooled.client, True
+        elif pooled is not None:
+            self._remove(key, pooled)
+
+        client = self._client_factory(access_token)
+        client.start()
+        pooled = PooledSession(client=client)
+
+        with self._lock:
+            self.stats["misses"] += 1
+            existing = self._sessions.get(key)
+            if existing is not None:
+                # Another invocation connected first; keep theirs and drop ours
+                self._lease_locked(existing)
+                ours, client = client, existing.client
+            else:
+                ours = None
+                self._sessions[key] = pooled
+                self._lease_locked(pooled)
+                overflow = self._pop_lru_locked()
+        if ours is not None:
+            self._stop(ours)
+            return client, True
+
+        for stale in overflow:
+            self._stop(stale)
+        logger.info("Opened new MCP session (pool size %d)", len(self._sessions))
+        return client, False
+
+    def release(self, client: MCPClient) -> None:
+        """Hand back a client returned by `acquire`; stops it if it left the pool while in use"""
+        with self._lock:
+            pooled = self._leases.get(id(client))
+            if pooled is None:
+                return
+            pooled.in_use -= 1
+            pooled.last_used = time.monotonic()
+            if pooled.in_use:
+                return
+            del self._leases[id(client)]
+        if pooled.retired:
+            self._stop(client)
+
+    def invalidate(self, access_token: str) -> None:
+        """Drop the session for the token so the next acquire reconnects"""
+        key = self._key(access_token)
+        with self._lock:
+            pooled = self._sessions.get(key)
+            if pooled is not None:
+                self.stats["reconnects"] += 1
+        if pooled is not None:
+            self._remove(key, pooled)
+
+    def close(self) -> None:
+        """Stop all sessions, including those still in use (shutdown)"""
+        with self._lock:
+            sessions = {id(pooled.client): pooled for pooled in [*self._sessions.values(), *self._leases.values()]}
+            self._sessions.clear()
+            self._leases.clear()
+        for pooled in sessions.values():
+            self._stop(pooled.client)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return pool counters, current size and sessions in use"""
+        with self._lock:
+            return {
+                **self.stats,
+                "size": len(self._sessions),
+                "in_use": len(self._leases),
+                "retired_in_use": sum(1 for pooled in self._leases.values() if pooled.retired),
+            }
+
+    def _is_healthy(self, pooled: PooledSession) -> bool:
+        now = time.monotonic()
+        if now - pooled.created_at > self._max_age:
+            return False
+        if now - pooled.last_checked < self._health_check_interval:
+            return True
+        try:
+            pooled.client.list_tools_sync()
+        except Exception as e:
+            logger.info("Pooled MCP session failed health check: %s", e)
+            with self._lock:
+                self.stats["health_check_failures"] += 1
+            return False
+        pooled.last_checked = now
+        return True
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                (key, pooled) for key, pooled in self._sessions.items()
+                if not pooled.in_use and now - pooled.last_used > self._idle_timeout
+            ]
+        for key, pooled in idle:
+            self._remove(key, pooled)
+
+    def _lease_locked(self, pooled: PooledSession) -> None:
+        pooled.last_used = time.monotonic()
+        pooled.uses += 1
+        pooled.in_use += 1
+        self._leases[id(pooled.client)] = pooled
+
+    def _retire_locked(self, pooled: PooledSession) -> bool:
+        """Mark a session that left the pool; True if nobody uses it and it can be stopped now"""
+        pooled.retired = True
+        self.stats["evictions"] += 1
+        if pooled.in_use:
+            self.stats["deferred_stops"] += 1
+            return False
+        return True
+
+    def _pop_lru_locked(self) -> List[MCPClient]:
+        """Evict least recently used sessions over `max_sessions`, idle ones first"""
+        overflow = []
+        while len(self._sessions) > self._max_sessions:
+            key = min(self._sessions, key=lambda k: (self._sessions[k].in_use > 0, self._sessions[k].last_used))
+            pooled = self._sessions.pop(key)
+            if self._retire_locked(pooled):
+                overflow.append(pooled.client)
+        return overflow
+
+    def _remove(self, key: str, pooled: PooledSession) -> None:
+        with self._lock:
+            if self._sessions.get(key) is not pooled:
+                return
+            del self._sessions[key]
+            stop = self._retire_locked(pooled)
+        if stop:
+            self._stop(pooled.client)
+
+    @staticmethod
+    def _stop(client: MCPClient) -> None:
+        try:
+            client.stop(None, None, None)
+        except Exception as e:
+            logger.debug("Error while stopping MCP session: %s", e)
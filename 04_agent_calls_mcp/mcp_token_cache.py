@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from mcp_auth_helper import AuthState, GetTokenExpiry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedToken:
+    """An MCP access token and when it stops being usable"""
+    token: str
+    expires_at: float
+    # No refresh is started before this time, e.g. after a refresh returned this same token
+    refresh_after: float = 0.0
+
+
+class MCPTokenCache:
+    """Per-user cache of MCP access tokens with single-flight acquisition.
+
+    Tokens are keyed by the subject of the inbound JWT. A token is refreshed in the
+    background `refresh_margin` seconds before it expires, and concurrent requests
+    for the same user share one acquisition instead of each calling AgentCore Identity.
+    Refreshes of a user's token are at least `min_refresh_interval` seconds apart, also when
+    AgentCore Identity keeps returning the same token. `refresher(subject)` runs in a fresh
+    context, not in the one of the request that happened to trigger or schedule it, so it gets
+    everything it needs about the user from `subject`.
+    """
+
+    def __init__(
+        self,
+        refresher: Callable[[str], Awaitable[Optional[str]]],
+        refresh_margin: float = 300.0,
+        min_validity: float = 30.0,
+        default_ttl: float = 900.0,
+        min_refresh_interval: float = 30.0,
+    ):
+        if default_ttl <= refresh_margin:
+            # Tokens without a readable expiry would be due for refresh as soon as they are stored
+            raise ValueError(f"default_ttl ({default_ttl}) must be greater than refresh_margin ({refresh_margin})")
+        self._refresher = refresher
+        self._refresh_margin = refresh_margin
+        self._min_validity = min_validity
+        self._default_ttl = default_ttl
+        self._min_refresh_interval = min_refresh_interval
+        self._tokens: Dict[str, CachedToken] = {}
+        self._acquisitions: Dict[str, Tuple[AuthState, asyncio.Task]] = {}
+        self._refreshes: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "acquisitions": 0, "coalesced": 0, "refreshes": 0, "unchanged_refreshes": 0}
+
+    def get(self, subject: str) -> Optional[str]:
+        """Return a usable token for the user, starting a background refresh when it is close to expiry"""
+        cached = self._tokens.get(subject)
+        remaining = cached.expires_at - time.time() if cached else 0
+        if cached is None or remaining <= self._min_validity:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        if remaining <= self._refresh_margin:
+            self._start_refresh(subject)
+        return cached.token
+
+    def put(self, subject: str, token: str) -> None:
+        """Store a token for the user and schedule its proactive refresh; storing the cached token again does nothing"""
+        previous = self._tokens.get(subject)
+        if previous is not None and previous.token == token:
+            return
+
+        now = time.time()
+        expires_at = GetTokenExpiry(token) or now + self._default_ttl
+        self._tokens[subject] = CachedToken(token=token, expires_at=expires_at, refresh_after=now + self._min_refresh_interval)
+        self._evict_expired()
+        delay = max(self._min_refresh_interval, expires_at - self._refresh_margin - now)
+        asyncio.get_running_loop().call_later(delay, self._scheduled_refresh, subject, token, context=contextvars.Context())
+
+    def invalidate(self, subject: str) -> None:
+        """Forget the user's token, e.g. after the MCP server rejected it"""
+        self._tokens.pop(subject, None)
+
+    def acquire(self, subject: str, start: Callable[[AuthState], Awaitable[str]]) -> Tuple[AuthState, asyncio.Task]:
+        """Start acquiring a token for the user, or join an acquisition already in flight.
+
+        Returns the shared AuthState, which exposes the authorization URL to every waiter,
+        and the task that resolves to the access token.
+        """
+        inflight = self._acquisitions.get(subject)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return inflight
+
+        self.stats["acquisitions"] += 1
+        state = AuthState()
+        task = asyncio.create_task(start(state))
+        self._acquisitions[subject] = (state, task)
+
+        def _done(finished: asyncio.Task) -> None:
+            self._acquisitions.pop(subject, None)
+            if not finished.cancelled() and finished.exception() is None and finished.result():
+                self.put(subject, finished.result())
+
+        task.add_done_callback(_done)
+        return state, task
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return cache counters and current size"""
+        return {**self.stats, "size": len(self._tokens)}
+
+    def _scheduled_refresh(self, subject: str, token: str) -> None:
+        cached = self._tokens.get(subject)
+        # A newer token has its own scheduled refresh
+        if cached is not None and cached.token == token:
+            self._start_refresh(subject, scheduled=True)
+
+    def _start_refresh(self, subject: str, scheduled: bool = False) -> None:
+        if subject in self._refreshes or subject in self._acquisitions or subject not in self._tokens:
+            return
+        # The one scheduled refresh per token is already at least min_refresh_interval after put()
+        if not scheduled and time.time() < self._tokens[subject].refresh_after:
+            return
+        self.stats["refreshes"] += 1
+        task = asyncio.create_task(self._refresher(subject), context=contextvars.Context())
+        self._refreshes[subject] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            self._refreshes.pop(subject, None)
+            cached = self._tokens.get(subject)
+            if cached is not None:
+                # Back off until the next attempt, whatever the outcome; put() resets it for a new token
+                cached.refresh_after = time.time() + self._min_refresh_interval
+            if finished.cancelled() or finished.exception() is not None:
+                logger.info(f"Background MCP token refresh failed: {finished.exception() if not finished.cancelled() else 'cancelled'}")
+                return
+            token = finished.result()
+            if not token:
+                logger.info("Background MCP token refresh needs user authorization, keeping current token")
+            elif cached is not None and cached.token == token:
+                # Nothing was renewed: keep the expiry and schedule, try again after the minimum interval
+                self.stats["unchanged_refreshes"] += 1
+            else:
+                self.put(subject, token)
+
+        task.add_done_callback(_done)
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        for subject in [s for s, cached in self._tokens.items() if cached.expires_at <= now]:
+            del self._tokens[subject]
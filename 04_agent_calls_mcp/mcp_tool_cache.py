@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mcp.types import ServerNotification, ToolListChangedNotification
+from strands.tools.mcp.mcp_agent_tool import MCPAgentTool
+from strands.tools.mcp.mcp_client import MCPClient
+
+logger = logging.getLogger(__name__)
+
+
+class NotifyingMCPClient(MCPClient):
+    """MCPClient that reports `notifications/tools/list_changed` from the server"""
+
+    def __init__(self, transport_callable: Callable[[], Any], on_tools_list_changed: Callable[[], None]):
+        super().__init__(transport_callable)
+        self._on_tools_list_changed = on_tools_list_changed
+
+    async def _handle_error_message(self, message: Any) -> None:
+        # Strands registers this coroutine as the ClientSession message handler,
+        # so every server notification passes through here
+        if isinstance(message, ServerNotification) and isinstance(message.root, ToolListChangedNotification):
+            logger.info("MCP server signalled tools/list_changed")
+            self._on_tools_list_changed()
+        await super()._handle_error_message(message)
+
+
+def fingerprint_tools(tools: List[MCPAgentTool]) -> str:
+    """Compute an ETag-style fingerprint of the tool definitions"""
+    specs = sorted(
+        (
+            tool.mcp_tool.name,
+            tool.mcp_tool.description or "",
+            json.dumps(tool.mcp_tool.inputSchema, sort_keys=True),
+        )
+        for tool in tools
+    )
+    return hashlib.sha256(json.dumps(specs).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ToolCacheEntry:
+    """Cached tool definitions for one (server, user) pair"""
+    fingerprint: str
+    mcp_tools: List[Any]
+    expires_at: float
+    client: Optional[MCPClient] = None
+    wrappers: List[MCPAgentTool] = field(default_factory=list)
+
+
+class MCPToolCache:
+    """TTL cache of MCP tool listings keyed by server URL and token subject.
+
+    Within the TTL the listing round-trip is skipped entirely. After the TTL the
+    tools are listed again and compared by fingerprint; if nothing changed the
+    existing Strands tool wrappers are kept, like a 304 response to an ETag.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self._ttl = ttl
+        self._entries: Dict[Tuple[str, str], ToolCacheEntry] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0, "invalidations": 0}
+
+    def get_tools(self, mcp_url: str, subject: str, mcp_client: MCPClient) -> Tuple[List[MCPAgentTool], bool]:
+        """Return tool wrappers bound to the client, and whether the listing was skipped"""
+        key = (mcp_url, subject)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires_at:
+                self.stats["hits"] += 1
+                return self._bind_locked(entry, mcp_client), True
+
+        tools = mcp_client.list_tools_sync()
+        fingerprint = fingerprint_tools(tools)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self.stats["revalidations"] += 1
+                entry.expires_at = now + self._ttl
+                return self._bind_locked(entry, mcp_client), False
+
+            self.stats["misses"] += 1
+            self._entries[key] = ToolCacheEntry(
+                fingerprint=fingerprint,
+                mcp_tools=[tool.mcp_tool for tool in tools],
+                expires_at=now + self._ttl,
+                client=mcp_client,
+                wrappers=list(tools),
+            )
+            return list(tools), False
+
+    def invalidate(self, mcp_url: str, subject: Optional[str] = None) -> None:
+        """Drop cached tools for one subject, or for every subject of the server"""
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if key[0] == mcp_url and (subject is None or key[1] == subject)
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.stats["invalidations"] += len(keys)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return cache counters and current size"""
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
+
+    @staticmethod
+    def _bind_locked(entry: ToolCacheEntry, mcp_client: MCPClient) -> List[MCPAgentTool]:
+        # Wrappers call tools through a specific client, so rebuild them when the pool reconnects
+        if entry.client is not mcp_client:
+            entry.client = mcp_client
+            entry.wrappers = [MCPAgentTool(mcp_tool, mcp_client) for mcp_tool in entry.mcp_tools]
+        return list(entry.wrappers)
@@ -0,0 +1,96 @@
+"""
+Benchmark of the auth path in handle_authentication: fixed 7 second sleep vs event-driven wait.
+
+AgentCore Identity is simulated locally: after a random latency it either returns a cached
+token or emits an authorization URL. The measured time is how long the handler takes until it
+can either proceed with a cached token or show the login link to the user.
+
+Usage:
+    python ./scripts/bench_auth_path.py --requests 200 --cached-ratio 0.8
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mcp_auth_helper import AuthState
+
+
+async def fake_acquire_token(state: AuthState, cached: bool, latency: float) -> str:
+    """Stand-in for acquire_mcp_access_token backed by AgentCore Identity"""
+    await asyncio.sleep(latency)
+    if cached:
+        state.set_access_token("cached-token")
+        return "cached-token"
+    state.set_auth_url("https://example.com/authorize")
+    # The user would now log in; the benchmark stops measuring once the link is shown
+    await asyncio.sleep(3600)
+    return ""
+
+
+async def legacy_auth_path(cached: bool, latency: float, legacy_wait: float) -> float:
+    state = AuthState()
+    started = time.perf_counter()
+    task = asyncio.create_task(fake_acquire_token(state, cached, latency))
+    await asyncio.sleep(legacy_wait)
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    return elapsed
+
+
+async def event_auth_path(cached: bool, latency: float) -> float:
+    state = AuthState()
+    started = time.perf_counter()
+    task = asyncio.create_task(fake_acquire_token(state, cached, latency))
+    await state.wait_for_token_or_auth_url(task, timeout=30)
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    return elapsed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name, samples):
+    print(
+        f"{name:<14} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:9.1f} ms  "
+        f"p99={percentile(samples, 99) * 1000:9.1f} ms  "
+        f"mean={statistics.mean(samples) * 1000:9.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MCP auth path")
+    parser.add_argument("--requests", type=int, default=200, help="Number of simulated auth-path requests")
+    parser.add_argument("--cached-ratio", type=float, default=0.8, help="Share of requests with a cached token")
+    parser.add_argument("--identity-latency-ms", type=float, default=150.0, help="Median AgentCore Identity latency")
+    parser.add_argument("--legacy-wait", type=float, default=7.0, help="Fixed sleep of the previous implementation")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scenarios = [
+        (rng.random() < args.cached_ratio, rng.lognormvariate(0, 0.5) * args.identity_latency_ms / 1000)
+        for _ in range(args.requests)
+    ]
+
+    # All requests run concurrently, so the legacy run takes about legacy_wait seconds in total
+    legacy = await asyncio.gather(*(legacy_auth_path(c, l, args.legacy_wait) for c, l in scenarios))
+    event = await asyncio.gather(*(event_auth_path(c, l) for c, l in scenarios))
+
+    print(f"Auth path latency ({args.requests} requests, {args.cached_ratio:.0%} cached tokens)")
+    report("fixed sleep", legacy)
+    report("event-driven", event)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
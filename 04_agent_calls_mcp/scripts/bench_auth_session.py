@@ -0,0 +1,161 @@
+"""
+Token latency of the Streamlit client's chat turns over several access token lifetimes:
+the previous client (token from the login, never renewed), renewing on demand once the token
+expired, and the background renewal of AuthSessionManager (client_app/auth_helper.py).
+
+A local stub stands in for the Entra ID discovery document and token endpoint. It issues
+unsigned JWTs that expire after `--token-lifetime` seconds and adds `--rtt-ms` per request.
+A turn asks for a token every `--turn-interval` seconds, as a user sending messages would.
+
+Usage:
+    python ./scripts/bench_auth_session.py --duration 12 --token-lifetime 3 --rtt-ms 150
+"""
+import argparse
+import base64
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client_app"))
+
+from auth_helper import AuthSessionManager, JWTHelper
+from http_client import create_session
+
+
+def unsigned_jwt(claims: dict) -> str:
+    encode = lambda part: base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.signature"
+
+
+class StubIdentityProvider(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rtt: float, token_lifetime: float):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.rtt = rtt
+        self.token_lifetime = token_lifetime
+        self.requests = {"metadata": 0, "authorization_code": 0, "refresh_token": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        time.sleep(self.server.rtt)
+        self.server.requests["metadata"] += 1
+        self._send({
+            "authorization_endpoint": f"{self.server.base_url}/authorize",
+            "token_endpoint": f"{self.server.base_url}/token",
+        })
+
+    def do_POST(self):
+        form = urllib.parse.parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        time.sleep(self.server.rtt)
+        grant = form["grant_type"][0]
+        self.server.requests[grant] += 1
+        now = time.time()
+        self._send({
+            "access_token": unsigned_jwt({"sub": "user", "iat": now, "exp": now + self.server.token_lifetime}),
+            "id_token": unsigned_jwt({"sub": "user", "name": "Bench User"}),
+            "refresh_token": f"refresh-{self.server.requests[grant]}",
+            "expires_in": int(self.server.token_lifetime),
+        })
+
+    def _send(self, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(mode: str, server: StubIdentityProvider, args) -> dict:
+    lifetime = args.token_lifetime
+    background = mode == "background"
+    manager = AuthSessionManager(
+        http=create_session(),
+        client_id="client",
+        client_secret="secret",
+        scope="openid offline_access",
+        redirect_uri="http://localhost:8501",
+        metadata_url=f"{server.base_url}/.well-known/openid-configuration",
+        # Token lifetimes are scaled down from an hour to seconds, and the margins with them
+        refresh_margin=lifetime * 0.4 if background else 0.0,
+        idle_timeout=args.duration if background else 0.0,
+        min_validity=lifetime * 0.1,
+    )
+    requests_before = dict(server.requests)
+    session = manager.start_session(manager.exchange_code("code").result())
+
+    durations, expired, blocked = [], 0, 0
+    started = time.time()
+    while time.time() - started < args.duration:
+        turn_started = time.perf_counter()
+        if mode == "legacy":
+            token = session.access_token
+        else:
+            token = session.get_access_token()
+        duration = (time.perf_counter() - turn_started) * 1000
+        durations.append(duration)
+        blocked += duration > args.rtt_ms / 2
+        expiry = JWTHelper.get_expiry(token)
+        expired += expiry is None or expiry <= time.time()
+        time.sleep(args.turn_interval)
+    session.close()
+
+    ordered = sorted(durations)
+    return {
+        "turns": len(durations),
+        "mean_ms": round(statistics.mean(durations), 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+        "max_ms": round(ordered[-1], 3),
+        "blocked_turns": blocked,
+        "expired_tokens": expired,
+        "refreshes": server.requests["refresh_token"] - requests_before["refresh_token"],
+        "metadata_fetches": server.requests["metadata"] - requests_before["metadata"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token latency per chat turn with and without background renewal")
+    parser.add_argument("--duration", type=float, default=12, help="Seconds of chatting per mode")
+    parser.add_argument("--token-lifetime", type=float, default=3, help="Seconds an access token is valid")
+    parser.add_argument("--turn-interval", type=float, default=0.05, help="Seconds between two turns")
+    parser.add_argument("--rtt-ms", type=float, default=150, help="Simulated round trip to the token endpoint")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    server = StubIdentityProvider(args.rtt_ms / 1000, args.token_lifetime)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    results = {mode: run(mode, server, args) for mode in ("legacy", "on_demand", "background")}
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.duration} s per mode, {args.token_lifetime} s tokens, {args.rtt_ms} ms to the token endpoint\n")
+    print(f"{'mode':<12} {'turns':>6} {'mean ms':>8} {'p99 ms':>8} {'max ms':>8} {'blocked':>8} {'expired':>8} {'refreshes':>10} {'metadata':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['turns']:>6} {r['mean_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.1f} {r['blocked_turns']:>8} {r['expired_tokens']:>8} {r['refreshes']:>10} {r['metadata_fetches']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Per-turn latency of the Streamlit client's agent call: a new connection per message
+(bare `requests.post`) vs the pooled keep-alive session of client_app/http_client.py.
+
+A local stub stands in for the AgentCore invocation endpoint and streams an SSE answer. It
+serves TLS with a throwaway self-signed certificate (needs the `openssl` CLI, else `--no-tls`)
+and adds `--rtt-ms` per round trip: one per request, plus one for the TCP handshake and one
+for the TLS handshake of every new connection, like a remote endpoint would.
+
+Usage:
+    python ./scripts/bench_http_client.py --turns 50 --rtt-ms 20
+"""
+import argparse
+import json
+import os
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client_app"))
+
+from http_client import create_session
+
+ANSWER_CHUNKS = 40
+
+
+class StubRuntime(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rtt: float, handshakes: int):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.rtt = rtt
+        self.handshakes = handshakes
+        self.connections = 0
+        self.body = "".join(f"data: {json.dumps({'type': 'delta', 'text': f'word{i} '})}\n\n" for i in range(ANSWER_CHUNKS)).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle adds ~40 ms per response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+        time.sleep(self.server.rtt * self.server.handshakes)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.rtt)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def self_signed_certificate(directory: str):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def call_agent(post, url: str, verify) -> int:
+    """One chat turn as the client sends it: POST the prompt, read the streamed answer"""
+    headers = {"Authorization": "Bearer token", "Content-Type": "application/json"}
+    with post(url, headers=headers, data=json.dumps({"prompt": "Plan a weekend in Oslo"}), stream=True, timeout=(5, 30), verify=verify) as response:
+        return sum(1 for line in response.iter_lines() if line)
+
+
+def run(mode: str, server: StubRuntime, url: str, verify, turns: int):
+    session = create_session() if mode == "pooled" else None
+    post = session.post if session else requests.post
+    connections = server.connections
+    durations = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        chunks = call_agent(post, url, verify)
+        durations.append((time.perf_counter() - started) * 1000)
+        assert chunks == ANSWER_CHUNKS
+    if session:
+        session.close()
+    ordered = sorted(durations)
+    return {
+        "mean_ms": round(statistics.mean(durations), 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "first_turn_ms": round(durations[0], 2),
+        "connections": server.connections - connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn latency with and without connection reuse")
+    parser.add_argument("--turns", type=int, default=50, help="Chat turns per mode")
+    parser.add_argument("--rtt-ms", type=float, default=20, help="Simulated network round trip to the endpoint")
+    parser.add_argument("--no-tls", action="store_true", help="Plain HTTP stub (no handshake cost for TLS)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tls = not args.no_tls
+        server = StubRuntime(args.rtt_ms / 1000, handshakes=2 if tls else 1)
+        verify = True
+        if tls:
+            cert, key = self_signed_certificate(directory)
+            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            context.load_cert_chain(cert, key)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+            verify = cert
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"{'https' if tls else 'http'}://127.0.0.1:{server.server_port}/runtimes/stub/invocations?qualifier=DEFAULT"
+
+        results = {mode: run(mode, server, url, verify, args.turns) for mode in ("per_request", "pooled")}
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.turns} turns, {'TLS' if tls else 'plain HTTP'}, {args.rtt_ms} ms round trip\n")
+    print(f"{'mode':<12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'first ms':>9} {'connections':>12}")
+    for mode, result in results.items():
+        print(f"{mode:<12} {result['mean_ms']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['first_turn_ms']:>9.1f} {result['connections']:>12}")
+
+
+if __name__ == "__main__":
+    main()
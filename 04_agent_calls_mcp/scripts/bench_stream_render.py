@@ -0,0 +1,105 @@
+"""
+Client-side cost of consuming a streamed answer: the previous line-based parsing with a full
+re-render per delta vs SSEDecoder feeding an append-only RenderBuffer (client_app/sse.py).
+
+The stream is a synthetic SSE body of `--deltas` answer deltas, cut into network-sized reads.
+Streamlit is replaced by a recorder that counts how many characters are sent to `markdown`,
+which is what Streamlit serializes to the browser and the browser re-parses on every update.
+
+Usage:
+    python ./scripts/bench_stream_render.py --deltas 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client_app"))
+
+from sse import RenderBuffer, SSEDecoder
+
+
+class Element:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def markdown(self, text):
+        self.stats["updates"] += 1
+        self.stats["chars"] += len(text)
+
+
+class Container:
+    def __init__(self):
+        self.stats = {"updates": 0, "chars": 0, "elements": 0}
+
+    def empty(self):
+        self.stats["elements"] += 1
+        return Element(self.stats)
+
+
+def synthetic_stream(deltas: int, read_size: int):
+    words = ["The", "old", "town", "of", "Kyoto", "is", "best", "seen", "early,", "before", "the", "tour", "buses."]
+    events = ['data: "- 🤖 Initializing agent with MCP tools and processing your request..."\n\n', 'data: "---"\n\n']
+    for i in range(deltas):
+        text = words[i % len(words)] + (".\n\n" if i % 60 == 59 else " ")
+        events.append(f"data: {json.dumps({'type': 'delta', 'text': text})}\n\n")
+    body = "".join(events).encode()
+    return [body[i:i + read_size] for i in range(0, len(body), read_size)]
+
+
+def legacy(chunks):
+    """Previous client: iter_lines, startswith/json.loads per line, full join on every delta"""
+    container = Container()
+    placeholder = container.empty()
+    parts = []
+    for line in b"".join(chunks).decode().split("\n"):
+        if line.strip() and line.startswith("data: "):
+            value = json.loads(line[6:])
+            if isinstance(value, dict) and value.get("type") == "delta":
+                parts.append(value.get("text", ""))
+                placeholder.markdown("**Answer:** " + "".join(parts) + " ▌")
+    placeholder.markdown("**Answer:** " + "".join(parts))
+    return container.stats
+
+
+def incremental(chunks):
+    container = Container()
+    buffer = RenderBuffer(container, prefix="**Answer:** ", min_interval=0)
+    decoder = SSEDecoder()
+    for event in decoder.iter_events(chunks):
+        value = json.loads(event.data)
+        if isinstance(value, dict) and value.get("type") == "delta":
+            buffer.append(value.get("text", ""))
+    buffer.flush()
+    return container.stats
+
+
+def measure(consume, chunks, repeat: int):
+    started = time.process_time()
+    for _ in range(repeat):
+        stats = consume(chunks)
+    return {**stats, "cpu_ms": round((time.process_time() - started) * 1000 / repeat, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client CPU and render volume of a streamed answer")
+    parser.add_argument("--deltas", type=int, default=2000, help="Answer deltas in the stream")
+    parser.add_argument("--read-size", type=int, default=1024, help="Bytes per network read")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    chunks = synthetic_stream(args.deltas, args.read_size)
+    results = {"legacy": measure(legacy, chunks, args.repeat), "incremental": measure(incremental, chunks, args.repeat)}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.deltas} deltas, {sum(map(len, chunks)):,} bytes in {args.read_size}-byte reads (render throttle off)\n")
+    print(f"{'client':<12} {'cpu ms':>8} {'updates':>8} {'chars rendered':>15} {'elements':>9}")
+    for mode, result in results.items():
+        print(f"{mode:<12} {result['cpu_ms']:>8.1f} {result['updates']:>8} {result['chars']:>15,} {result['elements']:>9}")
+
+
+if __name__ == "__main__":
+    main()
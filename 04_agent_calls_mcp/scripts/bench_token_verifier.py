@@ -0,0 +1,187 @@
+"""
+Verifications per second of the previous JWT check in scripts/user_auth.py (fetch the OIDC
+configuration and JWKS, scan for the key, re-encode it as PEM, decode) vs token_verifier.py
+with its kid-indexed key cache, with and without memoized claims.
+
+A locally generated RSA key set is served by a stub discovery/JWKS endpoint that adds
+`--rtt-ms` per request. Tokens are signed with random keys of the set. The last stage sends
+tokens with unknown key ids, as forged tokens or a key rotation would, and counts the key
+set fetches they cause.
+
+Usage:
+    python ./scripts/bench_token_verifier.py --keys 4 --verifications 2000
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from jose.backends.rsa_backend import RSAKey
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from token_verifier import JWKSCache, TokenVerifier, UnknownKeyError
+
+AUDIENCE = "api://bench"
+
+
+class StubIssuer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rtt: float, jwks: dict):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.rtt = rtt
+        self.jwks = jwks
+        self.requests = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    @property
+    def metadata_url(self) -> str:
+        return f"{self.base_url}/.well-known/openid-configuration"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        time.sleep(self.server.rtt)
+        self.server.requests += 1
+        if self.path.endswith("openid-configuration"):
+            body = {"issuer": self.server.base_url, "jwks_uri": f"{self.server.base_url}/keys"}
+        else:
+            body = self.server.jwks
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def generate_key_set(count: int):
+    """Private signing keys and the public JWKS of `count` RSA keys"""
+    private_keys, public_keys = {}, []
+    for i in range(count):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        kid = f"bench-key-{i}"
+        private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        private_keys[kid] = jwk.construct(private_pem, algorithm="RS256")
+        public_pem = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        public_keys.append({**jwk.construct(public_pem, algorithm="RS256").to_dict(), "kid": kid, "use": "sig"})
+    return private_keys, {"keys": public_keys}
+
+
+def sign_tokens(private_keys: dict, issuer: str, count: int):
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {"iss": issuer, "aud": AUDIENCE, "sub": f"user-{i}", "iat": now, "exp": now + 3600},
+            private_keys[kid], algorithm="RS256", headers={"kid": kid},
+        )
+        for i, kid in ((i, random.choice(list(private_keys))) for i in range(count))
+    ]
+
+
+def legacy_verify(metadata_url: str, token: str) -> dict:
+    """The previous user_auth.py check"""
+    oidc_config = requests.get(metadata_url).json()
+    jwks = requests.get(oidc_config["jwks_uri"]).json()
+    kid = jwt.get_unverified_header(token)["kid"]
+    for key in jwks["keys"]:
+        if key["kid"] == kid:
+            signing_key = RSAKey(key, algorithm="RS256")
+            break
+    else:
+        raise Exception("No matching key found in JWKS for kid=" + kid)
+    return jwt.decode(token, signing_key.to_pem().decode("utf-8"), algorithms=["RS256"], audience=AUDIENCE, issuer=oidc_config["issuer"])
+
+
+def measure(verify, tokens, server: StubIssuer) -> dict:
+    requests_before = server.requests
+    started = time.perf_counter()
+    for token in tokens:
+        assert verify(token)["aud"] == AUDIENCE
+    elapsed = time.perf_counter() - started
+    return {
+        "verifications": len(tokens),
+        "per_second": round(len(tokens) / elapsed, 1),
+        "mean_us": round(elapsed / len(tokens) * 1e6, 1),
+        "requests": server.requests - requests_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JWT verifications per second with and without key and claims caching")
+    parser.add_argument("--keys", type=int, default=4, help="RSA keys in the generated key set")
+    parser.add_argument("--verifications", type=int, default=2000, help="Verifications per cached mode")
+    parser.add_argument("--legacy-verifications", type=int, default=50, help="Verifications with the previous check")
+    parser.add_argument("--distinct-tokens", type=int, default=50, help="Different tokens among the memoized verifications")
+    parser.add_argument("--unknown-kids", type=int, default=500, help="Tokens with an unknown key id in the last stage")
+    parser.add_argument("--rtt-ms", type=float, default=30, help="Simulated round trip to the discovery/JWKS endpoint")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    private_keys, jwks = generate_key_set(args.keys)
+    server = StubIssuer(args.rtt_ms / 1000, jwks)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    distinct = sign_tokens(private_keys, server.base_url, args.verifications)
+    repeated = sign_tokens(private_keys, server.base_url, args.distinct_tokens)
+    repeated = [repeated[i % len(repeated)] for i in range(args.verifications)]
+
+    keys = JWKSCache(server.metadata_url)
+    results = {
+        "legacy": measure(lambda token: legacy_verify(server.metadata_url, token), distinct[:args.legacy_verifications], server),
+        "cached_keys": measure(TokenVerifier(keys, audience=AUDIENCE, max_cached_tokens=0).verify, distinct, server),
+        "memoized": measure(TokenVerifier(keys, audience=AUDIENCE).verify, repeated, server),
+    }
+
+    forged_keys = {f"unknown-{i}": key for i, key in enumerate(private_keys.values())}
+    forged = sign_tokens(forged_keys, server.base_url, args.unknown_kids)
+    verifier = TokenVerifier(JWKSCache(server.metadata_url, min_refetch_interval=1), audience=AUDIENCE)
+    verifier.verify(distinct[0])
+    # Past the rate limit, so the first unknown key id may refetch the key set
+    time.sleep(1.1)
+    requests_before, rejected = server.requests, 0
+    for token in forged:
+        try:
+            verifier.verify(token)
+        except UnknownKeyError:
+            rejected += 1
+    results["unknown_kid"] = {"tokens": len(forged), "rejected": rejected, "requests": server.requests - requests_before, **verifier.keys.snapshot()}
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.keys} RSA-2048 keys, {args.rtt_ms} ms to the discovery/JWKS endpoint\n")
+    print(f"{'mode':<12} {'verifications':>14} {'per second':>11} {'mean us':>10} {'requests':>9}")
+    for mode in ("legacy", "cached_keys", "memoized"):
+        r = results[mode]
+        print(f"{mode:<12} {r['verifications']:>14} {r['per_second']:>11,.1f} {r['mean_us']:>10,.1f} {r['requests']:>9}")
+    r = results["unknown_kid"]
+    print(f"\n{r['tokens']} tokens with unknown key ids: {r['rejected']} rejected with {r['requests']} requests to the issuer "
+          f"({r['unknown_kid_refetches']} refetch, {r['unknown_kid_limited']} rate limited)")
+
+
+if __name__ == "__main__":
+    main()
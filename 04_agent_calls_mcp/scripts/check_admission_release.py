@@ -0,0 +1,108 @@
+"""
+Checks that a streaming entrypoint wrapped by admission control (admission_control.py) gives its
+slot back however the consumer stops reading the stream.
+
+With one slot, the consumer reads part of the stream and then drops it (aclose(), break without
+closing, or cancellation). The handler's stream must be closed, the slot freed, and the next request
+admitted right away instead of queueing behind the abandoned stream.
+
+Usage:
+    python ./scripts/check_admission_release.py
+"""
+import asyncio
+import gc
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from admission_control import AdmissionController
+
+EVENTS = 10
+READ_BEFORE_DROP = 3
+
+
+async def read_all(stream):
+    return [item async for item in stream]
+
+
+async def drop_with_aclose(stream):
+    async for index, _ in aenumerate(stream):
+        if index + 1 == READ_BEFORE_DROP:
+            break
+    await stream.aclose()
+
+
+async def drop_with_break(stream):
+    # No aclose(): the abandoned generator is finalized by the event loop
+    async for index, _ in aenumerate(stream):
+        if index + 1 == READ_BEFORE_DROP:
+            break
+
+
+async def drop_with_cancel(stream):
+    async def consume():
+        async for _ in stream:
+            pass
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01 * READ_BEFORE_DROP)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def aenumerate(stream):
+    index = 0
+    async for item in stream:
+        yield index, item
+        index += 1
+
+
+CONSUMERS = [
+    ("reads the whole stream", read_all),
+    ("drops the stream halfway with aclose()", drop_with_aclose),
+    ("drops the stream halfway with break", drop_with_break),
+    ("is cancelled halfway", drop_with_cancel),
+]
+
+
+async def check(consumer) -> bool:
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=1.0, name="check")
+    closed = []
+
+    @controller.admit
+    async def handler(payload):
+        try:
+            for index in range(EVENTS):
+                await asyncio.sleep(0.01)
+                yield {"event": index}
+        finally:
+            closed.append(controller.snapshot()["in_flight"])
+
+    await consumer(handler({}))
+    # Let the event loop finalize an abandoned stream
+    for _ in range(10):
+        gc.collect()
+        await asyncio.sleep(0)
+
+    snapshot = controller.snapshot()
+    next_events = await asyncio.wait_for(read_all(handler({})), timeout=0.5)
+    # The handler's stream is closed while it still holds the slot, then the slot is free
+    return (
+        closed[:1] == [1]
+        and snapshot["in_flight"] == 0
+        and len(next_events) == EVENTS
+        and controller.snapshot()["queued"] == 0
+    )
+
+
+async def main():
+    failures = 0
+    for name, consumer in CONSUMERS:
+        ok = await check(consumer)
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} slot released when the consumer {name}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -36,6 +36,11 @@ def main():
                 "discoveryUrl": discovery_url,
                 "allowedAudience": [audience]
             }
+        },
+        # Forward the inbound JWT so the agent can cache MCP tokens per user, and the
+        # Last-Event-ID of a client resuming a dropped stream
+        request_header_configuration={
+            "requestHeaderAllowlist": ["Authorization", "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Last-Event-Id"]
         }
     )
     
@@ -0,0 +1,91 @@
+"""
+Load test for concurrent agent invocations against a locally running agent.
+
+Start the agent locally first (it listens on port 8080):
+    python travel_agent_calls_mcp.py
+
+Then fire N concurrent invocations and probe /ping while they run:
+    python ./scripts/load_test_invocations.py --concurrency 10
+
+If the event loop is never blocked, the wall time stays close to the slowest single
+invocation and the parallelism factor (sum of latencies / wall time) approaches N.
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def invoke(base_url, prompt, auth_token):
+    headers = {
+        "Content-Type": "application/json",
+        "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": str(uuid.uuid4()),
+    }
+    if auth_token:
+        headers["Authorization"] = f"Bearer {auth_token}"
+
+    started = time.perf_counter()
+    first_chunk = None
+    chunks = 0
+    with requests.post(f"{base_url}/invocations", headers=headers, json={"prompt": prompt}, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                chunks += 1
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+    return time.perf_counter() - started, first_chunk or 0.0, chunks
+
+
+def probe_ping(base_url, stop_event, samples):
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        try:
+            requests.get(f"{base_url}/ping", timeout=30)
+            samples.append(time.perf_counter() - started)
+        except requests.RequestException:
+            pass
+        stop_event.wait(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent invocation load test")
+    parser.add_argument("--url", default="http://localhost:8080", help="Base URL of the local agent")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of concurrent invocations")
+    parser.add_argument("--prompt", default="What is the weather in Oslo?")
+    parser.add_argument("--auth-token", default=None, help="Optional bearer token sent to the agent")
+    args = parser.parse_args()
+
+    # Baseline: one invocation on its own
+    single_latency, _, _ = invoke(args.url, args.prompt, args.auth_token)
+
+    ping_samples = []
+    stop_event = threading.Event()
+    pinger = threading.Thread(target=probe_ping, args=(args.url, stop_event, ping_samples), daemon=True)
+    pinger.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: invoke(args.url, args.prompt, args.auth_token), range(args.concurrency)))
+    wall_time = time.perf_counter() - started
+
+    stop_event.set()
+    pinger.join()
+
+    latencies = [latency for latency, _, _ in results]
+    first_chunks = [first for _, first, _ in results]
+    print(f"Single invocation:        {single_latency:8.2f} s")
+    print(f"{args.concurrency} concurrent invocations: {wall_time:8.2f} s wall time")
+    print(f"  latency mean/max:       {statistics.mean(latencies):8.2f} / {max(latencies):.2f} s")
+    print(f"  first chunk mean/max:   {statistics.mean(first_chunks):8.2f} / {max(first_chunks):.2f} s")
+    print(f"  parallelism factor:     {sum(latencies) / wall_time:8.2f} (ideal {args.concurrency})")
+    if ping_samples:
+        print(f"  /ping during load max:  {max(ping_samples) * 1000:8.1f} ms over {len(ping_samples)} probes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Summarize span durations from an OTLP/JSON telemetry file to find the hot stage.
+
+Run the agent with file export enabled, put it under load, then summarize:
+    AGENT_TELEMETRY_FILE=/tmp/agent-telemetry.jsonl python travel_agent_calls_mcp.py
+    python ./scripts/load_test_invocations.py --concurrency 10
+    python ./scripts/summarize_telemetry.py /tmp/agent-telemetry.jsonl --by mcp.session.pooled
+
+Spans are grouped by name (and optionally by an attribute) and sorted by total time.
+"""
+import argparse
+import json
+from collections import defaultdict
+
+
+def attribute_value(attribute):
+    value = attribute.get("value", {})
+    return next(iter(value.values()), None) if value else None
+
+
+def read_spans(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            for resource_spans in json.loads(line).get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    yield from scope_spans.get("spans", [])
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize span durations from an OTLP/JSON file")
+    parser.add_argument("path", help="File written with AGENT_TELEMETRY_FILE")
+    parser.add_argument("--by", default=None, help="Also group by this span attribute, e.g. agent.reused")
+    parser.add_argument("--prefix", default="", help="Only include spans whose name starts with this, e.g. agent.")
+    args = parser.parse_args()
+
+    durations = defaultdict(list)
+    for span in read_spans(args.path):
+        if not span["name"].startswith(args.prefix):
+            continue
+        key = span["name"]
+        if args.by:
+            attributes = {attribute["key"]: attribute_value(attribute) for attribute in span.get("attributes", [])}
+            key = f"{key} [{args.by}={attributes.get(args.by, '-')}]"
+        durations[key].append((int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6)
+
+    print(f"{'span':<60} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for key, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        print(
+            f"{key:<60} {len(values):>7} {sum(values) / 1000:>9.2f} "
+            f"{percentile(values, 0.50):>9.1f} {percentile(values, 0.95):>9.1f} {percentile(values, 0.99):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def format_event_id(stream_id: str, seq: int) -> str:
+    return f"{stream_id}:{seq}"
+
+
+def parse_event_id(event_id: str) -> Optional[Tuple[str, int]]:
+    """(stream id, sequence number) of an event id, or None if it is malformed"""
+    stream_id, _, seq = event_id.strip().rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+class ReplayGap(Exception):
+    """The events after the requested one are no longer retained"""
+
+
+class ReplayStream:
+    """Chunks of one invocation, numbered from 1 and retained after the client went away.
+
+    The producer runs in its own task and appends every chunk; any number of followers
+    (the original response and later resumes) read from a sequence number onwards and wait
+    for new chunks until the producer finishes. Only the last `max_events` chunks are kept.
+    """
+
+    def __init__(self, stream_id: str, user_id: str, max_events: int):
+        self.stream_id = stream_id
+        self.user_id = user_id
+        self.events: Deque[Tuple[int, Any]] = deque(maxlen=max_events)
+        self.last_seq = 0
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: Any) -> None:
+        self.last_seq += 1
+        self.events.append((self.last_seq, chunk))
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self, after: int = 0) -> AsyncIterator[Tuple[int, Any]]:
+        """Yield (seq, chunk) for every chunk after `after`, live until the stream finishes"""
+        while True:
+            changed = self._changed
+            if self.events and self.events[0][0] > after + 1:
+                raise ReplayGap(f"Events {after + 1}-{self.events[0][0] - 1} of stream {self.stream_id} were dropped")
+            start = after + 1 - self.events[0][0] if self.events else 0
+            # Copy the pending events, since the producer appends while this generator is suspended
+            for seq, chunk in list(islice(self.events, start, None)):
+                yield seq, chunk
+                after = seq
+            if self.done and after >= self.last_seq:
+                return
+            if after >= self.last_seq:
+                await changed.wait()
+
+
+class StreamReplayBuffer:
+    """Bounded per-session replay of streamed invocations, for resuming with Last-Event-ID.
+
+    Each runtime session keeps its latest stream. A resumable invocation runs its producer in a
+    background task, so it completes and stays replayable even if the client disconnects. A
+    finished stream is kept for `retention` seconds; at most `max_streams` sessions are kept.
+    """
+
+    def __init__(self, max_events: int = 4096, retention: float = 300.0, max_streams: int = 256):
+        self.max_events = max_events
+        self.retention = retention
+        self.max_streams = max_streams
+        self._streams: "OrderedDict[str, ReplayStream]" = OrderedDict()
+        self._tasks = set()
+        self.stats = {"started": 0, "resumed": 0, "resume_misses": 0, "replayed_events": 0, "evictions": 0}
+
+    def start(self, session_id: str, user_id: str, producer: AsyncIterator[Any]) -> ReplayStream:
+        """Run `producer` in the background, recording its chunks under the session"""
+        self._evict()
+        stream = ReplayStream(uuid.uuid4().hex[:16], user_id, self.max_events)
+        self._streams[session_id] = stream
+        self._streams.move_to_end(session_id)
+        stream.task = asyncio.create_task(self._run(stream, producer))
+        self._tasks.add(stream.task)
+        stream.task.add_done_callback(self._tasks.discard)
+        self.stats["started"] += 1
+        return stream
+
+    async def _run(self, stream: ReplayStream, producer: AsyncIterator[Any]) -> None:
+        try:
+            async for chunk in producer:
+                stream.append(chunk)
+        except Exception as e:
+            logger.exception(f"Stream {stream.stream_id} failed")
+            stream.append(f"❌ Service error: {str(e)}")
+        finally:
+            stream.finish()
+
+    def resume(self, session_id: str, user_id: str, last_event_id: str) -> Tuple[Optional[ReplayStream], int]:
+        """The stream a Last-Event-ID refers to and the sequence number to continue after"""
+        parsed = parse_event_id(last_event_id)
+        stream = self._streams.get(session_id)
+        if parsed is None or stream is None or stream.stream_id != parsed[0] or stream.user_id != user_id:
+            self.stats["resume_misses"] += 1
+            return None, 0
+        self.stats["resumed"] += 1
+        self.stats["replayed_events"] += max(0, stream.last_seq - parsed[1])
+        return stream, parsed[1]
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for session_id in [
+            session_id for session_id, stream in self._streams.items()
+            if stream.done and now - stream.finished_at > self.retention
+        ]:
+            del self._streams[session_id]
+            self.stats["evictions"] += 1
+        while len(self._streams) >= self.max_streams:
+            self._streams.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "streams": len(self._streams),
+            "running": sum(1 for stream in self._streams.values() if not stream.done),
+        }
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import requests
+from jose import jwk, jwt
+from jose.exceptions import JOSEError
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVerificationError(Exception):
+    """A token failed verification"""
+
+
+class UnknownKeyError(TokenVerificationError):
+    """No signing key with the token's key id, even after refetching the key set"""
+
+
+class JWKSCache:
+    """Signing keys of an OpenID Connect issuer, indexed by key id.
+
+    The discovery document and key set are fetched once and kept for `ttl` seconds. Keys are
+    parsed once per fetch, so a lookup is a dict access. After the TTL the current keys are
+    still served while a background thread refetches them. A token signed with an unknown key
+    id (the issuer rotated its keys) triggers a refetch, at most once per
+    `min_refetch_interval` seconds, so forged key ids cannot flood the issuer. With
+    `cache_path`, the documents are also kept on disk and reused by the next process while
+    they are fresh.
+    """
+
+    def __init__(
+        self,
+        metadata_url: str,
+        http: Optional[requests.Session] = None,
+        ttl: float = 3600.0,
+        min_refetch_interval: float = 60.0,
+        timeout: float = 10.0,
+        cache_path: Optional[str] = None,
+        default_algorithm: str = "RS256",
+    ):
+        self.metadata_url = metadata_url
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.default_algorithm = default_algorithm
+        self._http = http or requests.Session()
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+        self._keys: Dict[str, jwk.Key] = {}
+        self._metadata: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self.stats = {"fetches": 0, "fetch_failures": 0, "disk_loads": 0, "background_refreshes": 0, "unknown_kid_refetches": 0, "unknown_kid_limited": 0}
+        self._load_from_disk()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """The issuer's discovery document"""
+        if not self._metadata:
+            self._ensure_loaded()
+        return self._metadata
+
+    @property
+    def issuer(self) -> Optional[str]:
+        return self.metadata.get("issuer")
+
+    def get_key(self, kid: str) -> jwk.Key:
+        """The signing key with id `kid`, refetching the key set if it is unknown"""
+        if not self._keys:
+            self._ensure_loaded()
+        elif self.stale():
+            self.refresh_async()
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        with self._lock:
+            limited = time.time() - self._attempted_at < self.min_refetch_interval
+        if limited:
+            self.stats["unknown_kid_limited"] += 1
+        else:
+            self.stats["unknown_kid_refetches"] += 1
+            self.refresh(min_interval=self.min_refetch_interval)
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+        raise UnknownKeyError(f"No matching key found in JWKS for kid={kid}")
+
+    def refresh(self, min_interval: float = 0.0) -> None:
+        """Fetch the discovery document and key set now.
+
+        Concurrent callers share one fetch. With `min_interval`, a fetch attempted less than
+        that many seconds ago is not repeated.
+        """
+        with self._fetch_lock:
+            if min_interval and time.time() - self._attempted_at < min_interval:
+                return
+            self._fetch()
+
+    def stale(self) -> bool:
+        """Whether there are no keys yet or they are older than the TTL"""
+        return not self._keys or time.time() - self._fetched_at > self.ttl
+
+    def refresh_async(self) -> None:
+        """Refetch the key set on a background thread, unless a refresh is already running"""
+        with self._lock:
+            if self._refreshing or time.time() - self._attempted_at < self.min_refetch_interval:
+                return
+            self._refreshing = True
+        self.stats["background_refreshes"] += 1
+
+        def _run():
+            try:
+                self.refresh()
+            except TokenVerificationError as e:
+                logger.warning(str(e))
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="jwks-refresh", daemon=True).start()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "keys": len(self._keys), "age": round(time.time() - self._fetched_at, 1) if self._fetched_at else None}
+
+    def _ensure_loaded(self) -> None:
+        with self._fetch_lock:
+            # A background refresh may have loaded the keys while this thread waited
+            if not self._keys:
+                self._fetch()
+
+    def _fetch(self) -> None:
+        self._attempted_at = time.time()
+        self.stats["fetches"] += 1
+        try:
+            metadata = self._get_json(self.metadata_url)
+            jwks = self._get_json(metadata["jwks_uri"])
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self.stats["fetch_failures"] += 1
+            if not self._keys:
+                raise TokenVerificationError(f"Could not fetch the signing keys: {e}")
+            logger.warning(f"Could not refresh the signing keys, keeping the current ones: {e}")
+            return
+        self._install(metadata, jwks, time.time())
+        self._save_to_disk(metadata, jwks)
+
+    def _get_json(self, url: str) -> Dict[str, Any]:
+        response = self._http.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _install(self, metadata: Dict[str, Any], jwks: Dict[str, Any], fetched_at: float) -> None:
+        keys = {}
+        for key in jwks.get("keys", []):
+            if "kid" not in key or key.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[key["kid"]] = jwk.construct(key, algorithm=key.get("alg", self.default_algorithm))
+            except JOSEError as e:
+                logger.warning(f"Skipping unusable key {key['kid']}: {e}")
+        # Swap both at once: readers never see keys of one fetch with metadata of another
+        self._metadata, self._keys, self._fetched_at = metadata, keys, fetched_at
+
+    def _load_from_disk(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("metadata_url") != self.metadata_url:
+                return
+            self._install(cached["metadata"], cached["jwks"], cached["fetched_at"])
+            self._attempted_at = cached["fetched_at"]
+            self.stats["disk_loads"] += 1
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable key cache {self.cache_path}: {e}")
+
+    def _save_to_disk(self, metadata: Dict[str, Any], jwks: Dict[str, Any]) -> None:
+        if not self.cache_path:
+            return
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Write then rename, so a concurrent reader never sees a partial file
+            temporary = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as f:
+                json.dump({"metadata_url": self.metadata_url, "fetched_at": self._fetched_at, "metadata": metadata, "jwks": jwks}, f)
+            os.replace(temporary, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write key cache {self.cache_path}: {e}")
+
+
+class TokenVerifier:
+    """Local JWT verification against a JWKSCache, with memoized results.
+
+    Verified claims are kept per token (keyed by its SHA-256 hash, so the cache holds no
+    tokens) until the token expires, in an LRU of `max_cached_tokens` entries. Verifying the
+    same bearer token again, as a server does on every request of a session, is then a hash
+    and a dict lookup instead of an RSA signature check.
+    """
+
+    def __init__(
+        self,
+        keys: JWKSCache,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        algorithms: Iterable[str] = ("RS256",),
+        leeway: float = 0.0,
+        max_cached_tokens: int = 1024,
+    ):
+        self.keys = keys
+        self.audience = audience
+        self._issuer = issuer
+        self.algorithms = list(algorithms)
+        self.leeway = leeway
+        self.max_cached_tokens = max_cached_tokens
+        self._verified: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"verified": 0, "cache_hits": 0, "failures": 0}
+
+    @property
+    def issuer(self) -> Optional[str]:
+        """The expected issuer; defaults to the one in the discovery document"""
+        return self._issuer or self.keys.issuer
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a token with a valid signature, issuer, audience and lifetime"""
+        digest = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            cached = self._verified.get(digest)
+            if cached is not None:
+                if cached[0] + self.leeway > now:
+                    self._verified.move_to_end(digest)
+                    self.stats["cache_hits"] += 1
+                    return dict(cached[1])
+                del self._verified[digest]
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            if not kid:
+                raise TokenVerificationError("Token header has no key id")
+            claims = jwt.decode(
+                token,
+                self.keys.get_key(kid),
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"verify_aud": self.audience is not None, "leeway": self.leeway},
+            )
+        except JOSEError as e:
+            self.stats["failures"] += 1
+            raise TokenVerificationError(str(e)) from e
+        except TokenVerificationError:
+            self.stats["failures"] += 1
+            raise
+
+        self.stats["verified"] += 1
+        expires_at = claims.get("exp")
+        if isinstance(expires_at, (int, float)):
+            with self._lock:
+                self._verified[digest] = (float(expires_at), claims)
+                while len(self._verified) > self.max_cached_tokens:
+                    self._verified.popitem(last=False)
+        return dict(claims)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "cached_tokens": len(self._verified), "keys": self.keys.snapshot()}
@@ -1,25 +1,43 @@
 import os
 import json
+import hashlib
 import asyncio
 import logging
+import contextvars
+import weakref
+from contextlib import aclosing
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, AsyncGenerator
+from typing import Dict, Any, Optional, AsyncGenerator, Union
 
 from strands import Agent
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from strands.models import BedrockModel
+from bedrock_agentcore.runtime import BedrockAgentCoreApp, RequestContext
 from bedrock_agentcore.identity.auth import requires_access_token
+from bedrock_agentcore.runtime.context import BedrockAgentCoreContext
 from strands.tools.mcp.mcp_client import MCPClient
 from mcp.client.streamable_http import streamablehttp_client
-from mcp_auth_helper import IsMCPAuthenticationError
+from mcp_auth_helper import IsMCPAuthenticationError, GetTokenSubject, AuthState
+from mcp_session_pool import MCPSessionPool, is_reconnectable_error
+from mcp_tool_cache import MCPToolCache, NotifyingMCPClient
+from agent_registry import AgentRegistry
+from mcp_token_cache import MCPTokenCache
+from admission_control import AdmissionController
+from stream_replay import ReplayGap, StreamReplayBuffer, format_event_id
+from instrumentation import StageTimingHooks, activated, stage, stream_stage, track_stage_totals
+from telemetry_config import configure_telemetry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Environment configuration
-os.environ["STRANDS_OTEL_ENABLE_CONSOLE_EXPORT"] = "true"
 os.environ["OTEL_PYTHON_EXCLUDED_URLS"] = "/ping,/invocations"
 
+# Batched span export, sampling and attribute caps (see AGENT_TELEMETRY_* env vars); no console export
+configure_telemetry(service_name="travel_agent_calls_mcp")
+
 # Load configuration from JSON file
 try:
     with open("weather_mcp.json", "r") as f:
@@ -38,50 +56,156 @@ SCOPES = [config["MCP_AUTH_SCOPE"]]
 MCP_URL = config["MCP_URL"]
 MODEL_ID = "eu.anthropic.claude-sonnet-4-20250514-v1:0"
 
-class AuthState:
-    """Manages authentication state and URLs"""
-    def __init__(self):
-        self.access_token: Optional[str] = None
-        self.auth_url: Optional[str] = None
-    
-    def set_auth_url(self, url: str) -> None:
-        logger.info("Authorization URL received")
-        self.auth_url = url
-    
-    def set_access_token(self, token: str) -> None:
-        self.access_token = token
-        logger.info("MCP access token acquired")
+# MCP session pool tuning
+MCP_POOL_MAX_SESSIONS = int(os.getenv("MCP_POOL_MAX_SESSIONS", "32"))
+MCP_POOL_IDLE_TIMEOUT = float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300"))
+MCP_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "60"))
+MCP_TOOL_CACHE_TTL = float(os.getenv("MCP_TOOL_CACHE_TTL", "600"))
+
+# Per-session agent registry tuning
+AGENT_REGISTRY_MAX_AGENTS = int(os.getenv("AGENT_REGISTRY_MAX_AGENTS", "64"))
+AGENT_REGISTRY_IDLE_TIMEOUT = float(os.getenv("AGENT_REGISTRY_IDLE_TIMEOUT", "1800"))
+AGENT_REGISTRY_MAX_BYTES = int(os.getenv("AGENT_REGISTRY_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Threads for blocking MCP calls (connect, tools/list), so they never stall the event loop
+MCP_BLOCKING_CONCURRENCY = int(os.getenv("MCP_BLOCKING_CONCURRENCY", "16"))
+
+# Upper bound for AgentCore Identity to return a cached token or an authorization URL
+AUTH_DISCOVERY_TIMEOUT = float(os.getenv("AUTH_DISCOVERY_TIMEOUT", "30"))
+
+# Refresh cached MCP tokens this many seconds before they expire
+MCP_TOKEN_REFRESH_MARGIN = float(os.getenv("MCP_TOKEN_REFRESH_MARGIN", "300"))
+
+# Replay of streamed answers for clients that reconnect with a Last-Event-ID
+STREAM_REPLAY_MAX_EVENTS = int(os.getenv("STREAM_REPLAY_MAX_EVENTS", "4096"))
+STREAM_REPLAY_RETENTION = float(os.getenv("STREAM_REPLAY_RETENTION", "300"))
+STREAM_REPLAY_MAX_STREAMS = int(os.getenv("STREAM_REPLAY_MAX_STREAMS", "256"))
+# The runtime only forwards allowlisted custom headers, so Last-Event-ID travels under this name
+LAST_EVENT_ID_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Last-Event-Id"
+
+@dataclass
+class InvocationContext:
+    """Request-scoped state of one agent invocation"""
+    session_id: Optional[str]
+    user_id: str
+    auth_state: Optional[AuthState] = None
+
+# Each invocation runs in its own task, so concurrent users never see each other's state
+current_invocation: contextvars.ContextVar[InvocationContext] = contextvars.ContextVar("current_invocation")
 
-auth_state = AuthState()
+# AuthState of the token acquisition running in the current task
+current_auth_state: contextvars.ContextVar[AuthState] = contextvars.ContextVar("current_auth_state")
+
+class MissingMCPTokenError(Exception):
+    """Raised when no cached MCP access token is available for the user"""
+
+def on_auth_url(url: str) -> None:
+    current_auth_state.get().set_auth_url(url)
 
 @requires_access_token(
     provider_name="fabeldyr-entra-mcp-provider",
     scopes=SCOPES,
     auth_flow='USER_FEDERATION',
-    on_auth_url=auth_state.set_auth_url,
+    on_auth_url=on_auth_url,
     force_authentication=True,
 )
 async def acquire_mcp_access_token(*, access_token: str) -> str:
     """Acquire MCP access token through OAuth flow"""
-    auth_state.set_access_token(access_token)
+    current_auth_state.get().set_access_token(access_token)
+    return access_token
+
+@requires_access_token(
+    provider_name="fabeldyr-entra-mcp-provider",
+    scopes=SCOPES,
+    auth_flow='USER_FEDERATION',
+    on_auth_url=on_auth_url,
+    force_authentication=False,
+)
+async def fetch_stored_mcp_access_token(*, access_token: str) -> str:
+    """Fetch the MCP access token AgentCore Identity holds for the user, without forcing a new login"""
+    current_auth_state.get().set_access_token(access_token)
     return access_token
 
+async def acquire_with_state(state: AuthState) -> str:
+    """Run the interactive token acquisition, reporting progress to the given AuthState"""
+    current_auth_state.set(state)
+    return await acquire_mcp_access_token(access_token="")
+
+# Latest workload access token per user, so background refreshes can act for that user
+workload_access_tokens: Dict[str, str] = {}
+
+async def refresh_mcp_access_token(user_id: str) -> Optional[str]:
+    """Silently fetch a user's token from AgentCore Identity; returns None if the user has to authorize again"""
+    workload_access_token = workload_access_tokens.get(user_id)
+    state = AuthState()
+
+    async def fetch() -> str:
+        # Runs outside any request context, so the user's identity is set explicitly
+        # (without one, as in local development, AgentCore Identity sets up a local workload)
+        if workload_access_token:
+            BedrockAgentCoreContext.set_workload_access_token(workload_access_token)
+        current_auth_state.set(state)
+        return await fetch_stored_mcp_access_token(access_token="")
+
+    task = asyncio.create_task(fetch())
+    try:
+        await state.wait_for_token_or_auth_url(task, timeout=AUTH_DISCOVERY_TIMEOUT)
+    finally:
+        if not task.done():
+            task.cancel()
+    return state.access_token
+
+# MCP access tokens per user, keyed by the subject of the inbound JWT
+mcp_token_cache = MCPTokenCache(refresh_mcp_access_token, refresh_margin=MCP_TOKEN_REFRESH_MARGIN)
+
+def inbound_user_id(context: RequestContext) -> str:
+    """Identify the calling user from the inbound JWT, falling back to the runtime session"""
+    headers = context.request_headers or {}
+    authorization = next((value for key, value in headers.items() if key.lower() == "authorization"), "")
+    subject = GetTokenSubject(authorization.removeprefix("Bearer ").strip())
+    return subject or f"session:{context.session_id}"
+
+# Tool listings shared across invocations, keyed by MCP server and user
+mcp_tool_cache = MCPToolCache(ttl=MCP_TOOL_CACHE_TTL)
+
+def token_subject(access_token: str) -> str:
+    """Identify the user behind an access token, falling back to a token hash"""
+    return GetTokenSubject(access_token) or hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
 def create_mcp_client(access_token: str) -> MCPClient:
     """Create MCP client with authentication"""
-    return MCPClient(
+    subject = token_subject(access_token)
+    return NotifyingMCPClient(
         lambda: streamablehttp_client(
             url=MCP_URL,
             headers={"Authorization": f"Bearer {access_token}"}
-        )
+        ),
+        on_tools_list_changed=lambda: mcp_tool_cache.invalidate(MCP_URL, subject),
     )
 
-def extract_response_text(response: Any) -> str:
-    """Extract clean text from agent response"""
-    if hasattr(response, 'message') and isinstance(response.message, dict):
-        if 'content' in response.message and isinstance(response.message['content'], list):
-            return response.message['content'][0].get('text', str(response.message))
-        return str(response.message)
-    return str(response.message)
+def translate_stream_event(event: Dict[str, Any], tools_in_progress: Dict[str, str]) -> list:
+    """Translate a Strands stream event into the chunks forwarded to the client"""
+    chunks = []
+    if event.get("data"):
+        chunks.append({"type": "delta", "text": event["data"]})
+
+    tool_use = event.get("current_tool_use")
+    if tool_use and tool_use.get("toolUseId") and tool_use["toolUseId"] not in tools_in_progress:
+        tools_in_progress[tool_use["toolUseId"]] = tool_use.get("name", "")
+        chunks.append({"type": "tool_start", "tool_use_id": tool_use["toolUseId"], "name": tool_use.get("name", "")})
+
+    message = event.get("message")
+    if message and message.get("role") == "user":
+        for block in message.get("content", []):
+            tool_result = block.get("toolResult")
+            if tool_result and tool_result.get("toolUseId") in tools_in_progress:
+                chunks.append({
+                    "type": "tool_end",
+                    "tool_use_id": tool_result["toolUseId"],
+                    "name": tools_in_progress.pop(tool_result["toolUseId"]),
+                    "status": tool_result.get("status", "success"),
+                })
+    return chunks
 
 def is_auth_error(error: Exception) -> bool:
     """Check if error requires authentication"""
@@ -93,75 +217,268 @@ def is_auth_error(error: Exception) -> bool:
     return (
         "client initialization failed" in str(error).lower() or
         IsMCPAuthenticationError(error_info) or
-        not auth_state.access_token
+        isinstance(error, MissingMCPTokenError)
     )
 
 app = BedrockAgentCoreApp()
 
-async def process_with_mcp(user_message: str) -> AsyncGenerator[str, None]:
+# Bound in-flight invocations; excess requests get a fast "busy" response (see ADMISSION_* env vars)
+admission = AdmissionController.from_env(name="agent_invocation")
+
+# Latest stream of every session, replayable after a dropped connection
+stream_replay = StreamReplayBuffer(
+    max_events=STREAM_REPLAY_MAX_EVENTS,
+    retention=STREAM_REPLAY_RETENTION,
+    max_streams=STREAM_REPLAY_MAX_STREAMS,
+)
+
+# Shared Bedrock model so every agent reuses the same client
+model = BedrockModel(model_id=MODEL_ID)
+
+# Records model and tool call durations into the stage histogram
+stage_timing_hooks = StageTimingHooks()
+
+def create_agent(tools: list, messages: Optional[list] = None) -> Agent:
+    """Create an agent with MCP tools, optionally continuing an existing conversation"""
+    # No callback handler: deltas are streamed to the client instead of printed to stdout
+    return Agent(tools=tools, model=model, messages=messages, callback_handler=None, hooks=[stage_timing_hooks])
+
+# One agent per runtime session, so follow-up turns keep their conversation and tool registry
+agent_registry = AgentRegistry(
+    create_agent,
+    max_agents=AGENT_REGISTRY_MAX_AGENTS,
+    idle_timeout=AGENT_REGISTRY_IDLE_TIMEOUT,
+    max_total_bytes=AGENT_REGISTRY_MAX_BYTES,
+)
+
+# Warm MCP sessions shared across invocations, keyed by access token
+mcp_session_pool = MCPSessionPool(
+    create_mcp_client,
+    max_sessions=MCP_POOL_MAX_SESSIONS,
+    idle_timeout=MCP_POOL_IDLE_TIMEOUT,
+    health_check_interval=MCP_POOL_HEALTH_CHECK_INTERVAL,
+)
+
+blocking_executor = ThreadPoolExecutor(max_workers=MCP_BLOCKING_CONCURRENCY, thread_name_prefix="mcp-blocking")
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the bounded MCP thread pool"""
+    loop = asyncio.get_running_loop()
+    # Carry the current context over, so spans started in the thread nest under the caller's
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(blocking_executor, context.run, func, *args)
+
+def connect_mcp(access_token: str, subject: str) -> tuple:
+    """Lease a pooled MCP session and get its tools (blocking); the client must be released after use"""
+    with stage("mcp_connect") as connect:
+        mcp_client, pooled = mcp_session_pool.acquire_session(access_token)
+        connect.set_attribute("mcp.session.pooled", pooled)
+    try:
+        with stage("list_tools") as listing:
+            mcp_tools, cached = mcp_tool_cache.get_tools(MCP_URL, subject, mcp_client)
+            listing.set_attribute("mcp.tools.cached", cached)
+            listing.set_attribute("mcp.tools.count", len(mcp_tools))
+    except Exception:
+        mcp_session_pool.release(mcp_client)
+        raise
+    return mcp_client, mcp_tools, cached
+
+# Serializes invocations of the same runtime session, since an Agent is not safe for concurrent use
+session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def session_lock(session_id: Optional[str]) -> asyncio.Lock:
+    """Return the lock guarding the session's agent"""
+    if not session_id:
+        return asyncio.Lock()
+    lock = session_locks.get(session_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        session_locks[session_id] = lock
+    return lock
+
+async def process_with_mcp(user_message: str) -> AsyncGenerator[Union[str, Dict[str, Any]], None]:
     """Process user message with MCP tools"""
     yield "- 🔗 Connecting to weather MCP server..."
     
-    mcp_client = create_mcp_client(auth_state.access_token)
-    
-    with mcp_client:
-        mcp_tools = mcp_client.list_tools_sync()
-        yield f"- ✅ Found {len(mcp_tools)} tools in MCP server"
-        yield "- 🤖 Initializing agent with MCP tools and processing your request..."        
-        agent = Agent(tools=mcp_tools, model=MODEL_ID)
-        response = agent(user_message)
-        
-        yield "---"
-        yield f"**Answer:** {extract_response_text(response)}"
+    invocation = current_invocation.get()
+    with stage("token_lookup") as lookup:
+        access_token = mcp_token_cache.get(invocation.user_id)
+        lookup.set_attribute("cache.hit", access_token is not None)
+    logger.info(f"MCP token cache stats: {mcp_token_cache.snapshot()}")
+    if not access_token:
+        raise MissingMCPTokenError("No MCP access token available")
+
+    subject = token_subject(access_token)
+    try:
+        mcp_client, mcp_tools, cached = await run_blocking(connect_mcp, access_token, subject)
+    except Exception as e:
+        if not is_reconnectable_error(e):
+            raise
+        # Pooled session went stale (token rejected or transport dropped), reconnect once
+        logger.info(f"Reconnecting MCP session after error: {e}")
+        await run_blocking(mcp_session_pool.invalidate, access_token)
+        yield "- 🔄 MCP session expired, reconnecting..."
+        try:
+            mcp_client, mcp_tools, cached = await run_blocking(connect_mcp, access_token, subject)
+        except Exception:
+            # The token itself is no longer accepted, so the next attempt must re-authenticate
+            mcp_token_cache.invalidate(invocation.user_id)
+            raise
+
+    # The agent's MCP tools use the client until the answer is complete
+    try:
+        logger.info(f"MCP session pool stats: {mcp_session_pool.snapshot()}")
+        logger.info(f"MCP tool cache stats: {mcp_tool_cache.snapshot()}")
+        yield f"- ✅ Found {len(mcp_tools)} tools in MCP server" + (" (cached)" if cached else "")
+
+        async with session_lock(invocation.session_id):
+            with stage("agent_setup") as setup:
+                agent, reused = agent_registry.get(invocation.session_id, invocation.user_id, mcp_tools)
+                setup.set_attribute("agent.reused", reused)
+                setup.set_attribute("agent.message_count", len(agent.messages))
+            if reused:
+                yield "- 🤖 Reusing session agent and processing your request..."
+            else:
+                yield "- 🤖 Initializing agent with MCP tools and processing your request..."
+            yield "---"
+
+            # Forward model deltas and tool progress as they arrive
+            tools_in_progress: Dict[str, str] = {}
+            totals = track_stage_totals()
+            with stream_stage("agent_stream") as streaming:
+                streaming.set_attribute("agent.reused", reused)
+                started = asyncio.get_running_loop().time()
+                first_delta = None
+                # Model and tool spans of the agent nest under the stage
+                async with aclosing(activated(streaming, agent.stream_async(user_message))) as events:
+                    async for event in events:
+                        for chunk in translate_stream_event(event, tools_in_progress):
+                            if first_delta is None and chunk["type"] == "delta":
+                                first_delta = asyncio.get_running_loop().time() - started
+                                streaming.set_attribute("agent.time_to_first_delta", first_delta)
+                            yield chunk
+                streaming.set_attribute("agent.model_seconds", totals.get("model", 0.0))
+                streaming.set_attribute("agent.tool_seconds", totals.get("tool", 0.0))
+
+            agent_registry.record_usage(invocation.session_id, invocation.user_id)
+    finally:
+        await run_blocking(mcp_session_pool.release, mcp_client)
+    logger.info(f"Agent registry stats: {agent_registry.snapshot()}")
 
-async def handle_authentication(user_message: str) -> AsyncGenerator[str, None]:
+async def handle_authentication(user_message: str) -> AsyncGenerator[Union[str, Dict[str, Any]], None]:
     """Handle MCP authentication flow"""
-    yield "- 🔐 Attempting to authenticate with MCP server - checking for cached token (take a few seconds) or requesting user authorization..."    
+    yield "- 🔐 Attempting to authenticate with MCP server - checking for cached token or requesting user authorization..."    
     try:
-        auth_task = asyncio.create_task(acquire_mcp_access_token(access_token=""))
-        # AgentCore python sdk default poll interval is 5 sec. Wait for 7sec fetching cached token and auth url
-        # https://github.com/aws/bedrock-agentcore-sdk-python/blob/3093768aa8600509c3bbba899123d78a6a1fedcb/src/bedrock_agentcore/services/identity.py#L25C1-L25C37
-        await asyncio.sleep(7) 
-
-        if auth_state.access_token:
-            yield "- ✅ Cached access token found, proceeding with request..."
-        else:
-            # no cached access token available, user interaction needed
-            yield f"- 🔗 **No access token found. Please click this link to login and authorize MCP server:** {auth_state.auth_url}"            
-            yield "- ⏳ Waiting for you to complete authorization..."
-            await asyncio.wait_for(auth_task, timeout=300) # Wait for user to complete authentication
+        invocation = current_invocation.get()
+        with stream_stage("token_acquisition") as acquisition:
+            with acquisition.activate():
+                # Concurrent requests of the same user share one acquisition and one authorization URL
+                auth_state, auth_task = mcp_token_cache.acquire(invocation.user_id, acquire_with_state)
+                invocation.auth_state = auth_state
+                # Proceed as soon as AgentCore Identity returns a cached token or an authorization URL
+                with stage("auth_discovery"):
+                    await auth_state.wait_for_token_or_auth_url(auth_task, timeout=AUTH_DISCOVERY_TIMEOUT)
+
+            if auth_state.access_token:
+                acquisition.set_attribute("token.source", "identity_cache")
+                yield "- ✅ Cached access token found, proceeding with request..."
+            else:
+                # no cached access token available, user interaction needed
+                acquisition.set_attribute("token.source", "user_authorization")
+                yield f"- 🔗 **No access token found. Please click this link to login and authorize MCP server:** {auth_state.auth_url}"            
+                yield "- ⏳ Waiting for you to complete authorization..."
+                await asyncio.wait_for(asyncio.shield(auth_task), timeout=300) # Wait for user to complete authentication
         
+        # The token can arrive before the acquisition task stored it; a no-op if it already did
+        mcp_token_cache.put(invocation.user_id, auth_state.access_token)
         yield "- ✅ MCP Authentication successful"
         yield "- 🔗 Reconnecting to the MCP server..."
         
         # Process request after authentication
-        async for message in process_with_mcp(user_message):
-            yield message
+        async with aclosing(process_with_mcp(user_message)) as messages:
+            async for message in messages:
+                yield message
             
     except asyncio.TimeoutError:
         yield "⏰ Authorization timed out. Please try again."
     except Exception as e:
         yield f"❌ Authentication failed: {str(e)}"
 
+def last_event_id(context: RequestContext) -> Optional[str]:
+    headers = context.request_headers or {}
+    return next((value for key, value in headers.items() if key.lower() == LAST_EVENT_ID_HEADER.lower()), None)
+
+def with_event_id(chunk: Union[str, Dict[str, Any]], event_id: str) -> Dict[str, Any]:
+    """Chunk of a resumable stream: status lines become status objects, every chunk carries its id"""
+    if isinstance(chunk, str):
+        return {"type": "status", "text": chunk, "id": event_id}
+    return {**chunk, "id": event_id}
+
+async def resume_stream(context: RequestContext, event_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+    """Replay the chunks after `event_id` and follow the stream until it finishes"""
+    stream, after = stream_replay.resume(context.session_id, inbound_user_id(context), event_id)
+    logger.info(f"Stream replay stats: {stream_replay.snapshot()}")
+    if stream is None:
+        yield {"type": "resume_failed", "message": "The interrupted answer is no longer available, please ask again."}
+        return
+    try:
+        async for seq, chunk in stream.follow(after):
+            yield with_event_id(chunk, format_event_id(stream.stream_id, seq))
+    except ReplayGap as e:
+        logger.info(str(e))
+        yield {"type": "resume_failed", "message": "Part of the interrupted answer is no longer available, please ask again."}
+
 @app.entrypoint
-async def agent_invocation(payload: Dict[str, Any]) -> AsyncGenerator[str, None]:
+async def agent_invocation(payload: Dict[str, Any], context: RequestContext) -> AsyncGenerator[Union[str, Dict[str, Any]], None]:
     """Main agent invocation handler"""
+    resume_from = last_event_id(context)
+    if resume_from and context.session_id:
+        # A reconnect: no new generation, just the rest of the interrupted stream
+        async for chunk in resume_stream(context, resume_from):
+            yield chunk
+        return
+
     user_message = payload.get("prompt", "")
     if not user_message:
         yield "❌ No valid prompt provided"
         return
 
-    yield "- 🚀 Agent starts processing the request..."
-    
-    try:
-        async for message in process_with_mcp(user_message):
-            yield message
-    except Exception as e:
-        if is_auth_error(e):
-            async for message in handle_authentication(user_message):
-                yield message
-        else:
-            yield f"❌ Service error: {str(e)}"
+    if not (payload.get("resumable") and context.session_id):
+        async for chunk in process_invocation(user_message, context):
+            yield chunk
+        return
+
+    # Generation runs in the background and is recorded, so a dropped connection can resume
+    stream = stream_replay.start(context.session_id, inbound_user_id(context), process_invocation(user_message, context))
+    async for seq, chunk in stream.follow():
+        yield with_event_id(chunk, format_event_id(stream.stream_id, seq))
+
+@admission.admit
+async def process_invocation(user_message: str, context: RequestContext) -> AsyncGenerator[Union[str, Dict[str, Any]], None]:
+    """Run one invocation; admission control covers the generation, not the clients following it"""
+    current_invocation.set(InvocationContext(session_id=context.session_id, user_id=inbound_user_id(context)))
+    workload_access_token = BedrockAgentCoreContext.get_workload_access_token()
+    if workload_access_token:
+        workload_access_tokens[current_invocation.get().user_id] = workload_access_token
+
+    # Stages of process_with_mcp and handle_authentication nest under the invocation
+    with stream_stage("invocation") as invocation_stage:
+        invocation_stage.set_attribute("session.id", context.session_id or "")
+        yield "- 🚀 Agent starts processing the request..."
+        
+        try:
+            async with aclosing(activated(invocation_stage, process_with_mcp(user_message))) as messages:
+                async for message in messages:
+                    yield message
+        except Exception as e:
+            if is_auth_error(e):
+                invocation_stage.set_attribute("outcome", "authentication")
+                async with aclosing(activated(invocation_stage, handle_authentication(user_message))) as messages:
+                    async for message in messages:
+                        yield message
+            else:
+                invocation_stage.set_attribute("outcome", "error")
+                yield f"❌ Service error: {str(e)}"
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
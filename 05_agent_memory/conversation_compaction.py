@@ -0,0 +1,317 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+from strands.agent.conversation_manager import ConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "[Summary of the earlier conversation]"
+SUMMARY_ACK = "Understood, I will keep this context in mind."
+
+SUMMARY_PROMPT = """You maintain a rolling summary of a conversation between a user and a travel assistant.
+Update the previous summary with the new turns. Keep destinations, dates, preferences, decisions and
+open questions; drop small talk. Write short third-person bullet points and nothing else."""
+
+# User statements that stay in the context verbatim, however old they are. The patterns are
+# anchored to the user stating a fact about themselves ("my budget is", "I am allergic"), not
+# to topic words, so questions like "do I need a visa?" are not pinned.
+_NOT_ASKED = r"(?<!\bdo )(?<!\bdoes )(?<!\bdid )(?<!\bcan )(?<!\bcould )(?<!\bshould )(?<!\bwould )(?<!\bwill )(?<!\bis )(?<!\bare )(?<!\bwas )"
+_COMPANION = r"(wife|husband|partner|kids?|children|son|daughter|family|friend)"
+_SUBJECT = _NOT_ASKED + rf"\b(i|we|my {_COMPANION})"
+_MY = _NOT_ASKED + r"\b(my|our)"
+_BE = r"(\s+(am|are|is)|['’](m|re|s))"
+DEFAULT_PIN_PATTERNS = (
+    r"\bmy name is\b",
+    r"^(please )?call me\b",
+    r"^remember\b",
+    _SUBJECT + _BE + r"( \w+)? allergic\b",
+    _MY + r" (\w+ )?allerg(y|ies) (is|are|include)\b",
+    _SUBJECT + _BE + r" (an? )?(vegetarian|vegan|pescatarian|halal|kosher|coeliac|celiac|(gluten|lactose)[- ]?(free|intolerant))\b",
+    _SUBJECT + r" (only )?eats? (vegetarian|vegan|halal|kosher)\b",
+    _SUBJECT + r" (can't|cannot|don't|do not|doesn't|does not) eat\b",
+    _MY + r" (\w+ )?budget (is|was|of|will be)\b",
+    _SUBJECT + r" (have|has|got) a (\w+ )?budget\b",
+    _SUBJECT + r" (already )?(have|has|hold|holds) (an? )?(\w+ )?(passport|visa)s?\b",
+    _MY + r" (passport|visa)s? (is|are|was|were|expires?|runs out)\b",
+    _MY + r" nationality is\b",
+    _SUBJECT + _BE + r" (an? )?(\w+ )?(citizen|national)s?\b",
+    _SUBJECT + r" (prefer|like|love|hate|need|always|never|don't like|do not like)\b",
+    _SUBJECT + _BE + r" (travel(l)?ing with|based in|from|flying from)\b",
+    _MY + rf" {_COMPANION} (is|are|will|'s)\b",
+)
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """Rough token count of a message (4 characters per token), good enough for budgeting"""
+    chars = 0
+    for block in message.get("content", []):
+        if "text" in block:
+            chars += len(block["text"])
+        else:
+            chars += len(json.dumps(block, default=str))
+    return 4 + chars // 4
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    return " ".join(block["text"] for block in message.get("content", []) if "text" in block).strip()
+
+
+def render_transcript(messages: Sequence[Dict[str, Any]], max_result_chars: int = 500) -> str:
+    """Plain-text transcript of messages, with tool calls and (truncated) tool results inline"""
+    lines = []
+    for message in messages:
+        for block in message.get("content", []):
+            if "text" in block and block["text"].strip():
+                lines.append(f"{message['role']}: {block['text'].strip()}")
+            elif "toolUse" in block:
+                tool_use = block["toolUse"]
+                lines.append(f"{message['role']}: [called {tool_use.get('name')} with {json.dumps(tool_use.get('input'), default=str)}]")
+            elif "toolResult" in block:
+                result = " ".join(item.get("text", "") for item in block["toolResult"].get("content", []) if "text" in item)
+                lines.append(f"tool result: {result[:max_result_chars]}")
+    return "\n".join(lines)
+
+
+def first_sentence(text: str, limit: int = 160) -> str:
+    sentence = re.split(r"(?<=[.!?])\s+", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit - 3].rstrip() + "..."
+
+
+class ExtractiveSummarizer:
+    """Summarizes turns by keeping the first sentence of every message, without a model call"""
+
+    def __call__(self, messages: Sequence[Dict[str, Any]], previous_summary: str, agent: "Agent") -> str:
+        lines = previous_summary.splitlines() if previous_summary else []
+        for message in messages:
+            tools = [block["toolUse"].get("name") for block in message.get("content", []) if "toolUse" in block]
+            text = message_text(message)
+            if message["role"] == "user" and text:
+                lines.append(f"- User: {first_sentence(text)}")
+            elif message["role"] == "assistant" and (text or tools):
+                used = f" (used {', '.join(tools)})" if tools else ""
+                lines.append(f"  Assistant{used}: {first_sentence(text)}" if text else f"  Assistant{used}")
+        return "\n".join(lines)
+
+
+class ModelSummarizer:
+    """Folds turns into the rolling summary with a direct model call (the agent's model by default).
+
+    The call bypasses the agent loop, because conversation management runs while the agent
+    still holds its invocation lock.
+    """
+
+    def __init__(self, model: Any = None, system_prompt: str = SUMMARY_PROMPT):
+        self.model = model
+        self.system_prompt = system_prompt
+
+    def __call__(self, messages: Sequence[Dict[str, Any]], previous_summary: str, agent: "Agent") -> str:
+        prompt = (
+            f"Previous summary:\n{previous_summary or '(none)'}\n\n"
+            f"New turns:\n{render_transcript(messages)}\n\n"
+            "Return the updated summary."
+        )
+        model = self.model or agent.model
+        result: Dict[str, Any] = {}
+
+        async def collect() -> str:
+            parts = []
+            events = model.stream([{"role": "user", "content": [{"text": prompt}]}], system_prompt=self.system_prompt)
+            async for event in events:
+                text = event.get("contentBlockDelta", {}).get("delta", {}).get("text")
+                if text:
+                    parts.append(text)
+            return "".join(parts).strip()
+
+        def run() -> None:
+            try:
+                result["summary"] = asyncio.run(collect())
+            except Exception as e:
+                result["error"] = e
+
+        # Management is called from inside the agent's event loop, so the model runs on its own loop
+        worker = threading.Thread(target=run, name="conversation-summarizer")
+        worker.start()
+        worker.join()
+        if "error" in result:
+            raise result["error"]
+        if not result["summary"]:
+            raise RuntimeError("Summarizer returned an empty summary")
+        return result["summary"]
+
+
+class CompactingConversationManager(ConversationManager):
+    """Keeps the conversation sent to the model within a token budget.
+
+    When the history exceeds `max_tokens`, the oldest turns are folded into a rolling summary
+    and only the most recent turns (about `keep_ratio` of the budget, at least
+    `min_recent_messages`) stay verbatim. User statements matching `pin_patterns` (name,
+    allergies, budget, preferences, ...) are pinned: they are carried in the summary message
+    verbatim instead of being summarized. The summary is a user/assistant message pair at the
+    start of the history, so roles keep alternating, and it is part of the session state, so a
+    restored session starts from the summary instead of the full history.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        keep_ratio: float = 0.5,
+        min_recent_messages: int = 6,
+        summary_max_tokens: int = 800,
+        max_pinned_facts: int = 20,
+        summarizer: Optional[Callable[..., str]] = None,
+        pin_patterns: Sequence[str] = DEFAULT_PIN_PATTERNS,
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.keep_ratio = max(0.1, min(0.9, keep_ratio))
+        self.min_recent_messages = min_recent_messages
+        self.summary_max_tokens = summary_max_tokens
+        self.max_pinned_facts = max_pinned_facts
+        self.summarizer = summarizer or ExtractiveSummarizer()
+        self._fallback_summarizer = ExtractiveSummarizer()
+        self._pin_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in pin_patterns]
+        self.summary = ""
+        self.pinned_facts: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"compactions": 0, "compacted_messages": 0, "summary_failures": 0, "tokens_before": 0, "tokens_after": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["CompactingConversationManager"]:
+        """Create a manager configured by COMPACTION_* environment variables, or None when disabled"""
+        if os.getenv("COMPACTION_ENABLED", "true").lower() != "true":
+            return None
+        summarizer = os.getenv("COMPACTION_SUMMARIZER", "model").lower()
+        if summarizer not in ("model", "extractive"):
+            raise ValueError(f"Unknown COMPACTION_SUMMARIZER '{summarizer}', expected 'model' or 'extractive'")
+        return cls(
+            max_tokens=int(os.getenv("COMPACTION_MAX_TOKENS", "8000")),
+            keep_ratio=float(os.getenv("COMPACTION_KEEP_RATIO", "0.5")),
+            min_recent_messages=int(os.getenv("COMPACTION_MIN_RECENT_MESSAGES", "6")),
+            summary_max_tokens=int(os.getenv("COMPACTION_SUMMARY_MAX_TOKENS", "800")),
+            max_pinned_facts=int(os.getenv("COMPACTION_MAX_PINNED_FACTS", "20")),
+            summarizer=ModelSummarizer() if summarizer == "model" else ExtractiveSummarizer(),
+        )
+
+    def pin(self, fact: str) -> None:
+        """Keep `fact` in the context for the rest of the session"""
+        key = fact.strip().lower()
+        self.pinned_facts[key] = fact.strip()
+        self.pinned_facts.move_to_end(key)
+        while len(self.pinned_facts) > self.max_pinned_facts:
+            self.pinned_facts.popitem(last=False)
+
+    def apply_management(self, agent: "Agent", **kwargs: Any) -> None:
+        self._compact(agent, self.max_tokens, self.min_recent_messages)
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """Compact to half of the current size, keeping only the latest exchange verbatim if needed"""
+        budget = sum(estimate_tokens(message) for message in agent.messages) // 2
+        if not self._compact(agent, budget, min_recent_messages=2) and e is not None:
+            raise ContextWindowOverflowException("Unable to compact the conversation any further") from e
+
+    def get_state(self) -> Dict[str, Any]:
+        return {**super().get_state(), "summary": self.summary, "pinned_facts": list(self.pinned_facts.values())}
+
+    def restore_from_session(self, state: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        super().restore_from_session(state)
+        self.summary = state.get("summary", "")
+        for fact in state.get("pinned_facts", []):
+            self.pin(fact)
+        return self._summary_messages() if self.summary or self.pinned_facts else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "removed_message_count": self.removed_message_count,
+            "pinned_facts": len(self.pinned_facts),
+            "summary_tokens": len(self.summary) // 4,
+        }
+
+    def _compact(self, agent: "Agent", budget: int, min_recent_messages: int) -> bool:
+        messages = agent.messages
+        tokens = [estimate_tokens(message) for message in messages]
+        total = sum(tokens)
+        if total <= budget:
+            return False
+
+        start = 2 if self._has_summary(messages) else 0
+        split = self._split_point(messages, tokens, start, int(budget * self.keep_ratio), min_recent_messages)
+        if split <= start:
+            return False
+
+        compacted = messages[start:split]
+        for message in compacted:
+            self._pin_facts(message)
+        try:
+            summary = self.summarizer(compacted, self.summary, agent)
+        except Exception as e:
+            logger.warning(f"Summarizing {len(compacted)} messages failed, using the extractive summary: {e}")
+            self.stats["summary_failures"] += 1
+            summary = self._fallback_summarizer(compacted, self.summary, agent)
+        self.summary = self._truncate_summary(summary)
+
+        # Messages of an earlier summary were never part of the session, so they do not count as removed
+        self.removed_message_count += len(compacted)
+        agent.messages[:] = self._summary_messages() + messages[split:]
+
+        after = sum(estimate_tokens(message) for message in agent.messages)
+        self.stats["compactions"] += 1
+        self.stats["compacted_messages"] += len(compacted)
+        self.stats["tokens_before"], self.stats["tokens_after"] = total, after
+        logger.info(f"Compacted {len(compacted)} messages: ~{total} -> ~{after} tokens")
+        return True
+
+    def _split_point(self, messages: List[Dict[str, Any]], tokens: List[int], start: int, keep_tokens: int, min_recent: int) -> int:
+        """Index of the first message kept verbatim: a user prompt, never a tool result"""
+        split, kept = len(messages), 0
+        while split > start:
+            if len(messages) - split >= min_recent and kept + tokens[split - 1] > keep_tokens:
+                break
+            split -= 1
+            kept += tokens[split]
+        while split < len(messages) and not self._is_user_prompt(messages[split]):
+            split += 1
+        return split if split < len(messages) else start
+
+    @staticmethod
+    def _is_user_prompt(message: Dict[str, Any]) -> bool:
+        return message["role"] == "user" and not any("toolResult" in block for block in message.get("content", []))
+
+    @staticmethod
+    def _has_summary(messages: List[Dict[str, Any]]) -> bool:
+        return len(messages) >= 2 and message_text(messages[0]).startswith(SUMMARY_HEADER)
+
+    def _pin_facts(self, message: Dict[str, Any]) -> None:
+        if message["role"] != "user":
+            return
+        for sentence in re.split(r"(?<=[.!?])\s+", message_text(message)):
+            if sentence and any(pattern.search(sentence) for pattern in self._pin_patterns):
+                self.pin(sentence)
+
+    def _truncate_summary(self, summary: str) -> str:
+        """Drop the oldest summary lines beyond `summary_max_tokens`"""
+        lines = summary.splitlines()
+        size = sum(len(line) + 1 for line in lines) // 4
+        while len(lines) > 1 and size > self.summary_max_tokens:
+            size -= (len(lines.pop(0)) + 1) // 4
+        return "\n".join(lines)[: self.summary_max_tokens * 4]
+
+    def _summary_messages(self) -> List[Dict[str, Any]]:
+        text = SUMMARY_HEADER
+        if self.pinned_facts:
+            text += "\nThings the user told you:\n" + "\n".join(f"- {fact}" for fact in self.pinned_facts.values())
+        if self.summary:
+            text += "\nEarlier turns:\n" + self.summary
+        return [
+            {"role": "user", "content": [{"text": text}]},
+            {"role": "assistant", "content": [{"text": SUMMARY_ACK}]},
+        ]
@@ -0,0 +1,145 @@
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from rich.console import Console
+from rich.text import Text
+from strands.hooks import AgentInitializedEvent, BeforeInvocationEvent, HookProvider, HookRegistry, MessageAddedEvent
+
+MODES = ("new", "recent")
+
+
+def is_turn_start(message: Dict[str, Any]) -> bool:
+    """A turn starts with a user message that is not just tool results"""
+    return message["role"] == "user" and any("toolResult" not in block for block in message.get("content", []))
+
+
+def clip(text: str, max_chars: int) -> str:
+    text = text.strip()
+    if len(text) > max_chars:
+        text = text[:max_chars - 3].rstrip() + "..."
+    return text.replace("\n", " ")
+
+
+def render_block(block: Dict[str, Any], max_chars: int) -> str:
+    if "text" in block:
+        return clip(block["text"], max_chars)
+    if "toolUse" in block:
+        tool_use = block["toolUse"]
+        return f"[tool call] {tool_use.get('name')}({clip(json.dumps(tool_use.get('input'), default=str), max_chars)})"
+    if "toolResult" in block:
+        result = block["toolResult"]
+        content = " ".join(
+            item["text"] if "text" in item else json.dumps(item["json"], default=str) if "json" in item else f"[{next(iter(item), 'empty')}]"
+            for item in result.get("content", [])
+        )
+        return f"[tool result, {result.get('status', 'success')}] {clip(content, max_chars)}"
+    return f"[{next(iter(block), 'empty')}]"
+
+
+def render_message(index: int, message: Dict[str, Any], max_chars: int) -> str:
+    blocks = " | ".join(render_block(block, max_chars) for block in message.get("content", []))
+    return f"{index}: {message['role']} - {blocks}"
+
+
+class HistoryInspector(HookProvider):
+    """Debug view of the conversation history that costs O(1) per message, however long the session.
+
+    Every message is rendered once, when it is added, and kept in a ring buffer of the last
+    `max_turns` turns. In `new` mode each message is printed as it is added; in `recent` mode
+    the buffer is printed before every invocation. History restored from a session is rendered
+    from its tail only, up to `max_turns` turns. When the history is rewritten rather than
+    appended to (a conversation manager compacted or trimmed it), the buffer is rebuilt the
+    same way from the tail of the new history.
+    """
+
+    def __init__(self, console: Optional[Console] = None, mode: str = "new", max_turns: int = 5, max_chars: int = 200):
+        if mode not in MODES:
+            raise ValueError(f"Unknown history view mode {mode!r}, expected one of {MODES}")
+        self.console = console or Console()
+        self.mode = mode
+        self.max_chars = max_chars
+        self.turns: Deque[List[str]] = deque(maxlen=max_turns)
+        self.message_count = 0
+        self._first_message: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(cls, console: Optional[Console] = None) -> Optional["HistoryInspector"]:
+        """Create an inspector configured by HISTORY_VIEW* environment variables, or None when disabled"""
+        mode = os.getenv("HISTORY_VIEW", "new").lower()
+        if mode == "off":
+            return None
+        return cls(
+            console=console,
+            mode=mode,
+            max_turns=int(os.getenv("HISTORY_VIEW_TURNS", "5")),
+            max_chars=int(os.getenv("HISTORY_VIEW_MAX_CHARS", "200")),
+        )
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AgentInitializedEvent, self.on_agent_initialized)
+        registry.add_callback(MessageAddedEvent, self.on_message_added)
+        if self.mode == "recent":
+            registry.add_callback(BeforeInvocationEvent, self.on_before_invocation)
+
+    def on_agent_initialized(self, event: AgentInitializedEvent) -> None:
+        """Seed the buffer from the tail of a restored session"""
+        messages = event.agent.messages
+        self._rebuild(messages)
+        if messages:
+            self.show(f"RESTORED HISTORY (last {len(self.turns)} turns of {len(messages)} messages)")
+
+    def on_message_added(self, event: MessageAddedEvent) -> None:
+        messages = event.agent.messages
+        # The message was appended to the history before the event; anything else means the
+        # history was rewritten since the last message and the indices in the buffer are stale
+        if len(messages) == self.message_count + 1 and messages[-1] is event.message and self._is_same_history(messages):
+            line = self._add(self.message_count, event.message)
+            self.message_count += 1
+            self._first_message = messages[0]
+        else:
+            self._rebuild(messages)
+            line = self.turns[-1][-1]
+        if self.mode == "new":
+            self.console.print(Text(line, style="dim"))
+
+    def on_before_invocation(self, event: BeforeInvocationEvent) -> None:
+        if len(event.agent.messages) != self.message_count or not self._is_same_history(event.agent.messages):
+            self._rebuild(event.agent.messages)
+        self.show("MESSAGE HISTORY")
+
+    def _is_same_history(self, messages: List[Dict[str, Any]]) -> bool:
+        # Compaction replaces the oldest messages, so a changed prefix shows in the first one
+        return self.message_count == 0 or (bool(messages) and messages[0] is self._first_message)
+
+    def _rebuild(self, messages: List[Dict[str, Any]]) -> None:
+        """Render the last `max_turns` turns of `messages` into an empty buffer"""
+        self.turns.clear()
+        start, turns = len(messages), 0
+        while start > 0 and turns < self.turns.maxlen:
+            start -= 1
+            turns += is_turn_start(messages[start])
+        for index in range(start, len(messages)):
+            self._add(index, messages[index])
+        self.message_count = len(messages)
+        self._first_message = messages[0] if messages else None
+
+    def _add(self, index: int, message: Dict[str, Any]) -> str:
+        line = render_message(index, message, self.max_chars)
+        if is_turn_start(message) or not self.turns:
+            self.turns.append([])
+        self.turns[-1].append(line)
+        return line
+
+    def recent(self) -> List[str]:
+        """Rendered messages of the last turns, oldest first"""
+        return [line for turn in self.turns for line in turn]
+
+    def show(self, title: str) -> None:
+        self.console.print("\n" + "-" * 50, style="dim")
+        self.console.print(Text(title + ":", style="dim"))
+        self.console.print("-" * 50, style="dim")
+        for line in self.recent():
+            self.console.print(Text(line, style="dim"))
+        self.console.print("-" * 50, style="dim")
@@ -0,0 +1,404 @@
+import atexit
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+from strands.types.exceptions import SessionException
+from strands.types.session import SessionAgent, SessionMessage
+
+from bedrock_agentcore.memory.integrations.strands.bedrock_converter import AgentCoreMemoryConverter
+from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+
+logger = logging.getLogger(__name__)
+
+# Errors that will not go away by retrying the same request
+PERMANENT_ERRORS = {"ValidationException", "AccessDeniedException", "ResourceNotFoundException"}
+
+
+class MemoryJournal:
+    """Append-only JSON lines journal of memory events that were queued but not yet acknowledged.
+
+    Every queued event is written as a `put` record before it is sent and followed by an `ack`
+    record once AgentCore Memory accepted it, so the events still pending after a crash can be
+    replayed. The file is truncated whenever everything written to it has been acknowledged.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._unacked = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def put(self, record_id: str, event: Dict[str, Any], key: Optional[str] = None) -> None:
+        with self._lock:
+            self._write({"op": "put", "id": record_id, "event": event, "key": key})
+            self._unacked += 1
+
+    def ack(self, record_id: str) -> None:
+        with self._lock:
+            self._unacked -= 1
+            if self._unacked <= 0:
+                # Nothing left to replay, start over instead of growing the file forever
+                self._unacked = 0
+                open(self.path, "w").close()
+            else:
+                self._write({"op": "ack", "id": record_id})
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Records that were put but never acknowledged, in the order they were written"""
+        if not os.path.exists(self.path):
+            return []
+        records: Dict[str, Dict[str, Any]] = {}
+        with self._lock, open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash while appending leaves at most one torn line at the end
+                    logger.warning(f"Skipping unreadable journal line in {self.path}")
+                    continue
+                if record["op"] == "put":
+                    records[record["id"]] = record
+                else:
+                    records.pop(record["id"], None)
+            self._unacked = len(records)
+        return list(records.values())
+
+
+class WriteBehindQueue:
+    """Sends memory events from a background thread so the caller never waits on AgentCore Memory.
+
+    Queued events are sent as soon as they arrive, up to `batch_size` at a time and concurrently
+    (their timestamps keep them ordered in AgentCore Memory). Failed sends are retried with
+    full-jitter exponential backoff up to `max_retries` times; events that still fail stay in
+    the journal and are replayed on the next start. Permanent errors (validation, access) are
+    logged and dropped. Events submitted with a `key` replace a queued, unsent event with the
+    same key, so only the latest agent state is sent. `on_late_delivery` is called with every
+    event that was stored only after a retry or a replay, so it may be older than events that
+    were already read back.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Any],
+        journal: Optional[MemoryJournal] = None,
+        batch_size: int = 16,
+        max_retries: int = 5,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 5.0,
+        concurrency: int = 4,
+        on_late_delivery: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self._send = send
+        self.journal = journal
+        self.on_late_delivery = on_late_delivery
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._queue: List[Dict[str, Any]] = []
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="memory-write")
+        self._worker = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+        self._worker.start()
+        self.stats = {"queued": 0, "sent": 0, "retries": 0, "failed": 0, "dropped": 0, "replayed": 0, "batches": 0, "coalesced": 0}
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def submit(self, event: Dict[str, Any], key: Optional[str] = None) -> None:
+        record_id = uuid.uuid4().hex
+        if self.journal:
+            self.journal.put(record_id, event, key)
+        self._enqueue({"id": record_id, "event": event, "key": key})
+
+    def replay(self) -> int:
+        """Queue the events the journal has no acknowledgement for"""
+        if not self.journal:
+            return 0
+        pending = self.journal.pending()
+        for record in pending:
+            self._enqueue({"id": record["id"], "event": record["event"], "key": record.get("key"), "replayed": True})
+        self._count("replayed", len(pending))
+        if pending:
+            logger.info(f"Replaying {len(pending)} unsent memory events from {self.journal.path}")
+        return len(pending)
+
+    def _enqueue(self, item: Dict[str, Any]) -> None:
+        with self._condition:
+            if self._closed:
+                raise SessionException("Memory write-behind queue is closed")
+            if item["key"] is not None:
+                superseded = [queued for queued in self._queue if queued["key"] == item["key"]]
+                for queued in superseded:
+                    self._queue.remove(queued)
+                    if self.journal:
+                        self.journal.ack(queued["id"])
+                self.stats["coalesced"] += len(superseded)
+            self._queue.append(item)
+            self.stats["queued"] += 1
+            self._condition.notify_all()
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._queue) + self._in_flight
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event was sent (or given up on), return False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            if not flushed:
+                # Whatever was not sent stays in the journal for the next start
+                self._queue.clear()
+            self._condition.notify_all()
+        self._worker.join(timeout=1)
+        self._executor.shutdown(wait=flushed)
+        if not flushed:
+            logger.warning("Memory events not sent yet are kept in the journal for the next start")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            return {**self.stats, "pending": len(self._queue) + self._in_flight}
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        # Counters are updated from the caller's thread and from the sender threads
+        with self._condition:
+            self.stats[name] += amount
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._queue:
+                    return
+                batch, self._queue = self._queue[: self.batch_size], self._queue[self.batch_size:]
+                self._in_flight += len(batch)
+            self._count("batches")
+            for _ in self._executor.map(self._deliver, batch):
+                pass
+            with self._condition:
+                self._in_flight -= len(batch)
+                self._condition.notify_all()
+
+    def _deliver(self, item: Dict[str, Any]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._send(item["event"])
+                self._count("sent")
+                if self.journal:
+                    self.journal.ack(item["id"])
+                if self.on_late_delivery and (attempt or item.get("replayed")):
+                    try:
+                        self.on_late_delivery(item["event"])
+                    except Exception as e:
+                        logger.warning(f"Late delivery callback failed: {e}")
+                return
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code in PERMANENT_ERRORS:
+                    logger.error(f"Dropping memory event after {code}: {e}")
+                    self._count("dropped")
+                    if self.journal:
+                        self.journal.ack(item["id"])
+                    return
+                error: Exception = e
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+        self._count("failed")
+        logger.error(f"Giving up on memory event after {self.max_retries} retries, kept for replay: {error}")
+
+
+def _encode_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {**event, "eventTimestamp": event["eventTimestamp"].isoformat()}
+
+
+def _decode_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {**event, "eventTimestamp": datetime.fromisoformat(event["eventTimestamp"])}
+
+
+class FullHistoryMemorySessionManager(AgentCoreMemorySessionManager):
+    """AgentCoreMemorySessionManager that lists the whole session before applying an offset.
+
+    The base class lists only the newest 100 events (or `offset + limit`) and slices the
+    messages from the oldest of those. Once a session has more events than that, a conversation
+    manager restoring with `offset=removed_message_count` gets the wrong messages or none, e.g.
+    the turns that compaction kept verbatim are lost on restart.
+    """
+
+    def list_messages(self, session_id: str, agent_id: str, limit: Optional[int] = None, offset: int = 0, **kwargs: Any) -> List[SessionMessage]:
+        if session_id != self.config.session_id:
+            raise SessionException(f"Session ID mismatch: expected {self.config.session_id}, got {session_id}")
+        try:
+            events = self.memory_client.list_events(
+                memory_id=self.config.memory_id,
+                actor_id=self.config.actor_id,
+                session_id=session_id,
+                max_results=sys.maxsize,
+            )
+        except Exception as e:
+            logger.error(f"Failed to list messages from AgentCore Memory: {e}")
+            return []
+        messages = AgentCoreMemoryConverter.events_to_messages(events)
+        return messages[offset:] if limit is None else messages[offset:offset + limit]
+
+
+class WriteBehindMemorySessionManager(FullHistoryMemorySessionManager):
+    """AgentCoreMemorySessionManager that persists messages and agent state asynchronously.
+
+    Message and agent events are written to a local journal and queued instead of being sent
+    while the user waits; a background thread sends them to AgentCore Memory with retries. Each
+    event carries a client token, so an event that is replayed after a crash is not stored twice.
+    On start, events left in the journal are sent before the session history is read. Reads of
+    agent state are answered from what this process last wrote. `on_late_delivery` is passed to
+    the WriteBehindQueue, so a history cache can drop what a late event invalidated.
+    """
+
+    def __init__(
+        self,
+        agentcore_memory_config: Any,
+        region_name: Optional[str] = None,
+        journal_path: Optional[str] = None,
+        journal_fsync: bool = False,
+        replay_timeout: float = 30.0,
+        **kwargs: Any,
+    ):
+        queue_options = {
+            key: kwargs.pop(key)
+            for key in ("batch_size", "max_retries", "backoff_base", "backoff_cap", "concurrency", "on_late_delivery")
+            if key in kwargs
+        }
+        super().__init__(agentcore_memory_config, region_name=region_name, **kwargs)
+        # Latest agent state written or read by this process, as the JSON sent to the service
+        self._agent_states: Dict[str, str] = {}
+        journal = MemoryJournal(journal_path, fsync=journal_fsync) if journal_path else None
+        self.write_queue = WriteBehindQueue(self._send_event, journal, **queue_options)
+        if self.write_queue.replay() and not self.write_queue.flush(replay_timeout):
+            logger.warning("Replayed memory events are still pending, the restored history may be incomplete")
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, agentcore_memory_config: Any, region_name: Optional[str] = None, **kwargs: Any) -> AgentCoreMemorySessionManager:
+        """Create the session manager configured by MEMORY_WRITE_* environment variables.
+
+        Returns the synchronous FullHistoryMemorySessionManager when MEMORY_WRITE_BEHIND=false.
+        """
+        if os.getenv("MEMORY_WRITE_BEHIND", "true").lower() != "true":
+            # Synchronous writes are never late
+            kwargs.pop("on_late_delivery", None)
+            return FullHistoryMemorySessionManager(agentcore_memory_config, region_name=region_name, **kwargs)
+        journal_dir = os.getenv("MEMORY_JOURNAL_DIR", ".memory_journal")
+        journal_name = f"{agentcore_memory_config.actor_id}_{agentcore_memory_config.session_id}.jsonl"
+        return cls(
+            agentcore_memory_config,
+            region_name=region_name,
+            journal_path=os.path.join(journal_dir, journal_name) if journal_dir else None,
+            journal_fsync=os.getenv("MEMORY_JOURNAL_FSYNC", "false").lower() == "true",
+            batch_size=int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "16")),
+            max_retries=int(os.getenv("MEMORY_WRITE_MAX_RETRIES", "5")),
+            **kwargs,
+        )
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> Dict[str, Any]:
+        if session_id != self.config.session_id:
+            raise SessionException(f"Session ID mismatch: expected {self.config.session_id}, got {session_id}")
+        messages = AgentCoreMemoryConverter.message_to_payload(session_message)
+        if not messages:
+            return {}
+        if AgentCoreMemoryConverter.exceeds_conversational_limit(messages[0]):
+            payload = [{"blob": json.dumps(messages[0])}]
+        else:
+            payload = [{"conversational": {"content": {"text": text}, "role": role.upper()}} for text, role in messages]
+        created_at = datetime.fromisoformat(session_message.created_at.replace("Z", "+00:00"))
+        self._enqueue(self.config.actor_id, payload, self._get_monotonic_timestamp(created_at))
+        # The event id is not known until the event is sent
+        return {}
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        if session_id != self.config.session_id:
+            raise SessionException(f"Session ID mismatch: expected {self.config.session_id}, got {session_id}")
+        blob = json.dumps(session_agent.to_dict())
+        self._agent_states[session_agent.agent_id] = blob
+        actor_id = self._get_full_agent_id(session_agent.agent_id)
+        # Only the latest agent state is ever read back, so a newer state replaces an unsent one
+        self._enqueue(actor_id, [{"blob": blob}], self._get_monotonic_timestamp(), key=actor_id)
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        if session_id != self.config.session_id:
+            return None
+        blob = self._agent_states.get(agent_id)
+        if blob is not None:
+            # The service may not have the latest state yet, it can still be queued
+            return SessionAgent.from_dict(json.loads(blob))
+        session_agent = super().read_agent(session_id, agent_id, **kwargs)
+        if session_agent is not None:
+            self._agent_states[agent_id] = json.dumps(session_agent.to_dict())
+        return session_agent
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        blob = self._agent_states.get(session_agent.agent_id)
+        if blob is None:
+            # Unknown agent: let the base class look it up (and fail if it does not exist)
+            return super().update_agent(session_id, session_agent, **kwargs)
+        session_agent.created_at = json.loads(blob)["created_at"]
+        self.create_agent(session_id, session_agent)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued events reached AgentCore Memory"""
+        return self.write_queue.flush(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        if not self.write_queue.closed:
+            self.write_queue.close(timeout)
+
+    def _enqueue(self, actor_id: str, payload: List[Dict[str, Any]], timestamp: datetime, key: Optional[str] = None) -> None:
+        event = {
+            "memoryId": self.config.memory_id,
+            "actorId": actor_id,
+            "sessionId": self.session_id,
+            "payload": payload,
+            "eventTimestamp": timestamp.astimezone(timezone.utc),
+            "clientToken": uuid.uuid4().hex,
+        }
+        self.write_queue.submit(_encode_event(event), key)
+
+    def _send_event(self, event: Dict[str, Any]) -> Any:
+        return self.memory_client.gmdp_client.create_event(**_decode_event(event))
@@ -0,0 +1,253 @@
+"""
+Benchmark of conversation compaction on a long synthetic conversation.
+
+A synthetic model stands in for Bedrock: it counts the input tokens of every call and models
+its latency as a fixed time to first token plus a prefill cost per input token (nothing is
+slept, so 200 turns run in seconds). The same conversation is replayed with:
+  full        - every message is sent every turn (no conversation management)
+  sliding     - Strands' default sliding window of 40 messages
+  compacting  - CompactingConversationManager with the extractive summarizer
+  compacting_model - CompactingConversationManager summarizing with the (synthetic) model
+
+Facts the user states in the first turns are checked in the context of the last turn.
+
+The restart stage persists the compacting run to the in-memory stand-in for AgentCore Memory
+(local_memory_service.py) and starts a new agent on the session. The restored context must
+equal the context before the restart: the summary plus the turns compaction kept verbatim.
+
+Usage:
+    python ./scripts/bench_compaction.py --turns 200 --max-tokens 8000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from strands import Agent, tool
+from strands.agent.conversation_manager import NullConversationManager, SlidingWindowConversationManager
+from strands.models import Model
+
+from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig
+from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+
+from conversation_compaction import (
+    SUMMARY_PROMPT,
+    CompactingConversationManager,
+    ExtractiveSummarizer,
+    ModelSummarizer,
+    estimate_tokens,
+)
+from local_memory_service import InMemoryMemoryService, LocalBotoSession
+from memory_write_behind import FullHistoryMemorySessionManager
+
+OPENING_TURNS = [
+    "Hi, my name is Dana and I'm planning a two week trip through Japan in April.",
+    "I'm allergic to peanuts, so please keep that in mind for restaurants.",
+    "My budget is 3000 EUR for the whole trip, flights excluded.",
+    "I prefer trains over domestic flights.",
+]
+FACTS = ["Dana", "peanuts", "3000 EUR", "trains"]
+CITIES = ["Tokyo", "Kyoto", "Osaka", "Nara", "Hiroshima", "Kanazawa", "Hakone", "Nikko"]
+TEMPLATES = [
+    "What should I see in {city} on day {day}?",
+    "What's the weather like in {city} this week?",
+    "Suggest a restaurant in {city} close to the station.",
+    "How do I get from {city} to {next} and how long does it take?",
+    "Is one night in {city} enough, or should I stay longer?",
+]
+FINAL_TURN = "Before I book: remind me of my name, my dietary restrictions, my budget and how I like to travel."
+
+
+@tool
+def weather(city: str) -> str:
+    """Get the weather for a city"""
+    return f"{city}: 18C, light rain in the afternoon, sunny tomorrow"
+
+
+def conversation(turns: int) -> List[str]:
+    prompts = list(OPENING_TURNS)
+    while len(prompts) < turns - 1:
+        i = len(prompts)
+        city, next_city = CITIES[i % len(CITIES)], CITIES[(i + 1) % len(CITIES)]
+        prompts.append(TEMPLATES[i % len(TEMPLATES)].format(city=city, next=next_city, day=i // len(TEMPLATES) + 1))
+    return prompts[: turns - 1] + [FINAL_TURN]
+
+
+class SyntheticModel(Model):
+    """Scripted model that records input tokens and models latency from them"""
+
+    def __init__(self, ttft_ms: float, prefill_ms_per_1k: float):
+        self.config = {"model_id": "synthetic", "ttft_ms": ttft_ms, "prefill_ms_per_1k": prefill_ms_per_1k}
+        self.turn_calls: List[Dict[str, Any]] = []
+        self.summary_calls: List[Dict[str, Any]] = []
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any):
+        raise NotImplementedError("SyntheticModel does not support structured output")
+        yield  # pragma: no cover
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        input_tokens = sum(estimate_tokens(message) for message in messages) + len(system_prompt or "") // 4
+        call = {
+            "input_tokens": input_tokens,
+            "latency_ms": self.config["ttft_ms"] + input_tokens / 1000 * self.config["prefill_ms_per_1k"],
+            "context": json.dumps(messages),
+        }
+        last = messages[-1]
+        prompt = " ".join(block.get("text", "") for block in last["content"])
+        has_result = any("toolResult" in block for block in last["content"])
+
+        yield {"messageStart": {"role": "assistant"}}
+        if system_prompt == SUMMARY_PROMPT:
+            self.summary_calls.append(call)
+            answer = "- The user is planning a rail trip through Japan and asked about sights, weather and routes."
+        else:
+            self.turn_calls.append(call)
+            if "weather" in prompt.lower() and not has_result and tool_specs:
+                city = next((c for c in CITIES if c in prompt), "Tokyo")
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tool_{len(self.turn_calls)}", "name": "weather"}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps({"city": city})}}}}
+                yield {"contentBlockStop": {}}
+                yield {"messageStop": {"stopReason": "tool_use"}}
+                return
+            answer = (
+                f"Good question. For turn {len(self.turn_calls)} I would suggest starting early to avoid the crowds, "
+                "buying an IC card for local transport and reserving seats on the Shinkansen a few days ahead. "
+                "Temples open around 8am, most museums close at 5pm, and the evenings are best spent in the "
+                "food streets near the station. Let me know if you want a detailed hour-by-hour plan."
+            )
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": answer}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": len(answer) // 4, "totalTokens": input_tokens + len(answer) // 4}, "metrics": {"latencyMs": 0}}}
+
+
+def conversation_manager(strategy: str, max_tokens: int):
+    if strategy == "full":
+        return NullConversationManager()
+    if strategy == "sliding":
+        return SlidingWindowConversationManager(window_size=40)
+    summarizer = ModelSummarizer() if strategy == "compacting_model" else ExtractiveSummarizer()
+    return CompactingConversationManager(max_tokens=max_tokens, summarizer=summarizer)
+
+
+def run_strategy(strategy: str, prompts: List[str], args) -> Dict[str, Any]:
+    model = SyntheticModel(args.ttft_ms, args.prefill_ms_per_1k)
+    manager = conversation_manager(strategy, args.max_tokens)
+    agent = Agent(
+        model=model,
+        tools=[weather],
+        system_prompt="You are a helpful assistant with access to travel information.",
+        conversation_manager=manager,
+        callback_handler=None,
+    )
+    overheads = []
+    for prompt in prompts:
+        started = time.perf_counter()
+        agent(prompt)
+        overheads.append((time.perf_counter() - started) * 1000)
+
+    tokens = [call["input_tokens"] for call in model.turn_calls]
+    latencies = [call["latency_ms"] for call in model.turn_calls]
+    last_context = model.turn_calls[-1]["context"]
+    return {
+        "model_calls": len(tokens),
+        "total_input_tokens": sum(tokens),
+        "last_turn_input_tokens": tokens[-1],
+        "max_input_tokens": max(tokens),
+        "summary_calls": len(model.summary_calls),
+        "summary_input_tokens": sum(call["input_tokens"] for call in model.summary_calls),
+        "mean_model_latency_ms": round(statistics.mean(latencies), 1),
+        "p95_model_latency_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 1),
+        "mean_agent_overhead_ms": round(statistics.mean(overheads), 2),
+        "facts_in_last_context": [fact for fact in FACTS if fact in last_context],
+        "manager": manager.snapshot() if hasattr(manager, "snapshot") else {},
+    }
+
+
+def restart_after_compaction(prompts: List[str], args) -> Dict[str, Any]:
+    """Run the compacting manager on a persisted session, then restore the session in a new agent"""
+    service = InMemoryMemoryService()
+    config = AgentCoreMemoryConfig(memory_id="local-memory", session_id="compacted_session", actor_id="bench_user")
+
+    def start(manager_class) -> Agent:
+        return Agent(
+            model=SyntheticModel(args.ttft_ms, args.prefill_ms_per_1k),
+            tools=[weather],
+            system_prompt="You are a helpful assistant with access to travel information.",
+            conversation_manager=CompactingConversationManager(max_tokens=args.max_tokens, summarizer=ExtractiveSummarizer()),
+            session_manager=manager_class(config, region_name="us-east-1", boto_session=LocalBotoSession(service)),
+            agent_id="travel_agent",
+            callback_handler=None,
+        )
+
+    agent = start(FullHistoryMemorySessionManager)
+    for prompt in prompts:
+        agent(prompt)
+    before = json.dumps(agent.messages)
+    restored = {name: start(manager_class).messages for name, manager_class in (("full_history", FullHistoryMemorySessionManager), ("upstream", AgentCoreMemorySessionManager))}
+    return {
+        "stored_message_events": sum(1 for event in service.events if event["actorId"] == config.actor_id),
+        "removed_message_count": agent.conversation_manager.removed_message_count,
+        "messages_before_restart": len(agent.messages),
+        "restored_messages": {name: len(messages) for name, messages in restored.items()},
+        "restored_matches": {name: json.dumps(messages) == before for name, messages in restored.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input tokens and modelled latency with and without compaction")
+    parser.add_argument("--turns", type=int, default=200, help="User turns in the synthetic conversation")
+    parser.add_argument("--max-tokens", type=int, default=8000, help="Token budget of the compacting manager")
+    parser.add_argument("--ttft-ms", type=float, default=400, help="Modelled time to first token without input")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=30, help="Modelled prefill time per 1k input tokens")
+    parser.add_argument("--strategies", default="full,sliding,compacting,compacting_model")
+    parser.add_argument("--no-restart", action="store_true", help="Skip restoring the compacted session in a new agent")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    prompts = conversation(args.turns)
+    results = {strategy: run_strategy(strategy, prompts, args) for strategy in args.strategies.split(",")}
+    restart = None if args.no_restart else restart_after_compaction(prompts, args)
+    if args.json:
+        print(json.dumps({**results, "restart": restart} if restart else results, indent=2))
+        return
+
+    full = results.get("full")
+    print(f"{args.turns} turns, budget {args.max_tokens} tokens, latency {args.ttft_ms} ms + {args.prefill_ms_per_1k} ms/1k tokens\n")
+    print(f"{'strategy':<18} {'input tokens':>13} {'vs full':>8} {'last turn':>10} {'summary':>9} {'mean ms':>8} {'p95 ms':>8} {'overhead':>9}  facts")
+    for strategy, result in results.items():
+        versus = f"{result['total_input_tokens'] / full['total_input_tokens']:>7.0%}" if full else f"{'-':>7}"
+        print(
+            f"{strategy:<18} {result['total_input_tokens']:>13,} {versus:>8} {result['last_turn_input_tokens']:>10,} "
+            f"{result['summary_input_tokens']:>9,} {result['mean_model_latency_ms']:>8.0f} {result['p95_model_latency_ms']:>8.0f} "
+            f"{result['mean_agent_overhead_ms']:>7.2f}ms  {len(result['facts_in_last_context'])}/{len(FACTS)}"
+        )
+    if restart:
+        print(
+            f"\nRestart after compaction ({restart['stored_message_events']} message events stored, "
+            f"{restart['removed_message_count']} compacted, {restart['messages_before_restart']} messages in context):"
+        )
+        for name, count in restart["restored_messages"].items():
+            print(f"  {name:<13} restored {count:>4} messages, {'identical to' if restart['restored_matches'][name] else 'DIFFERENT from'} the context before the restart")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Startup cost of restoring a long session with and without the local session snapshot.
+
+A session of `--turns` turns is written to the in-memory stand-in for AgentCore Memory
+(local_memory_service.py), then agents are started against it:
+  cold   - no snapshot, the full history is listed (as before the snapshot existed)
+  warm   - snapshot from the previous start, `--new-turns` turns were added since
+  stale  - the snapshot's newest event no longer exists (memory recreated), so it is reloaded
+  late   - a message stored after the last start, timestamped before the snapshot's newest
+           event (a retried write), is picked up by the snapshot's overlap window
+Every memory call costs `--latency-ms`. The restored history must match in all three cases.
+
+Usage:
+    python ./scripts/bench_snapshot.py --turns 200 --new-turns 2 --latency-ms 80
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from strands import Agent
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+
+from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig
+from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+from bench_write_behind import EchoModel
+from local_memory_service import InMemoryMemoryService, LocalBotoSession
+from session_snapshot import SessionSnapshotCache
+
+CONFIG = AgentCoreMemoryConfig(memory_id="local-memory", session_id="long_session", actor_id="bench_user")
+
+
+def agent_for(manager) -> Agent:
+    # Nothing is trimmed from the context, so a restart restores the history the session manager lists
+    return Agent(model=EchoModel(), session_manager=manager, conversation_manager=SlidingWindowConversationManager(window_size=100000), callback_handler=None)
+
+
+def add_turns(service: InMemoryMemoryService, turns: int) -> None:
+    agent = agent_for(AgentCoreMemorySessionManager(CONFIG, region_name="us-east-1", boto_session=LocalBotoSession(service)))
+    for turn in range(turns):
+        agent(f"Turn {turn}: what should I pack for Oslo?")
+
+
+def add_late_message(service: InMemoryMemoryService) -> None:
+    """Store a message just before the newest one of the session, as a retried write lands"""
+    newest = max(event["eventTimestamp"] for event in service.events if event["actorId"] == CONFIG.actor_id)
+    payload = [{"conversational": {"content": {"text": "Late: and a rain jacket"}, "role": "ASSISTANT"}}]
+    service.create_event(CONFIG.memory_id, CONFIG.actor_id, CONFIG.session_id, payload, eventTimestamp=newest - timedelta(milliseconds=1))
+
+
+def start_agent(service: InMemoryMemoryService, cache: Optional[SessionSnapshotCache]) -> Dict[str, Any]:
+    calls, listed = service.calls["list_events"], service.listed_events
+    started = time.perf_counter()
+    manager = AgentCoreMemorySessionManager(CONFIG, region_name="us-east-1", boto_session=LocalBotoSession(service))
+    if cache:
+        cache.attach(manager.memory_client)
+        before = cache.snapshot()
+    agent = agent_for(manager)
+    result = {
+        "startup_ms": round((time.perf_counter() - started) * 1000, 1),
+        "list_calls": service.calls["list_events"] - calls,
+        "listed_events": service.listed_events - listed,
+        "messages": agent.messages,
+    }
+    if cache:
+        after = cache.snapshot()
+        result.update({key: after[key] - before[key] for key in ("cached_events", "full_reloads")})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session startup with and without the local snapshot")
+    parser.add_argument("--turns", type=int, default=200, help="Turns already stored in the session")
+    parser.add_argument("--new-turns", type=int, default=2, help="Turns added between the two starts")
+    parser.add_argument("--latency-ms", type=float, default=80, help="Simulated AgentCore Memory round-trip")
+    # Turns are written milliseconds apart here, so the overlap is scaled down with them
+    parser.add_argument("--overlap-ms", type=float, default=5, help="Window re-listed behind the snapshot's newest event")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    service = InMemoryMemoryService()
+    add_turns(service, args.turns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SessionSnapshotCache(os.path.join(directory, "snapshot.sqlite3"), overlap=args.overlap_ms / 1000)
+        start_agent(service, cache)  # writes the snapshot
+        add_turns(service, args.new_turns)
+
+        service.latency = args.latency_ms / 1000
+        results = {"cold": start_agent(service, None), "warm": start_agent(service, cache)}
+        # The memory is recreated with the same history but new event ids
+        for event in service.events:
+            event["eventId"] = "recreated-" + event["eventId"]
+        results["stale"] = start_agent(service, cache)
+        add_late_message(service)
+        results["late"] = start_agent(service, cache)
+        late_expected = start_agent(service, None)["messages"]
+
+    expected = results["cold"].pop("messages")
+    for mode in ("warm", "stale"):
+        results[mode]["history_matches"] = results[mode].pop("messages") == expected
+    results["late"]["history_matches"] = results["late"].pop("messages") == late_expected
+    ok = all(results[mode]["history_matches"] for mode in ("warm", "stale", "late"))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit(0 if ok else 1)
+
+    print(f"{args.turns} + {args.new_turns} turns stored, {args.latency_ms} ms per memory call\n")
+    print(f"{'start':<7} {'startup ms':>11} {'list calls':>11} {'events listed':>14} {'from snapshot':>14}")
+    for mode, result in results.items():
+        print(f"{mode:<7} {result['startup_ms']:>11.1f} {result['list_calls']:>11} {result['listed_events']:>14} {result.get('cached_events', 0):>14}")
+    status = "✓" if ok else "✗"
+    print(f"\n{status} restored history matches a full reload ({len(expected)} messages)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Per-turn latency with synchronous vs write-behind AgentCore Memory persistence, plus a crash
+and replay check. Runs against the in-memory stand-in in local_memory_service.py, so no AWS
+access is needed; `--latency-ms` sets the simulated round-trip of every memory call.
+
+Usage:
+    python ./scripts/bench_write_behind.py --turns 20 --latency-ms 80
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from strands import Agent
+from strands.models import Model
+
+from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig
+from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+from local_memory_service import InMemoryMemoryService, LocalBotoSession
+from memory_write_behind import WriteBehindMemorySessionManager
+
+
+class EchoModel(Model):
+    """Instant model, so a turn only costs the agent loop and memory persistence"""
+
+    def __init__(self):
+        self.config = {"model_id": "echo"}
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any):
+        raise NotImplementedError("EchoModel does not support structured output")
+        yield  # pragma: no cover
+
+    async def stream(self, messages: List[Dict[str, Any]], tool_specs=None, system_prompt=None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        text = "You said: " + " ".join(block.get("text", "") for block in messages[-1]["content"])
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": text}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def memory_config(session_id: str) -> AgentCoreMemoryConfig:
+    return AgentCoreMemoryConfig(memory_id="local-memory", session_id=session_id, actor_id="bench_user")
+
+
+def run_turns(session_manager, turns: int) -> List[float]:
+    agent = Agent(model=EchoModel(), session_manager=session_manager, callback_handler=None)
+    durations = []
+    for turn in range(turns):
+        started = time.perf_counter()
+        agent(f"Turn {turn}: what should I pack for Oslo?")
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def summary(durations: List[float]) -> Dict[str, float]:
+    ordered = sorted(durations)
+    return {
+        "mean_ms": round(statistics.mean(durations), 1),
+        "p50_ms": round(ordered[len(ordered) // 2], 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+    }
+
+
+def bench_latency(turns: int, latency: float, journal_dir: str) -> Dict[str, Any]:
+    results = {}
+
+    service = InMemoryMemoryService(latency=latency)
+    manager = AgentCoreMemorySessionManager(memory_config("sync"), region_name="us-east-1", boto_session=LocalBotoSession(service))
+    results["sync"] = {**summary(run_turns(manager, turns)), "memory_calls": service.calls["create_event"]}
+
+    service = InMemoryMemoryService(latency=latency)
+    manager = WriteBehindMemorySessionManager(
+        memory_config("write_behind"),
+        region_name="us-east-1",
+        boto_session=LocalBotoSession(service),
+        journal_path=os.path.join(journal_dir, "latency.jsonl"),
+    )
+    durations = run_turns(manager, turns)
+    started = time.perf_counter()
+    manager.flush()
+    results["write_behind"] = {
+        **summary(durations),
+        "final_flush_ms": round((time.perf_counter() - started) * 1000, 1),
+        "memory_calls": service.calls["create_event"],
+        "queue": manager.write_queue.snapshot(),
+    }
+    manager.close()
+    return results
+
+
+def check_crash_replay(journal_dir: str) -> Dict[str, Any]:
+    """Lose the connection to memory, crash, restart: every turn must be restored exactly once"""
+    # Every failed send is logged; the outage is intended here
+    logging.getLogger("memory_write_behind").setLevel(logging.CRITICAL)
+    journal_path = os.path.join(journal_dir, "crash.jsonl")
+    service = InMemoryMemoryService()
+    options = {"region_name": "us-east-1", "boto_session": LocalBotoSession(service), "journal_path": journal_path}
+
+    crashed = WriteBehindMemorySessionManager(memory_config("crash"), max_retries=1, backoff_base=0.01, **options)
+    service.failure_rate = 1.0  # memory outage
+    run_turns(crashed, 3)
+    crashed.write_queue.close(timeout=0.5)  # the process dies with the events unsent
+    journaled = len(crashed.write_queue.journal.pending())
+
+    service.failure_rate = 0.0
+    service.lose_responses(1)  # the first replayed event is stored, but its response is lost
+    restarted = WriteBehindMemorySessionManager(memory_config("crash"), **options)
+    agent = Agent(model=EchoModel(), session_manager=restarted, callback_handler=None)
+    restarted.close()
+
+    stored = [event for event in service.events if event["actorId"] == "bench_user"]
+    return {
+        "journaled_after_crash": journaled,
+        "replayed": restarted.write_queue.stats["replayed"],
+        "message_events_stored": len(stored),
+        "restored_messages": len(agent.messages),
+        "ok": len(stored) == 6 and len(agent.messages) == 6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronous vs write-behind memory persistence")
+    parser.add_argument("--turns", type=int, default=20, help="Conversation turns per run")
+    parser.add_argument("--latency-ms", type=float, default=80, help="Simulated AgentCore Memory round-trip")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as journal_dir:
+        results = {
+            "latency": bench_latency(args.turns, args.latency_ms / 1000, journal_dir),
+            "crash_replay": check_crash_replay(journal_dir),
+        }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.turns} turns, {args.latency_ms} ms per memory call\n")
+    print(f"{'mode':<14} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'memory calls':>13}")
+    for mode, result in results["latency"].items():
+        print(f"{mode:<14} {result['mean_ms']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['memory_calls']:>13}")
+    print(f"\nwrite-behind final flush: {results['latency']['write_behind']['final_flush_ms']} ms")
+    crash = results["crash_replay"]
+    status = "✓" if crash["ok"] else "✗"
+    print(
+        f"{status} crash/replay: {crash['journaled_after_crash']} events journaled during the outage, "
+        f"{crash['replayed']} replayed, {crash['message_events_stored']} message events stored, {crash['restored_messages']} messages restored"
+    )
+    sys.exit(0 if crash["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
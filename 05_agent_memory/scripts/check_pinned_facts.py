@@ -0,0 +1,59 @@
+"""
+Checks which user sentences the compacting conversation manager (conversation_compaction.py) pins.
+
+Statements of fact or preference ("my budget is ...", "I'm allergic to ...") must be pinned.
+Questions about the same topics ("do I need a visa?", "what is the budget?") must not be.
+
+Usage:
+    python ./scripts/check_pinned_facts.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from conversation_compaction import CompactingConversationManager
+
+# (user sentence, whether it is pinned)
+CASES = [
+    ("Hi, my name is Dana.", True),
+    ("Please call me Dee.", True),
+    ("I'm allergic to peanuts, so please keep that in mind for restaurants.", True),
+    ("My son is severely allergic to shellfish.", True),
+    ("We are vegetarian.", True),
+    ("I can't eat gluten.", True),
+    ("My budget is 3000 EUR for the whole trip, flights excluded.", True),
+    ("We have a tight budget this time.", True),
+    ("I have a German passport.", True),
+    ("My passport expires in May.", True),
+    ("I am a Canadian citizen.", True),
+    ("I prefer trains over domestic flights.", True),
+    ("I'm travelling with my two kids.", True),
+    ("Remember that I land at 6 am.", True),
+    ("Do I need a visa for Japan?", False),
+    ("What is the budget for the hotel?", False),
+    ("Is my budget of 3000 EUR enough?", False),
+    ("Are there budget hotels near Kyoto station?", False),
+    ("Which restaurants are good for people with allergies?", False),
+    ("Is the food in Osaka vegetarian friendly?", False),
+    ("Does my passport need to be valid for six months?", False),
+    ("Can I prefer a window seat when booking?", False),
+    ("What can my kids do in Tokyo?", False),
+    ("How long does a visa take to process?", False),
+]
+
+
+def main():
+    failures = 0
+    for sentence, expected in CASES:
+        manager = CompactingConversationManager()
+        manager._pin_facts({"role": "user", "content": [{"text": sentence}]})
+        pinned = bool(manager.pinned_facts)
+        ok = pinned == expected
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} {'pinned' if pinned else 'kept  '} {sentence!r}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+In-memory stand-in for the AgentCore Memory data plane, for exercising the session managers
+without AWS. It implements the `create_event`, `list_events` and `get_event` calls of the
+boto3 `bedrock-agentcore` client, with optional latency, injected failures and `clientToken`
+idempotency. Pass `LocalBotoSession(service)` as `boto_session` to a session manager.
+"""
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+
+class InMemoryMemoryService:
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.events = []
+        self.calls = {"create_event": 0, "list_events": 0, "get_event": 0}
+        self.listed_events = 0
+        self._tokens = {}
+        self._fail_next = 0
+        self._lose_responses = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fail_next(self, count):
+        """Reject the next `count` create_event calls with a throttling error"""
+        self._fail_next = count
+
+    def lose_responses(self, count):
+        """Store the next `count` events but fail the call, as if the response got lost"""
+        self._lose_responses = count
+
+    def _throttle(self):
+        raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "CreateEvent")
+
+    def create_event(self, memoryId, actorId, sessionId, payload, eventTimestamp=None, clientToken=None, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls["create_event"] += 1
+            if self._fail_next > 0:
+                self._fail_next -= 1
+                self._throttle()
+            if self._random.random() < self.failure_rate:
+                self._throttle()
+            if clientToken and clientToken in self._tokens:
+                return {"event": self._tokens[clientToken]}
+            timestamp = eventTimestamp or datetime.now(timezone.utc)
+            event = {
+                "memoryId": memoryId,
+                "actorId": actorId,
+                "sessionId": sessionId,
+                "eventId": f"{int(timestamp.timestamp() * 1000):019d}#{uuid.uuid4().hex[:8]}",
+                "eventTimestamp": timestamp,
+                "payload": payload,
+                "branch": {"name": "main"},
+            }
+            self.events.append(event)
+            if clientToken:
+                self._tokens[clientToken] = event
+            if self._lose_responses > 0:
+                self._lose_responses -= 1
+                raise ConnectionError("Connection reset while reading the response")
+            return {"event": event}
+
+    def list_events(self, memoryId, actorId, sessionId, maxResults=100, includePayloads=True, nextToken=None, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls["list_events"] += 1
+            matching = [
+                event for event in self.events
+                if event["memoryId"] == memoryId and event["actorId"] == actorId and event["sessionId"] == sessionId
+            ]
+        # Newest first, like the service
+        matching.sort(key=lambda event: event["eventTimestamp"], reverse=True)
+        start = int(nextToken or 0)
+        page = matching[start:start + maxResults]
+        self.listed_events += len(page)
+        response = {"events": page}
+        if start + maxResults < len(matching):
+            response["nextToken"] = str(start + maxResults)
+        return response
+
+    def get_event(self, memoryId, actorId, sessionId, eventId, **kwargs):
+        with self._lock:
+            self.calls["get_event"] += 1
+            for event in self.events:
+                if event["eventId"] == eventId:
+                    return {"event": event}
+        raise ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": eventId}}, "GetEvent")
+
+
+class LocalBotoSession:
+    """boto3.Session look-alike whose `bedrock-agentcore` client is the in-memory service"""
+
+    def __init__(self, service, region_name="us-east-1"):
+        self.service = service
+        self.region_name = region_name
+
+    def client(self, service_name, region_name=None, config=None):
+        return self.service if service_name == "bedrock-agentcore" else None
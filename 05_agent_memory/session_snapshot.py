@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    name TEXT NOT NULL,
+    region TEXT NOT NULL,
+    memory_id TEXT NOT NULL,
+    resolved_at REAL NOT NULL,
+    PRIMARY KEY (name, region)
+);
+CREATE TABLE IF NOT EXISTS events (
+    memory_id TEXT NOT NULL,
+    actor_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    event_timestamp REAL NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (memory_id, actor_id, session_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (memory_id, actor_id, session_id, event_timestamp);
+"""
+SMALL_PAGE = 8
+MAX_PAGE = 100
+
+
+def _timestamp(event: Dict[str, Any]) -> float:
+    value = event["eventTimestamp"]
+    return value.timestamp() if isinstance(value, datetime) else datetime.fromisoformat(value).timestamp()
+
+
+def _encode(event: Dict[str, Any]) -> str:
+    value = event["eventTimestamp"]
+    return json.dumps({**event, "eventTimestamp": value.isoformat() if isinstance(value, datetime) else value}, default=str)
+
+
+def _decode(data: str) -> Dict[str, Any]:
+    event = json.loads(data)
+    event["eventTimestamp"] = datetime.fromisoformat(event["eventTimestamp"])
+    return event
+
+
+class SessionSnapshotCache:
+    """Local SQLite snapshot of AgentCore Memory events and of the memory resource lookup.
+
+    Listing a session's events pages through the service newest-first only until it reaches the
+    newest event already in the snapshot, so a restart downloads just what was added since.
+    Events up to `overlap` seconds older than that event are listed again, since a write that
+    was retried or sent concurrently can land after a newer one was already read. The snapshot
+    is valid only if that event is found; otherwise (memory recreated, events expired or
+    deleted) it is dropped and the session is listed in full. Events older than `max_age`
+    seconds are pruned, matching the memory's event expiry.
+    """
+
+    def __init__(self, path: str, max_age: Optional[float] = None, memory_id_ttl: float = 86400.0, overlap: float = 60.0):
+        self.path = path
+        self.max_age = max_age
+        self.memory_id_ttl = memory_id_ttl
+        self.overlap = overlap
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.stats = {"cached_events": 0, "fetched_events": 0, "pages": 0, "full_reloads": 0, "invalidations": 0, "memory_id_hits": 0}
+
+    @classmethod
+    def from_env(cls, event_expiry_days: Optional[int] = None) -> Optional["SessionSnapshotCache"]:
+        """Create a cache configured by MEMORY_SNAPSHOT_* environment variables, or None when disabled"""
+        if os.getenv("MEMORY_SNAPSHOT_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            path=os.getenv("MEMORY_SNAPSHOT_PATH", os.path.join(".memory_cache", "snapshot.sqlite3")),
+            max_age=event_expiry_days * 86400 if event_expiry_days else None,
+            memory_id_ttl=float(os.getenv("MEMORY_ID_CACHE_TTL", "86400")),
+            overlap=float(os.getenv("MEMORY_SNAPSHOT_OVERLAP", "60")),
+        )
+
+    def memory_id(self, name: str, region: str, resolve: Callable[[], str]) -> str:
+        """Memory id for `name`, resolved with `resolve` only if the cached lookup expired"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT memory_id, resolved_at FROM memories WHERE name = ? AND region = ?", (name, region)
+            ).fetchone()
+        if row and time.time() - row[1] < self.memory_id_ttl:
+            self.stats["memory_id_hits"] += 1
+            return row[0]
+        memory_id = resolve()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO memories (name, region, memory_id, resolved_at) VALUES (?, ?, ?, ?)",
+                (name, region, memory_id, time.time()),
+            )
+        return memory_id
+
+    def invalidate_memory(self, name: str, region: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM memories WHERE name = ? AND region = ?", (name, region))
+
+    def invalidate_session(self, memory_id: str, actor_id: str, session_id: str) -> None:
+        """Drop the snapshot of a session, so it is listed in full on the next read"""
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM events WHERE memory_id = ? AND actor_id = ? AND session_id = ?", (memory_id, actor_id, session_id)
+            )
+        self.stats["invalidations"] += 1
+
+    def list_events(
+        self,
+        fetch_page: Callable[[Optional[str], int], Tuple[List[Dict[str, Any]], Optional[str]]],
+        memory_id: str,
+        actor_id: str,
+        session_id: str,
+        max_results: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Events of a session newest-first, fetching only those newer than the snapshot.
+
+        `fetch_page(next_token, page_size)` returns one page of events (newest-first) and the next token.
+        """
+        key = (memory_id, actor_id, session_id)
+        with self._lock:
+            newest = self._db.execute(
+                "SELECT event_id, event_timestamp FROM events WHERE memory_id = ? AND actor_id = ? AND session_id = ? "
+                "ORDER BY event_timestamp DESC, event_id DESC LIMIT 1",
+                key,
+            ).fetchone()
+
+        fetched, reached = self._fetch_until(fetch_page, newest, max_results)
+        if newest and not reached:
+            logger.info(f"Snapshot of session {session_id} ({actor_id}) is stale, replacing it")
+            self.stats["full_reloads"] += 1
+            with self._lock, self._db:
+                self._db.execute("DELETE FROM events WHERE memory_id = ? AND actor_id = ? AND session_id = ?", key)
+            if len(fetched) < max_results:
+                fetched, _ = self._fetch_until(fetch_page, None, max_results)
+
+        self.stats["fetched_events"] += len(fetched)
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO events (memory_id, actor_id, session_id, event_id, event_timestamp, event) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, event["eventId"], _timestamp(event), _encode(event)) for event in fetched],
+            )
+            if self.max_age:
+                self._db.execute(
+                    "DELETE FROM events WHERE memory_id = ? AND actor_id = ? AND session_id = ? AND event_timestamp < ?",
+                    (*key, time.time() - self.max_age),
+                )
+            rows = self._db.execute(
+                "SELECT event FROM events WHERE memory_id = ? AND actor_id = ? AND session_id = ? "
+                "ORDER BY event_timestamp DESC, event_id DESC LIMIT ?",
+                (*key, max_results),
+            ).fetchall()
+        self.stats["cached_events"] += max(0, len(rows) - len(fetched))
+        return [_decode(row[0]) for row in rows]
+
+    def _fetch_until(self, fetch_page: Callable, newest: Optional[Tuple[str, float]], limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Page through events newest-first until the snapshot's newest event, return (new events, found it).
+
+        Past that event, events within `overlap` seconds of it are returned too, to pick up late
+        writes. Stops after `limit` events: more than a full listing is never needed, and a
+        snapshot that far behind is treated as stale. With a snapshot, pages start small and
+        double, since usually only the last turn or two are new.
+        """
+        fetched: List[Dict[str, Any]] = []
+        reached = False
+        token = None
+        page_size = min(limit, SMALL_PAGE if newest else MAX_PAGE)
+        while True:
+            events, token = fetch_page(token, page_size)
+            page_size = min(page_size * 2, MAX_PAGE)
+            self.stats["pages"] += 1
+            for event in events:
+                if newest and event["eventId"] == newest[0]:
+                    reached = True
+                    if not self.overlap:
+                        return fetched, True
+                    continue
+                if newest and not reached and _timestamp(event) < newest[1]:
+                    # Older than the snapshot's newest event without passing it: the snapshot is stale
+                    return fetched, False
+                if reached and _timestamp(event) < newest[1] - self.overlap:
+                    return fetched, True
+                fetched.append(event)
+                if len(fetched) >= limit:
+                    return fetched, reached
+            if not token:
+                return fetched, reached
+
+    def attach(self, memory_client: Any) -> None:
+        """Serve `memory_client.list_events` (main branch, with payloads) from the snapshot"""
+        uncached = memory_client.list_events
+
+        def list_events(memory_id, actor_id, session_id, branch_name=None, include_parent_branches=False, max_results=100, include_payload=True):
+            if (branch_name and branch_name != "main") or not include_payload:
+                return uncached(memory_id, actor_id, session_id, branch_name, include_parent_branches, max_results, include_payload)
+
+            def fetch_page(token, page_size):
+                params = {"memoryId": memory_id, "actorId": actor_id, "sessionId": session_id, "maxResults": page_size, "includePayloads": True}
+                if token:
+                    params["nextToken"] = token
+                response = memory_client.gmdp_client.list_events(**params)
+                return response.get("events", []), response.get("nextToken")
+
+            return self.list_events(fetch_page, memory_id, actor_id, session_id, max_results)
+
+        memory_client.list_events = list_events
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+def is_missing_memory(error: Exception) -> bool:
+    """Whether `error` says the memory resource does not exist (any more)"""
+    while error is not None:
+        if isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") == "ResourceNotFoundException":
+            return True
+        error = error.__cause__
+    return False
@@ -8,13 +8,15 @@ import logging
 import os
 from datetime import datetime
 from strands import Agent
-from strands.hooks import BeforeInvocationEvent, HookProvider, HookRegistry
 from rich.console import Console
-from rich.text import Text
+from bedrock_throttling import ThrottledBedrockModel
+from conversation_compaction import CompactingConversationManager
+from history_inspector import HistoryInspector
+from memory_write_behind import WriteBehindMemorySessionManager
+from session_snapshot import SessionSnapshotCache, is_missing_memory
 
 # Native AgentCore memory integration
 from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig
-from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
 from bedrock_agentcore_starter_toolkit.operations.memory.manager import MemoryManager
 
 # Initialize rich console
@@ -36,21 +38,13 @@ REGION = os.getenv('AWS_REGION', 'us-east-1')
 MEMORY_NAME = "TravelAgentMemory2"
 ACTOR_ID = "t3"
 SESSION_ID = "t3_session_1"
+MODEL_ID = "global.anthropic.claude-sonnet-4-20250514-v1:0"
+EVENT_EXPIRY_DAYS = 7
 
-class PromptHookProvider(HookProvider):
-    def on_before_invocation(self, event: BeforeInvocationEvent):
-        """Print agent info before each execution"""
-        console.print("\n" + "-"*50, style="dim")
-        console.print("MESSAGE HISTORY:", style="dim")
-        console.print("-"*50, style="dim")
-        for i, msg in enumerate(event.agent.messages):
-            console.print(f"{i}: {msg['role']} - {msg['content'][0]['text']}", style="dim")
-        console.print("-"*50, style="dim")
-    
-    def register_hooks(self, registry: HookRegistry):
-        registry.add_callback(BeforeInvocationEvent, self.on_before_invocation)
+# Local snapshot of the memory id and session history (see MEMORY_SNAPSHOT_* env vars)
+snapshot_cache = SessionSnapshotCache.from_env(event_expiry_days=EVENT_EXPIRY_DAYS)
 
-def setup_memory():
+def resolve_memory():
 
     # Initialize Memory Manager to get or create memory
     memory_manager = MemoryManager(region_name=REGION)
@@ -60,20 +54,24 @@ def setup_memory():
         name=MEMORY_NAME,
         strategies=[],
         description="Short-term memory for travel agent conversations",
-        event_expiry_days=7,
+        event_expiry_days=EVENT_EXPIRY_DAYS,
     )
-    
-    logger.info(f"✅ Memory ready (ID: {memory.id})")
     return memory.id
 
-def create_travel_agent():
-    """Create travel agent with native AgentCore memory integration"""
-    # Ensure AWS region is set for Bedrock
-    os.environ['AWS_DEFAULT_REGION'] = REGION
-    
-    # Setup memory
-    memory_id = setup_memory()
+def setup_memory():
+    # The memory id is cached locally, so a restart skips the control-plane lookup
+    if snapshot_cache:
+        memory_id = snapshot_cache.memory_id(MEMORY_NAME, REGION, resolve_memory)
+    else:
+        memory_id = resolve_memory()
     
+    logger.info(f"✅ Memory ready (ID: {memory_id})")
+    return memory_id
+
+def invalidate_snapshot(event):
+    snapshot_cache.invalidate_session(event["memoryId"], event["actorId"], event["sessionId"])
+
+def create_session_manager(memory_id):
     # Create AgentCore memory configuration
     agentcore_memory_config = AgentCoreMemoryConfig(
         memory_id=memory_id,
@@ -81,20 +79,49 @@ def create_travel_agent():
         actor_id=ACTOR_ID
     )
     
+    # Memory events are written in the background and journaled locally (see MEMORY_WRITE_* env vars)
+    # Events stored late (retried or replayed) can be older than the snapshot's newest event
+    session_manager = WriteBehindMemorySessionManager.from_env(
+        agentcore_memory_config=agentcore_memory_config,
+        region_name=REGION,
+        on_late_delivery=invalidate_snapshot if snapshot_cache else None
+    )
+    
+    # Later history reads only fetch events newer than the local snapshot
+    if snapshot_cache:
+        snapshot_cache.attach(session_manager.memory_client)
+    return session_manager
+
+def create_travel_agent():
+    """Create travel agent with native AgentCore memory integration"""
+    # Ensure AWS region is set for Bedrock
+    os.environ['AWS_DEFAULT_REGION'] = REGION
+    
+    # Setup memory
+    memory_id = setup_memory()
+    
     # Create session manager with error handling
     try:
-        session_manager = AgentCoreMemorySessionManager(
-            agentcore_memory_config=agentcore_memory_config,
-            region_name=REGION
-        )
+        session_manager = create_session_manager(memory_id)
     except Exception as e:
-        logger.error(f"Error creating session manager: {e}")
-        raise e
+        if not (snapshot_cache and is_missing_memory(e)):
+            logger.error(f"Error creating session manager: {e}")
+            raise e
+        # The cached memory id is gone (memory deleted or recreated): resolve it again
+        logger.info("Cached memory id is no longer valid, resolving it again")
+        snapshot_cache.invalidate_memory(MEMORY_NAME, REGION)
+        session_manager = create_session_manager(setup_memory())
+    
+    # Keep the context sent to the model within a token budget (see COMPACTION_* env vars)
+    conversation_manager = CompactingConversationManager.from_env()
+    
+    # Debug view of the history, rendered incrementally (see HISTORY_VIEW* env vars, `off` in production)
+    history_inspector = HistoryInspector.from_env(console=console)
     
     # Create agent with session manager - memory is handled automatically
     agent = Agent(
         name="TravelAssistant",
-        model="global.anthropic.claude-sonnet-4-20250514-v1:0",
+        model=ThrottledBedrockModel(model_id=MODEL_ID),
         system_prompt=
         f"""You are a helpful assistant with access to travel information.
             Use all you know about the user to provide helpful responses.
@@ -102,7 +129,8 @@ def create_travel_agent():
             Today's date: {datetime.today().strftime('%Y-%m-%d')}
         """,
         session_manager=session_manager,
-        hooks=[PromptHookProvider()]
+        conversation_manager=conversation_manager,
+        hooks=[history_inspector] if history_inspector else []
     )
     
     logger.info("✅ Travel agent created with AgentCore memory")
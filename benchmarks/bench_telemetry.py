@@ -0,0 +1,153 @@
+"""
+Micro-benchmark of per-invocation tracing overhead for each telemetry mode of telemetry_config.py.
+
+Each mode runs in its own subprocess (OpenTelemetry providers can only be set once per
+process) and emits the spans of a typical MCP agent invocation: a root span, eight stage
+spans and Strands-sized prompt/response attributes. The hot-path cost per invocation is
+reported separately from the time needed to flush everything that was queued:
+    python benchmarks/bench_telemetry.py --invocations 2000 --think-ms 1 --output telemetry.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import environment_info, load_example, percentile  # noqa: E402
+
+# Mode name -> (AGENT_TELEMETRY_MODE, extra environment)
+MODES = {
+    "unconfigured": (None, {}),
+    "off": ("off", {}),
+    "batch": ("batch", {}),
+    "batch_head_10pct": ("batch", {"AGENT_TELEMETRY_SAMPLE_RATIO": "0.1"}),
+    "batch_tail_10pct": ("batch", {"AGENT_TELEMETRY_TAIL_SAMPLE_RATIO": "0.1"}),
+    "batch_attr_cap_256": ("batch", {"AGENT_TELEMETRY_MAX_ATTRIBUTE_LENGTH": "256"}),
+    "file": ("file", {}),
+    "console": ("console", {}),
+}
+STAGES = ["token_lookup", "mcp_connect", "list_tools", "agent_setup", "agent_stream", "model", "tool", "model"]
+PROMPT = "Plan a five day trip through Norway with weather for every stop. " * 64
+
+
+def simulate_invocations(invocations, think_time=0.0):
+    """Emit the spans of `invocations` agent invocations and return the per-invocation durations.
+
+    `think_time` idles between invocations, like an agent waiting on Bedrock, which gives
+    background exporters room to run outside the measured hot path.
+    """
+    from opentelemetry import trace
+
+    tracer = trace.get_tracer("bench_telemetry")
+    durations = []
+    for i in range(invocations):
+        started = time.perf_counter()
+        with tracer.start_as_current_span("agent.invocation") as root:
+            root.set_attribute("session.id", f"session-{i}")
+            for name in STAGES:
+                with tracer.start_as_current_span(f"agent.{name}") as span:
+                    span.set_attribute("cache.hit", True)
+                    if name == "model":
+                        span.set_attribute("gen_ai.prompt", PROMPT)
+                        span.add_event("gen_ai.choice", {"message": PROMPT})
+        durations.append(time.perf_counter() - started)
+        if think_time:
+            time.sleep(think_time)
+    return durations
+
+
+def run_child(mode, invocations, think_time, result_path):
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SpanExporter, SpanExportResult
+
+    class DiscardingExporter(SpanExporter):
+        """Exporter stand-in that does the work of an OTLP export (protobuf encoding) minus the network"""
+
+        def export(self, spans):
+            encode_spans(spans).SerializeToString()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    telemetry_mode, extra_env = MODES[mode]
+    os.environ.update(extra_env)
+    if telemetry_mode is not None:
+        telemetry_config = load_example("04_agent_calls_mcp", "telemetry_config")
+        exporter = None
+        if telemetry_mode == "batch":
+            exporter = DiscardingExporter()
+        elif telemetry_mode == "console":
+            exporter = ConsoleSpanExporter(out=open(os.devnull, "w"))
+        telemetry_config.configure_telemetry(service_name="bench_telemetry", mode=telemetry_mode, span_exporter=exporter)
+
+    simulate_invocations(min(200, invocations), think_time)  # warm-up
+    started = time.perf_counter()
+    durations = simulate_invocations(invocations, think_time)
+    idle_seconds = think_time * invocations
+    hot_seconds = sum(durations)
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+    total_seconds = time.perf_counter() - started - idle_seconds
+
+    with open(result_path, "w") as f:
+        json.dump({
+            "invocations": invocations,
+            "mean_us": round(hot_seconds / invocations * 1e6, 2),
+            "p50_us": round(percentile(durations, 0.50) * 1e6, 2),
+            "p99_us": round(percentile(durations, 0.99) * 1e6, 2),
+            "with_flush_us": round(total_seconds / invocations * 1e6, 2),
+        }, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-invocation overhead of each telemetry mode")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes: {', '.join(MODES)}")
+    parser.add_argument("--invocations", type=int, default=2000, help="Simulated invocations per mode")
+    parser.add_argument("--think-ms", type=float, default=1.0, help="Idle time between invocations (model/network wait)")
+    parser.add_argument("--output", default=None, help="Path to write the results as JSON")
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.invocations, args.think_ms / 1000, args.result)
+        return
+
+    results = {"environment": environment_info(), "modes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(","):
+            result_path = os.path.join(tmp, f"{mode}.json")
+            env = {**os.environ, "AGENT_TELEMETRY_FILE": os.path.join(tmp, f"{mode}.jsonl")}
+            env.pop("AGENT_TELEMETRY_MODE", None)
+            subprocess.run(
+                [
+                    sys.executable, os.path.abspath(__file__), "--child", mode, "--invocations", str(args.invocations),
+                    "--think-ms", str(args.think_ms), "--result", result_path,
+                ],
+                env=env,
+                check=True,
+            )
+            with open(result_path) as f:
+                results["modes"][mode] = json.load(f)
+
+    baseline = results["modes"].get("unconfigured", {}).get("mean_us")
+    print(f"{'mode':<22} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'+flush us':>10} {'overhead us':>12}")
+    for mode, stats in results["modes"].items():
+        overhead = f"{stats['mean_us'] - baseline:>12.2f}" if baseline is not None else f"{'-':>12}"
+        print(f"{mode:<22} {stats['mean_us']:>10.2f} {stats['p50_us']:>10.2f} {stats['p99_us']:>10.2f} {stats['with_flush_us']:>10.2f} {overhead}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
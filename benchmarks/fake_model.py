@@ -0,0 +1,102 @@
+"""
+Deterministic stand-in for BedrockModel, so benchmarks measure the agent code rather than Bedrock.
+
+The model follows a fixed script: when the latest user prompt mentions a keyword of an
+available tool it requests that tool once, and after tool results come back (or when no
+tool matches) it streams a canned answer. An optional latency simulates time to first token.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from strands.models import Model
+
+# Tool name -> (prompt keyword that triggers it, tool input)
+TOOL_RULES: Dict[str, tuple] = {
+    "weather": ("weather", {}),
+    "calculator": ("calculate", {"expression": "120 * 3"}),
+    "get_weather": ("weather", {"city": "Oslo"}),
+    "get_forecast": ("forecast", {"city": "Oslo", "days": 3}),
+    "get_weather_batch": ("cities", {"cities": ["Oslo", "Paris", "Tokyo"]}),
+}
+
+ANSWER = "Here is your travel plan: pack light, check the weather before you leave and enjoy the trip."
+
+
+class FakeModel(Model):
+    """Scripted Strands model with configurable latency that records the time spent inside it"""
+
+    def __init__(self, latency: float = 0.0, chunks: int = 8):
+        self.config = {"model_id": "fake-model", "latency": latency, "chunks": chunks}
+        self.calls = 0
+        self.model_seconds = 0.0
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any):
+        raise NotImplementedError("FakeModel does not support structured output")
+        yield  # pragma: no cover
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        # Only time spent in this generator counts as model time, not the caller's event handling
+        started = time.perf_counter()
+        self.calls += 1
+        if self.config["latency"]:
+            await asyncio.sleep(self.config["latency"])
+        events = self._script(messages, tool_specs or [])
+        for event in events:
+            self.model_seconds += time.perf_counter() - started
+            yield event
+            started = time.perf_counter()
+        self.model_seconds += time.perf_counter() - started
+
+    def _script(self, messages: List[Dict[str, Any]], tool_specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        last = messages[-1] if messages else {"content": []}
+        tool_results = [block["toolResult"] for block in last.get("content", []) if "toolResult" in block]
+        prompt = " ".join(block.get("text", "") for block in last.get("content", [])).lower()
+
+        events: List[Dict[str, Any]] = [{"messageStart": {"role": "assistant"}}]
+        if not tool_results:
+            for spec in tool_specs:
+                rule = TOOL_RULES.get(spec["name"])
+                if rule and rule[0] in prompt:
+                    events += [
+                        {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tooluse_{self.calls}", "name": spec["name"]}}}},
+                        {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(rule[1])}}}},
+                        {"contentBlockStop": {}},
+                        {"messageStop": {"stopReason": "tool_use"}},
+                    ]
+                    return events + [self._metadata(messages, 20)]
+
+        answer = ANSWER
+        if tool_results:
+            texts = [item.get("text", "") for result in tool_results for item in result.get("content", [])]
+            answer = f"Based on {' '.join(texts)}: {ANSWER}"
+        words = answer.split(" ")
+        size = max(1, len(words) // self.config["chunks"])
+        events.append({"contentBlockStart": {"start": {}}})
+        for i in range(0, len(words), size):
+            text = " ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+            events.append({"contentBlockDelta": {"delta": {"text": text}}})
+        events += [{"contentBlockStop": {}}, {"messageStop": {"stopReason": "end_turn"}}]
+        return events + [self._metadata(messages, len(words))]
+
+    def _metadata(self, messages: List[Dict[str, Any]], output_tokens: int) -> Dict[str, Any]:
+        input_tokens = sum(len(json.dumps(message)) // 4 for message in messages)
+        return {
+            "metadata": {
+                "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+                "metrics": {"latencyMs": int(self.config["latency"] * 1000)},
+            }
+        }
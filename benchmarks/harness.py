@@ -0,0 +1,144 @@
+"""
+Shared helpers for the benchmark suite: loading the examples, stage timing and allocation tracking.
+"""
+import contextlib
+import importlib.util
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_example(directory: str, module_name: str, cwd: str = None) -> Any:
+    """Import an example module by path, with its directory first on sys.path.
+
+    The example directories start with digits and several of them ship modules with the same
+    name (admission_control, bedrock_throttling, ...), so sibling modules imported here are
+    dropped from sys.modules afterwards and the next example loads its own copies.
+    """
+    example_dir = os.path.join(REPO_ROOT, directory)
+    module_key = f"example_{directory}_{module_name}"
+    before = set(sys.modules)
+    sys.path.insert(0, example_dir)
+    previous_cwd = os.getcwd()
+    os.chdir(cwd or example_dir)
+    try:
+        spec = importlib.util.spec_from_file_location(module_key, os.path.join(example_dir, f"{module_name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(previous_cwd)
+        sys.path.remove(example_dir)
+        for name in set(sys.modules) - before - {module_key}:
+            path = getattr(sys.modules[name], "__file__", None) or ""
+            if path.startswith(example_dir + os.sep):
+                del sys.modules[name]
+    return module
+
+
+class StageRecorder:
+    """Collects per-stage durations and, when tracing, allocations.
+
+    Allocation tracing slows Python down considerably, so the runner records timings in one
+    pass and allocations in a separate traced pass. Stages must not be nested while tracing.
+    """
+
+    def __init__(self, trace_allocations: bool = False):
+        self.trace_allocations = trace_allocations
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.allocations: Dict[str, List[int]] = defaultdict(list)
+        self.peaks: Dict[str, List[int]] = defaultdict(list)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            current_before, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+            if self.trace_allocations:
+                current_after, peak = tracemalloc.get_traced_memory()
+                self.allocations[name].append(current_after - current_before)
+                self.peaks[name].append(peak - current_before)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a duration measured elsewhere (e.g. model time reported by the fake model)"""
+        self.durations[name].append(seconds)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summarize(timed: StageRecorder, traced: StageRecorder) -> Dict[str, Dict[str, float]]:
+    """Merge the timing pass and the allocation pass into per-stage statistics"""
+    stages = {}
+    for name, durations in timed.durations.items():
+        stats = {
+            "n": len(durations),
+            "mean_ms": round(sum(durations) / len(durations) * 1000, 3),
+            "p50_ms": round(percentile(durations, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(durations, 0.95) * 1000, 3),
+            "max_ms": round(max(durations) * 1000, 3),
+        }
+        if traced.allocations.get(name):
+            stats["retained_kb"] = round(sum(traced.allocations[name]) / len(traced.allocations[name]) / 1024, 1)
+            stats["peak_kb"] = round(max(traced.peaks[name]) / 1024, 1)
+        stages[name] = stats
+    return stages
+
+
+def environment_info() -> Dict[str, Any]:
+    """Commit and interpreter details, so results can be compared across commits"""
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+@contextlib.contextmanager
+def local_mcp_server(mode: str = "stateless") -> Iterator[str]:
+    """Run the weather MCP server from example 03 on a free local port and yield its URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server_dir = os.path.join(REPO_ROOT, "03_host_mcp_server")
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(server_dir, "scripts", "load_test_mcp.py"), "--serve", mode, "--port", str(port)],
+        cwd=server_dir,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("Local weather MCP server did not start")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}/mcp"
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
@@ -0,0 +1,141 @@
+"""
+End-to-end benchmark suite for the examples, with a deterministic fake model instead of Bedrock.
+
+Measures the latency and allocations the agent code itself adds (imports, tool registry setup,
+MCP connect, streaming, response extraction) independent of model time, and writes
+machine-readable results so they can be compared across commits:
+    python benchmarks/run_benchmarks.py --output results/$(git rev-parse --short HEAD).json
+    python benchmarks/run_benchmarks.py --only calls_mcp_04 --baseline results/main.json
+
+No AWS credentials, Bedrock access or deployed runtimes are needed; the MCP benchmarks start
+the weather MCP server from example 03 on a local port.
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+# Local-only configuration, set before the examples read it at import time
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_DEFAULT_REGION", os.environ["AWS_REGION"])
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scenarios  # noqa: E402
+from harness import StageRecorder, environment_info, summarize  # noqa: E402
+
+BENCHMARKS = {
+    "standalone_01": lambda *args: scenarios.bench_standalone("01_agent_standalone", *args),
+    "inbound_authn_02": lambda *args: scenarios.bench_standalone("02_agent_inbound_authn", *args),
+    "mcp_server_03": scenarios.bench_mcp_server,
+    "calls_mcp_04": scenarios.bench_calls_mcp,
+    "memory_05": scenarios.bench_memory,
+}
+
+
+def run_benchmark(name, iterations, trace_iterations, latency):
+    """Run a benchmark once for timings and once, shorter, with allocation tracing"""
+    timed = StageRecorder()
+    BENCHMARKS[name](timed, iterations, latency)
+
+    traced = StageRecorder(trace_allocations=True)
+    if trace_iterations:
+        tracemalloc.start()
+        try:
+            BENCHMARKS[name](traced, trace_iterations, latency)
+        finally:
+            tracemalloc.stop()
+    return summarize(timed, traced)
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return stages whose p50 regressed by more than `threshold` (and `min_delta_ms`) against the baseline"""
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        base_stages = baseline.get("benchmarks", {}).get(name, {}).get("stages", {})
+        for stage, stats in result.get("stages", {}).items():
+            base = base_stages.get(stage)
+            if not base or not base["p50_ms"]:
+                continue
+            delta = stats["p50_ms"] - base["p50_ms"]
+            if delta > min_delta_ms and delta / base["p50_ms"] > threshold:
+                regressions.append((name, stage, base["p50_ms"], stats["p50_ms"]))
+    return regressions
+
+
+def print_results(results):
+    for name, result in results["benchmarks"].items():
+        print(f"\n📊 {name}")
+        if "error" in result:
+            print(f"   ❌ {result['error']}")
+            continue
+        print(f"   {'stage':<32} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'retained KB':>12} {'peak KB':>10}")
+        for stage, stats in result["stages"].items():
+            print(
+                f"   {stage:<32} {stats['n']:>5} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+                f"{stats.get('retained_kb', ''):>12} {stats.get('peak_kb', ''):>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the examples with a fake Bedrock model")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma-separated benchmarks: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, default=20, help="Iterations of the timing pass")
+    parser.add_argument("--trace-iterations", type=int, default=3, help="Iterations of the allocation pass (0 to skip)")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Simulated time to first token of the fake model")
+    parser.add_argument("--output", default=None, help="Path to write the results as JSON")
+    parser.add_argument("--baseline", default=None, help="Results JSON of an earlier commit to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative p50 increase reported as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore p50 increases smaller than this")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results = {
+        "environment": environment_info(),
+        "config": {
+            "iterations": args.iterations,
+            "trace_iterations": args.trace_iterations,
+            "model_latency_ms": args.model_latency_ms,
+        },
+        "benchmarks": {},
+    }
+    failed = False
+    for name in selected:
+        print(f"🔄 Running {name}...")
+        try:
+            stages = run_benchmark(name, args.iterations, args.trace_iterations, args.model_latency_ms / 1000)
+            results["benchmarks"][name] = {"stages": stages}
+        except Exception as e:
+            failed = True
+            results["benchmarks"][name] = {"error": f"{type(e).__name__}: {e}"}
+
+    print_results(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        print(f"\nCompared with {baseline.get('environment', {}).get('commit', args.baseline)[:12]}:")
+        for name, stage, before, after in regressions:
+            print(f"   ⚠️  {name}/{stage}: p50 {before:.3f} ms -> {after:.3f} ms")
+        if not regressions:
+            print("   ✅ No regressions")
+        failed = failed or bool(regressions)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
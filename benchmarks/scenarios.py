@@ -0,0 +1,203 @@
+"""
+One benchmark scenario per example. Each scenario imports the example as shipped, swaps the
+Bedrock model for FakeModel (and AgentCore services for local stand-ins) and records its
+stages on the given StageRecorder.
+"""
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from typing import Dict
+
+from strands import Agent
+
+from fake_model import FakeModel
+from harness import StageRecorder, load_example, local_mcp_server
+
+STANDALONE_PROMPTS: Dict[str, str] = {
+    "plain": "Suggest a relaxing weekend in Lisbon",
+    "weather_tool": "What is the weather like for my trip?",
+    "calculator_tool": "Please calculate my hotel budget for three nights",
+}
+MCP_PROMPT = "What is the weather in Oslo this weekend?"
+MEMORY_TURNS = 20
+
+
+def record_model_split(recorder: StageRecorder, stage: str, model: FakeModel, model_seconds_before: float) -> None:
+    """Split the last duration of a stage into time inside the model and agent overhead"""
+    model_seconds = model.model_seconds - model_seconds_before
+    recorder.record(f"model_{stage}", model_seconds)
+    recorder.record(f"overhead_{stage}", recorder.durations[stage][-1] - model_seconds)
+
+
+def unsigned_jwt(claims: Dict) -> str:
+    """Token that the examples can decode for subject and expiry; nothing verifies it locally"""
+    def encode(part: Dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode(claims)}.c2lnbmF0dXJl"
+
+
+def bench_standalone(directory: str, recorder: StageRecorder, iterations: int, latency: float) -> None:
+    """01/02: entrypoint invocation with and without tool calls"""
+    with recorder.stage("import"):
+        module = load_example(directory, "travel_agent_standalone")
+    system_prompt = module.agent.system_prompt
+
+    # The entrypoint prints every request; keep the output but not the terminal I/O cost
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            model = FakeModel(latency=latency)
+            with recorder.stage("agent_construction"):
+                module.agent = Agent(
+                    model=model,
+                    tools=[module.calculator, module.weather],
+                    system_prompt=system_prompt,
+                    callback_handler=None,
+                )
+            for name, prompt in STANDALONE_PROMPTS.items():
+                stage = f"invoke_{name}"
+                before = model.model_seconds
+                with recorder.stage(stage):
+                    response = module.travel_agent_bedrock({"prompt": prompt})
+                if not isinstance(response, str):
+                    raise RuntimeError(f"Unexpected response from {directory}: {response}")
+                record_model_split(recorder, stage, model, before)
+
+
+def bench_mcp_server(recorder: StageRecorder, iterations: int, latency: float) -> None:
+    """03: tool dispatch in-process and full MCP round trips over streamable-HTTP"""
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    with recorder.stage("import"):
+        module = load_example("03_host_mcp_server", "weather_mcp_server")
+    cities = [f"City{i}" for i in range(10)]
+
+    async def in_process() -> None:
+        for i in range(iterations):
+            with recorder.stage("tool_call_uncached"):
+                await module.mcp.call_tool("get_weather", {"city": f"Uncached{i}-{time.perf_counter_ns()}"})
+            with recorder.stage("tool_call_cached"):
+                await module.mcp.call_tool("get_weather", {"city": "Oslo"})
+            with recorder.stage("tool_call_batch_10"):
+                await module.mcp.call_tool("get_weather_batch", {"cities": cities})
+
+    async def over_transport(url: str) -> None:
+        for _ in range(iterations):
+            async with contextlib.AsyncExitStack() as stack:
+                with recorder.stage("mcp_initialize"):
+                    read_stream, write_stream, _ = await stack.enter_async_context(streamablehttp_client(url))
+                    session = await stack.enter_async_context(ClientSession(read_stream, write_stream))
+                    await session.initialize()
+                with recorder.stage("mcp_list_tools"):
+                    await session.list_tools()
+                with recorder.stage("mcp_call_tool"):
+                    await session.call_tool("get_weather", {"city": "Oslo"})
+
+    asyncio.run(in_process())
+    with local_mcp_server() as url:
+        asyncio.run(over_transport(url))
+
+
+def bench_calls_mcp(recorder: StageRecorder, iterations: int, latency: float) -> None:
+    """04: MCP connect (pooled vs. fresh) and streamed invocations against a local MCP server"""
+    from bedrock_agentcore.runtime import RequestContext
+
+    with local_mcp_server() as url, tempfile.TemporaryDirectory() as config_dir:
+        with open(os.path.join(config_dir, "weather_mcp.json"), "w") as f:
+            json.dump({"MCP_AUTH_SCOPE": "api://benchmark/.default", "MCP_URL": url}, f)
+        with recorder.stage("import"):
+            module = load_example("04_agent_calls_mcp", "travel_agent_calls_mcp", cwd=config_dir)
+        model = FakeModel(latency=latency)
+        module.model = model
+
+        token = unsigned_jwt({"sub": "benchmark-user", "exp": int(time.time()) + 3600})
+        headers = {"Authorization": f"Bearer {token}"}
+        subject = module.token_subject(token)
+
+        async def invoke(stage: str, session_id: str) -> None:
+            context = RequestContext(session_id=session_id, request_headers=headers)
+            before = model.model_seconds
+            started = time.perf_counter()
+            first_delta = None
+            with recorder.stage(stage):
+                async for chunk in module.agent_invocation({"prompt": MCP_PROMPT}, context):
+                    if isinstance(chunk, dict) and chunk.get("type") == "delta" and first_delta is None:
+                        first_delta = time.perf_counter() - started
+                    elif isinstance(chunk, str) and (chunk.startswith("❌") or "🔐" in chunk):
+                        # Never fall through to the OAuth flow, it would call AgentCore Identity
+                        raise RuntimeError(f"Invocation failed: {chunk}")
+            recorder.record(f"first_delta_{stage}", first_delta or 0.0)
+            record_model_split(recorder, stage, model, before)
+
+        async def invoke_with_drop(session_id: str) -> None:
+            """Resumable invocation whose connection drops at the first delta, then resumes"""
+            context = RequestContext(session_id=session_id, request_headers=headers)
+            stream = module.agent_invocation({"prompt": MCP_PROMPT, "resumable": True}, context)
+            async for chunk in stream:
+                last_event_id = chunk["id"]
+                if chunk.get("type") == "delta":
+                    break
+            await stream.aclose()  # the client connection drops, the generation continues
+            calls = model.calls
+            resume_headers = {**headers, module.LAST_EVENT_ID_HEADER: last_event_id}
+            resume_context = RequestContext(session_id=session_id, request_headers=resume_headers)
+            with recorder.stage("resume_after_drop"):
+                async for chunk in module.agent_invocation({"prompt": MCP_PROMPT}, resume_context):
+                    if chunk.get("type") == "resume_failed":
+                        raise RuntimeError(f"Resume failed: {chunk}")
+            if model.calls != calls:
+                raise RuntimeError("Resuming the stream called the model again")
+
+        async def run() -> None:
+            # The token is served from the cache, so AgentCore Identity is never called
+            module.mcp_token_cache.put(module.inbound_user_id(RequestContext(session_id="", request_headers=headers)), token)
+            for i in range(iterations):
+                module.mcp_session_pool.invalidate(token)
+                module.mcp_tool_cache.invalidate(module.MCP_URL, subject)
+                with recorder.stage("mcp_connect_cold"):
+                    client, _, _ = await module.run_blocking(module.connect_mcp, token, subject)
+                module.mcp_session_pool.release(client)
+                with recorder.stage("mcp_connect_pooled"):
+                    client, _, _ = await module.run_blocking(module.connect_mcp, token, subject)
+                module.mcp_session_pool.release(client)
+                # First turn builds the session agent, the follow-up reuses it from the registry
+                session_id = f"benchmark-session-{i}-{time.time_ns()}"
+                await invoke("invoke_new_session", session_id)
+                await invoke("invoke_same_session", session_id)
+                await invoke_with_drop(f"benchmark-resume-{i}-{time.time_ns()}")
+
+        try:
+            asyncio.run(run())
+        finally:
+            module.mcp_session_pool.close()
+            module.blocking_executor.shutdown(wait=False)
+
+
+def bench_memory(recorder: StageRecorder, iterations: int, latency: float) -> None:
+    """05: turn cost as the conversation grows (no AgentCore Memory session manager)"""
+    with recorder.stage("import"):
+        module = load_example("05_agent_memory", "travel_agent_with_memory")
+
+    for _ in range(iterations):
+        model = FakeModel(latency=latency)
+        with recorder.stage("agent_construction"):
+            agent = Agent(
+                name="TravelAssistant",
+                model=model,
+                system_prompt="You are a helpful assistant with access to travel information.",
+                # The history view prints through rich; render it without terminal I/O
+                hooks=[module.HistoryInspector(console=module.Console(file=io.StringIO()))],
+                callback_handler=None,
+            )
+        for turn in range(1, MEMORY_TURNS + 1):
+            before = model.model_seconds
+            with recorder.stage("turn"):
+                agent(f"Turn {turn}: suggest one more stop on my trip")
+            record_model_split(recorder, "turn", model, before)
+            if turn in (1, MEMORY_TURNS):
+                recorder.record(f"overhead_turn_{turn}", recorder.durations["overhead_turn"][-1])